@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Complaint,ComplaintUpdate,Notification,ComplaintImage
+from .models import CustomUser, Complaint,ComplaintUpdate,Notification,ComplaintImage,SlowQuery,IdempotencyKey,BroadcastNotification
 
 
 # --------------------------------------
@@ -51,6 +51,22 @@ class NotificationAdmin(admin.ModelAdmin):
     list_display = ('recipient', 'message', 'read', 'created_at')
     list_filter = ('read', 'created_at')
     search_fields = ('recipient__email', 'message')
+
+class BroadcastNotificationAdmin(admin.ModelAdmin):
+    list_display = ('audience', 'message', 'complaint', 'created_at')
+    list_filter = ('audience', 'created_at')
+    search_fields = ('message',)
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('view', 'sql', 'count', 'max_ms', 'total_ms', 'full_scan', 'last_seen')
+    list_filter = ('full_scan', 'view')
+    search_fields = ('sql', 'view')
+    readonly_fields = ('fingerprint', 'plan', 'first_seen', 'last_seen')
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('user', 'key', 'method', 'path', 'status_code', 'created_at', 'expires_at')
+    list_filter = ('method', 'status_code')
+    search_fields = ('key', 'user__email', 'path')
+    readonly_fields = ('request_fingerprint', 'response_body', 'created_at')
 # --------------------------------------
 # 3️⃣ REGISTER MODELS
 # --------------------------------------
@@ -58,4 +74,6 @@ admin.site.register(CustomUser, CustomUserAdmin)
 admin.site.register(Complaint, ComplaintAdmin)
 admin.site.register(ComplaintUpdate, ComplaintUpdateAdmin)
 admin.site.register(Notification, NotificationAdmin)
-
+admin.site.register(BroadcastNotification, BroadcastNotificationAdmin)
+admin.site.register(SlowQuery, SlowQueryAdmin)
+admin.site.register(IdempotencyKey, IdempotencyKeyAdmin)
@@ -0,0 +1,162 @@
+# myapp/archive.py
+"""
+Hot/cold split for complaints.
+
+Resolved complaints with feedback whose last change is older than
+COMPLAINT_ARCHIVE_AFTER_DAYS are moved, with their updates, feedback, image
+rows and notifications, into the Archived* tables by
+`manage.py archive_complaints`, in batches of one short transaction each.
+myapp_complaint and its indexes then only hold the complaints still being
+worked on, which is all DepartmentComplaintsView and the admin queue scan.
+
+Reads that must still find old complaints fall back to the archive: the
+detail and timeline endpoints, a citizen's own list, and the admin list
+with ?archived=1. Archived rows keep their ids and are rendered through
+ArchivedComplaint.to_complaint(), so responses look the same.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from . import geo
+from .changes import record_removed
+from .db import retry_on_db_lock
+from .models import (
+    ArchivedBroadcastNotification, ArchivedComplaint, ArchivedComplaintImage, ArchivedComplaintUpdate,
+    ArchivedFeedback, ArchivedNotification, BroadcastNotification, Complaint, ComplaintImage,
+    ComplaintUpdate, Feedback, Notification,
+)
+from .retention import copy_rows
+
+# Rows that belong to a complaint and move with it
+DEPENDENTS = (
+    (ComplaintUpdate, ArchivedComplaintUpdate),
+    (Feedback, ArchivedFeedback),
+    (ComplaintImage, ArchivedComplaintImage),
+    (Notification, ArchivedNotification),
+    (BroadcastNotification, ArchivedBroadcastNotification),
+)
+
+
+def archive_after(days=None):
+    return timedelta(days=days if days is not None else getattr(settings, 'COMPLAINT_ARCHIVE_AFTER_DAYS', 180))
+
+
+def archive_candidates(cutoff):
+    return Complaint.objects.filter(status='resolved', feedback__isnull=False, updated_at__lt=cutoff)
+
+
+def _columns(model, archive_model=None):
+    """The model's column names, limited to those the archive table also has."""
+    names = [field.attname for field in model._meta.concrete_fields]
+    if archive_model is None:
+        return names
+    archived = {field.attname for field in archive_model._meta.concrete_fields}
+    return [name for name in names if name in archived]
+
+
+@retry_on_db_lock
+def archive_batch(cutoff, after_id, batch_size):
+    """Moves the next batch of complaints with id > after_id; returns (last id moved, complaints moved)."""
+    rows = list(
+        archive_candidates(cutoff).filter(pk__gt=after_id).order_by('pk')
+        .values(*_columns(Complaint, ArchivedComplaint))[:batch_size]
+    )
+    if not rows:
+        return after_id, 0
+    ids = [row['id'] for row in rows]
+    copy_rows(rows, ArchivedComplaint)
+    record_removed(rows, 'archived')
+    geo.invalidate(rows)
+    for model, archive_model in DEPENDENTS:
+        rows = model.objects.filter(complaint_id__in=ids).values(*_columns(model, archive_model))
+        copy_rows(list(rows), archive_model)
+    # The dependents' rows go with it through on_delete=CASCADE
+    Complaint.objects.filter(pk__in=ids).delete()
+    return ids[-1], len(ids)
+
+
+def archive_complaints(days=None, batch_size=500, pause=0.0, deadline=None, dry_run=False):
+    """
+    Archives complaints resolved more than `days` ago (default
+    COMPLAINT_ARCHIVE_AFTER_DAYS) until none are left or time.monotonic()
+    passes deadline.
+    """
+    cutoff = timezone.now() - archive_after(days)
+    stats = {'cutoff': cutoff.isoformat()}
+    if dry_run:
+        return {**stats, 'eligible': archive_candidates(cutoff).count()}
+
+    moved = batches = 0
+    after_id, complete = 0, False
+    started = time.monotonic()
+    while deadline is None or time.monotonic() < deadline:
+        after_id, count = archive_batch(cutoff, after_id, batch_size)
+        if not count:
+            complete = True
+            break
+        moved += count
+        batches += 1
+        if pause:
+            time.sleep(pause)
+
+    seconds = time.monotonic() - started
+    stats.update({
+        'moved': moved,
+        'batches': batches,
+        'seconds': round(seconds, 3),
+        'complaints_per_sec': round(moved / seconds, 1) if seconds else None,
+        'complete': complete,
+    })
+    return stats
+
+
+# -------------------------------
+# Reading the archive
+# -------------------------------
+def archived_complaints():
+    """Archived complaints with everything to_complaint() needs, in the same queries as a hot list."""
+    return ArchivedComplaint.objects.select_related('citizen', 'department', 'feedback').prefetch_related('images')
+
+
+def find_archived_complaint(pk, user):
+    """The archived complaint as a Complaint instance, if `user` may see it; else None."""
+    queryset = archived_complaints()
+    if not user.is_staff:
+        queryset = queryset.filter(citizen=user)
+    archived = queryset.filter(pk=pk).first()
+    return archived.to_complaint() if archived else None
+
+
+def archived_updates(complaint_id):
+    """The archived entries of a complaint's timeline as ComplaintUpdate instances, newest first."""
+    rows = ArchivedComplaintUpdate.objects.filter(complaint_id=complaint_id).order_by('-created_at')
+    updates = [ComplaintUpdate(**{name: getattr(row, name) for name in _columns(ComplaintUpdate)}) for row in rows]
+    users = get_user_model().objects.in_bulk({update.user_id for update in updates if update.user_id})
+    for update in updates:
+        update.user = users.get(update.user_id)
+    return updates
+
+
+def complaint_timeline(updates, complaint_id):
+    """
+    A complaint's hot `updates` plus its archived ones, newest first. The
+    archive holds the whole timeline of an archived complaint, and the
+    entries the complaint_updates retention policy moved out of a hot one.
+    """
+    return sorted([*updates, *archived_updates(complaint_id)], key=lambda update: update.created_at, reverse=True)
+
+
+def merge_archived(complaints, archived):
+    """Hot complaints plus archived ones (as Complaint instances), newest first."""
+    return sorted(
+        [*complaints, *(complaint.to_complaint() for complaint in archived)],
+        key=lambda complaint: complaint.created_at, reverse=True,
+    )
+
+
+def wants_archived(params):
+    return params.get('archived', '').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,163 @@
+# myapp/async_views.py
+"""
+Async versions of the hot read endpoints (complaint lists, detail, update
+timeline, notifications) for ASGI deployments (myproject/asgi.py).
+
+DRF views are sync-only, so these are plain Django async views: the JWT is
+validated without touching the database, the user is loaded with the async
+ORM, and rows are fetched (with their relations prefetched) before the
+existing DRF serializers turn them into JSON. The responses match the sync
+endpoints field for field.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .archive import archived_complaints, complaint_timeline, find_archived_complaint, merge_archived, wants_archived
+from .filters import filter_complaints
+from .models import Complaint, ComplaintUpdate, notification_feed
+from .routers import replica_reads
+from .serializers import ComplaintSerializer, ComplaintUpdateLogSerializer, NotificationFeedSerializer
+
+User = get_user_model()
+
+_jwt = JWTAuthentication()
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder)
+
+
+async def authenticate(request):
+    """Async equivalent of JWTAuthentication.authenticate; returns the user or None."""
+    header = _jwt.get_header(request)
+    if header is None:
+        return None
+    raw_token = _jwt.get_raw_token(header)
+    if raw_token is None:
+        return None
+    validated_token = _jwt.get_validated_token(raw_token)  # Signature/expiry only, no DB
+    try:
+        user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken("Token contained no recognizable user identification")
+    try:
+        user = await User.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+    except User.DoesNotExist:
+        raise AuthenticationFailed("User not found")
+    if not user.is_active:
+        raise AuthenticationFailed("User is inactive")
+    return user
+
+
+def async_api_view(admin_only=False):
+    """
+    GET-only async view with JWT auth, mirroring
+    IsAuthenticated (and IsAdminUser when admin_only) on the sync views.
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return _json({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+            try:
+                user = await authenticate(request)
+            except (InvalidToken, TokenError, AuthenticationFailed) as e:
+                return _json({"detail": str(e)}, status=401)
+            if user is None:
+                return _json({"detail": "Authentication credentials were not provided."}, status=401)
+            if admin_only and not user.is_staff:
+                return _json({"detail": "You do not have permission to perform this action."}, status=403)
+
+            request.user = user
+            try:
+                return await view_func(request, *args, **kwargs)
+            except serializers.ValidationError as e:
+                return _json(e.detail, status=400)
+        return wrapper
+    return decorator
+
+
+def complaint_queryset():
+    # Everything ComplaintSerializer touches has to be loaded up front:
+    # lazy relation access is not allowed from async code
+    return Complaint.objects.select_related('citizen', 'department', 'feedback').prefetch_related('images')
+
+
+async def serialize_complaints(queryset):
+    complaints = [complaint async for complaint in queryset]
+    return ComplaintSerializer(complaints, many=True).data
+
+
+async def serialize_with_archived(queryset, archived):
+    complaints = [complaint async for complaint in queryset]
+    archived = [complaint async for complaint in archived]
+    return ComplaintSerializer(merge_archived(complaints, archived), many=True).data
+
+
+# -------------------------------
+# ✅ ASYNC COMPLAINT LISTS
+# -------------------------------
+@async_api_view()
+async def my_complaints(request):
+    queryset = complaint_queryset().filter(citizen=request.user).order_by('-created_at')
+    archived = archived_complaints().filter(citizen=request.user)
+    return _json(await serialize_with_archived(filter_complaints(queryset, request.GET),
+                                               filter_complaints(archived, request.GET)))
+
+
+@replica_reads
+@async_api_view(admin_only=True)
+async def all_complaints(request):
+    queryset = filter_complaints(complaint_queryset().order_by('-created_at'), request.GET)
+    if wants_archived(request.GET):
+        return _json(await serialize_with_archived(queryset, filter_complaints(archived_complaints(), request.GET)))
+    return _json(await serialize_complaints(queryset))
+
+
+@replica_reads
+@async_api_view()
+async def department_complaints(request):
+    queryset = complaint_queryset().filter(department=request.user).order_by('-created_at')
+    return _json(await serialize_complaints(filter_complaints(queryset, request.GET)))
+
+
+# -------------------------------
+# ✅ ASYNC COMPLAINT DETAIL + TIMELINE
+# -------------------------------
+@async_api_view()
+async def complaint_detail(request, pk):
+    queryset = complaint_queryset()
+    if not request.user.is_staff:
+        queryset = queryset.filter(citizen=request.user)
+    complaint = await queryset.filter(pk=pk).afirst()
+    if complaint is None:
+        complaint = await sync_to_async(find_archived_complaint)(pk, request.user)
+    if complaint is None:
+        return _json({"detail": "No Complaint matches the given query."}, status=404)
+    return _json(ComplaintSerializer(complaint).data)
+
+
+@async_api_view()
+async def complaint_updates(request, pk):
+    queryset = ComplaintUpdate.objects.filter(complaint_id=pk).select_related('user')
+    updates = await sync_to_async(complaint_timeline)([update async for update in queryset], pk)
+    return _json(ComplaintUpdateLogSerializer(updates, many=True).data)
+
+
+# -------------------------------
+# ✅ ASYNC NOTIFICATIONS
+# -------------------------------
+@replica_reads
+@async_api_view()
+async def notification_list(request):
+    notifications = [n async for n in notification_feed(request.user)]
+    return _json(NotificationFeedSerializer(notifications, many=True).data)
@@ -0,0 +1,292 @@
+# myapp/benchmark.py
+"""
+Small load-benchmark toolkit used by the benchmark_* management commands.
+
+Requests go either through Django's test client (in-process, with per-request
+query counts), through the real ASGI application on an in-process event loop,
+or over HTTP to a running server (--base-url). Results come out as plain
+dicts so runs can be dumped to JSON and diffed.
+"""
+import asyncio
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import get_resolver
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, wall_seconds):
+    """
+    Turns a list of (latency_seconds, status_code, query_count, response_bytes)
+    samples into the JSON-friendly stats block every benchmark reports.
+    """
+    latencies = sorted(sample[0] * 1000 for sample in samples)
+    queries = [sample[2] for sample in samples if sample[2] is not None]
+    statuses = Counter(str(sample[1]) for sample in samples)
+    errors = sum(count for code, count in statuses.items() if not code.startswith(('2', '3')))
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'status_codes': dict(statuses),
+        'throughput_rps': round(len(samples) / wall_seconds, 2) if wall_seconds else None,
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else None,
+        'p50_ms': round(percentile(latencies, 50), 3) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95), 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 3) if latencies else None,
+        'max_ms': round(latencies[-1], 3) if latencies else None,
+        'queries_mean': round(sum(queries) / len(queries), 2) if queries else None,
+        'queries_max': max(queries) if queries else None,
+        'response_bytes_mean': round(sum(sample[3] for sample in samples) / len(samples)) if samples else None,
+    }
+
+
+# -------------------------------
+# Transports
+# -------------------------------
+class TestClientTransport:
+    """In-process requests through django.test.Client, counting queries per request."""
+    measures_queries = True
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _client(self):
+        if not hasattr(self._local, 'client'):
+            self._local.client = Client()
+        return self._local.client
+
+    def request(self, method, path, token=None, data=None, multipart=False):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        kwargs = dict(headers)
+        if data is not None:
+            if multipart:
+                kwargs['data'] = data
+            else:
+                kwargs['data'] = json.dumps(data)
+                kwargs['content_type'] = 'application/json'
+
+        client = self._client()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, method.lower())(path, **kwargs)
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+            elapsed = time.perf_counter() - started
+        return elapsed, response.status_code, len(queries), len(body)
+
+    def close_thread(self):
+        connection.close()
+
+
+class HttpTransport:
+    """Requests against a running server, e.g. runserver, gunicorn or uvicorn."""
+    measures_queries = False
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, token=None, data=None, multipart=False):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        body = None
+        if data is not None:
+            if multipart:
+                boundary = uuid.uuid4().hex
+                parts = [
+                    f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'
+                    for key, value in data.items()
+                ]
+                body = (''.join(parts) + f'--{boundary}--\r\n').encode()
+                headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+            else:
+                body = json.dumps(data).encode()
+                headers['Content-Type'] = 'application/json'
+
+        req = urllib.request.Request(self.base_url + path, data=body, method=method.upper(), headers=headers)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req) as response:
+                size = len(response.read())
+                code = response.status
+        except urllib.error.HTTPError as e:
+            size = len(e.read())
+            code = e.code
+        return time.perf_counter() - started, code, None, size
+
+    def close_thread(self):
+        pass
+
+
+class AsgiTransport:
+    """
+    In-process requests through the same ASGI application myproject/asgi.py
+    serves (per-request thread-sensitive contexts included), so many requests
+    can be in flight on one event loop. request() is a coroutine.
+    """
+    measures_queries = False
+
+    def __init__(self):
+        self.application = get_asgi_application()
+
+    async def request(self, method, path, token=None, data=None, multipart=False):
+        if multipart:
+            raise ValueError("AsgiTransport only sends JSON bodies")
+        path, _, query = path.partition('?')
+        headers = [(b'host', b'testserver')]
+        if token:
+            headers.append((b'authorization', f'Bearer {token}'.encode()))
+        body = b''
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers.append((b'content-type', b'application/json'))
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': method.upper(), 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': query.encode(), 'headers': headers,
+            'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+        }
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            # Django keeps listening for a disconnect; never send one
+            await asyncio.Future()
+
+        response = {'status': None, 'size': 0}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+            elif message['type'] == 'http.response.body':
+                response['size'] += len(message.get('body', b''))
+
+        started = time.perf_counter()
+        await self.application(scope, receive, send)
+        return time.perf_counter() - started, response['status'], None, response['size']
+
+
+# -------------------------------
+# Database connection sampling
+# -------------------------------
+def database_connection_count(alias='default'):
+    """
+    Server-side connection count for the database, or None where the backend
+    can't tell us (SQLite has no server). Includes the sampling connection itself.
+    """
+    conn = connections[alias]
+    if conn.vendor != 'postgresql':
+        return None
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()")
+        return cursor.fetchone()[0]
+
+
+class ConnectionSampler:
+    """Polls database_connection_count() in the background and keeps the peak."""
+    def __init__(self, interval=0.25, alias='default'):
+        self.interval = interval
+        self.alias = alias
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='connection-sampler', daemon=True)
+
+    def _run(self):
+        try:
+            while True:
+                count = database_connection_count(self.alias)
+                if count is None:
+                    return
+                self.peak = count if self.peak is None else max(self.peak, count)
+                if self._stop.wait(self.interval):
+                    return
+        finally:
+            connections[self.alias].close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+# -------------------------------
+# Runner
+# -------------------------------
+def run_scenario(transport, request_fn, total_requests, concurrency):
+    """
+    Runs `request_fn(transport, i)` total_requests times spread over
+    `concurrency` worker threads and returns the summary stats, including
+    the peak number of server-side DB connections where measurable.
+    """
+    def worker(indexes):
+        samples = []
+        try:
+            for i in indexes:
+                samples.append(request_fn(transport, i))
+        finally:
+            transport.close_thread()
+        return samples
+
+    chunks = [range(n, total_requests, concurrency) for n in range(concurrency)]
+    with ConnectionSampler() as sampler:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(worker, chunks))
+        wall = time.perf_counter() - started
+    stats = summarize([sample for samples in results for sample in samples], wall)
+    stats['db_connections_peak'] = sampler.peak
+    return stats
+
+
+def run_async_scenario(transport, request_fn, total_requests, concurrency):
+    """
+    Event-loop counterpart of run_scenario: `await request_fn(transport, i)`
+    with at most `concurrency` requests in flight on a single thread.
+    """
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with semaphore:
+                return await request_fn(transport, i)
+
+        return await asyncio.gather(*(one(i) for i in range(total_requests)))
+
+    with ConnectionSampler() as sampler:
+        started = time.perf_counter()
+        samples = asyncio.run(run())
+        wall = time.perf_counter() - started
+    stats = summarize(samples, wall)
+    stats['db_connections_peak'] = sampler.peak
+    return stats
+
+
+def without_throttles():
+    """Empties the throttle budgets, so a benchmark measures the endpoint rather than its 429s."""
+    return override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}})
+
+
+def api_route_names(urlconf='myapp.urls'):
+    """Every named route in the app's urlconf, so the runner can flag uncovered ones."""
+    return {pattern.name for pattern in get_resolver(urlconf).url_patterns if pattern.name}
@@ -0,0 +1,27 @@
+# myapp/bulk.py
+from contextlib import contextmanager
+
+from .models import Complaint, ComplaintUpdate, Feedback
+
+
+@contextmanager
+def historical_timestamps():
+    """
+    bulk_create still runs auto_now/auto_now_add, which would stamp every
+    imported or generated row with the current time. Switch them off for
+    the duration of the block so explicit created_at/updated_at values stick.
+    """
+    fields = [
+        Complaint._meta.get_field('created_at'),
+        Complaint._meta.get_field('updated_at'),
+        ComplaintUpdate._meta.get_field('created_at'),
+        Feedback._meta.get_field('created_at'),
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
@@ -0,0 +1,126 @@
+# myapp/changes.py
+"""
+Change feed behind /api/complaints/changes/, so clients keep a local copy
+of their complaint list and sync it in O(changes) instead of reloading it.
+
+Every write to a complaint stamps Complaint.change_seq with the next number
+of one global sequence. A complaint leaving a list (deleted, archived, or
+reassigned away from a department) leaves a ComplaintTombstone numbered
+from the same sequence. A client sends the last number it has seen and
+gets back its complaints with a higher change_seq, plus the ids to drop.
+
+The sequence is a Checkpoint row incremented inside the writer's
+transaction. Its lock (on SQLite, the write lock BEGIN IMMEDIATE takes)
+is held until commit, so numbers become visible in order: once a reader
+sees N, every number below N is already committed and the cursor never
+skips a change. The cost is that complaint writes take turns on that
+row, which SQLite's single writer does anyway.
+
+Bulk writers stamp their rows with stamp_new() (bulk_create) or stamp()
+(queryset.update()); Complaint.save() and Feedback.save() do it
+themselves.
+"""
+from django.db.models import F
+
+from .models import Checkpoint, Complaint, ComplaintTombstone
+
+SEQUENCE = 'complaint-changes'
+# Reasons that take a complaint out of each role's list; citizens still see their archived ones
+ADMIN_REMOVALS = ('deleted', 'archived')
+CITIZEN_REMOVALS = ('deleted',)
+
+
+def next_seq(count=1):
+    """
+    Reserves `count` sequence numbers and returns the last. Call it inside
+    the transaction that writes the rows, so the numbers commit with them.
+    """
+    if not Checkpoint.objects.filter(name=SEQUENCE).update(last_id=F('last_id') + count):
+        Checkpoint.objects.get_or_create(name=SEQUENCE)
+        Checkpoint.objects.filter(name=SEQUENCE).update(last_id=F('last_id') + count)
+    return Checkpoint.objects.filter(name=SEQUENCE).values_list('last_id', flat=True).get()
+
+
+def stamp_new(complaints):
+    """Numbers unsaved complaints before bulk_create()."""
+    first = next_seq(len(complaints)) - len(complaints) + 1 if complaints else 0
+    for offset, complaint in enumerate(complaints):
+        complaint.change_seq = first + offset
+
+
+def stamp(ids):
+    """Moves complaints changed by queryset.update() (or through a related row) to the end of the feed."""
+    ids = list(ids)
+    if not ids:
+        return
+    first = next_seq(len(ids)) - len(ids) + 1
+    Complaint.objects.bulk_update(
+        [Complaint(pk=pk, change_seq=first + offset) for offset, pk in enumerate(ids)], ['change_seq'], batch_size=500,
+    )
+
+
+def record_removed(rows, reason='deleted'):
+    """Tombstones for complaints leaving the lists; `rows` are dicts with id and department_id/citizen_id."""
+    if not rows:
+        return
+    first = next_seq(len(rows)) - len(rows) + 1
+    ComplaintTombstone.objects.bulk_create([
+        ComplaintTombstone(
+            change_seq=first + offset, complaint_id=row['id'], reason=reason,
+            department_id=row.get('department_id'), citizen_id=row.get('citizen_id'),
+        )
+        for offset, row in enumerate(rows)
+    ])
+
+
+def scoped(user):
+    """
+    The complaints, tombstones and archived complaints (None when the role's
+    list has none) in `user`'s feed, or None if the role has no complaint list.
+    """
+    from .archive import archived_complaints  # archive imports this module
+
+    if user.is_staff:
+        return Complaint.objects.all(), ComplaintTombstone.objects.filter(reason__in=ADMIN_REMOVALS), None
+    if user.role == 'department':
+        return (
+            Complaint.objects.filter(department=user), ComplaintTombstone.objects.filter(department_id=user.id), None,
+        )
+    if user.role == 'citizen':
+        # Archived complaints keep their last change_seq, so one archived before the
+        # citizen saw its last change (e.g. their feedback) still reaches them
+        return (
+            Complaint.objects.filter(citizen=user),
+            ComplaintTombstone.objects.filter(citizen_id=user.id, reason__in=CITIZEN_REMOVALS),
+            archived_complaints().filter(citizen=user),
+        )
+    return None
+
+
+def changes_since(user, cursor, limit):
+    """
+    The next page of `user`'s feed after `cursor`: (complaints, removed
+    complaint ids, new cursor, has_more). Complaints are the rows as they
+    are now, so clients apply the removals first and then the complaints.
+    """
+    complaints, tombstones, archived = scoped(user)
+    events = [
+        (complaint.change_seq, complaint) for complaint in
+        complaints.filter(change_seq__gt=cursor).select_related('citizen', 'department', 'feedback')
+        .prefetch_related('images').order_by('change_seq')[:limit + 1]
+    ]
+    events += tombstones.filter(change_seq__gt=cursor).order_by('change_seq').values_list('change_seq', 'complaint_id')[:limit + 1]
+    if archived is not None:
+        events += [
+            (complaint.change_seq, complaint.to_complaint())
+            for complaint in archived.filter(change_seq__gt=cursor).order_by('change_seq')[:limit + 1]
+        ]
+    # One ordered page across the streams; numbers are unique, so a page never splits one
+    events.sort(key=lambda event: event[0])
+    page = events[:limit]
+    return (
+        [item for _, item in page if isinstance(item, Complaint)],
+        [item for _, item in page if not isinstance(item, Complaint)],
+        page[-1][0] if page else cursor,
+        len(events) > limit,
+    )
@@ -0,0 +1,221 @@
+# myapp/exports.py
+"""
+Chunked exports of complaints, complaint updates and feedback.
+
+Rows are read with values_list().iterator() so no model instances are built
+and at most one chunk is held in memory. CSV is plain stdlib; XLSX needs
+openpyxl and Parquet needs pyarrow (both imported only when used).
+"""
+import csv
+from datetime import datetime, timezone as dt_timezone
+
+from django.utils import timezone
+
+from .filters import filter_complaints
+from .models import Complaint, ComplaintUpdate, Feedback
+
+EXPORT_CHUNK_SIZE = 5000
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+class ExportFormatUnavailable(Exception):
+    """Raised when the library needed for an export format is not installed."""
+
+
+# -------------------------------
+# Datasets: (header, ORM field) pairs + how to filter them
+# -------------------------------
+DATASETS = {
+    'complaints': {
+        'model': Complaint,
+        'filter_prefix': '',
+        'columns': [
+            ('id', 'id'),
+            ('title', 'title'),
+            ('category', 'category'),
+            ('description', 'description'),
+            ('location', 'location'),
+            ('priority', 'priority'),
+            ('status', 'status'),
+            ('citizen_email', 'citizen__email'),
+            ('department_email', 'department__email'),
+            ('feedback_rating', 'feedback__rating'),
+            ('created_at', 'created_at'),
+            ('updated_at', 'updated_at'),
+        ],
+    },
+    'updates': {
+        'model': ComplaintUpdate,
+        'filter_prefix': 'complaint__',
+        'columns': [
+            ('id', 'id'),
+            ('complaint_id', 'complaint_id'),
+            ('user_email', 'user__email'),
+            ('new_status', 'new_status'),
+            ('message', 'message'),
+            ('created_at', 'created_at'),
+        ],
+    },
+    'feedback': {
+        'model': Feedback,
+        'filter_prefix': 'complaint__',
+        'columns': [
+            ('id', 'id'),
+            ('complaint_id', 'complaint_id'),
+            ('citizen_email', 'citizen__email'),
+            ('rating', 'rating'),
+            ('comment', 'comment'),
+            ('created_at', 'created_at'),
+        ],
+    },
+}
+
+
+def get_export_queryset(dataset, params, department=None):
+    """
+    Builds the filtered queryset for a dataset. When `department` is given
+    only rows belonging to complaints assigned to that user are included.
+    """
+    spec = DATASETS[dataset]
+    queryset = spec['model'].objects.all()
+    prefix = spec['filter_prefix']
+    if department is not None:
+        queryset = queryset.filter(**{f'{prefix}department': department})
+    queryset = filter_complaints(queryset, params, prefix=prefix)
+    # Ordering by primary key lets the database walk the index instead of sorting
+    return queryset.order_by('id')
+
+
+def get_headers(dataset):
+    return [header for header, _ in DATASETS[dataset]['columns']]
+
+
+def iter_rows(dataset, queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    fields = [field for _, field in DATASETS[dataset]['columns']]
+    return queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _model_field(model, path):
+    *relations, name = path.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+
+def arrow_schema(dataset):
+    """Builds a pyarrow schema from the Django field types of a dataset's columns."""
+    import pyarrow as pa
+
+    spec = DATASETS[dataset]
+    fields = []
+    for header, path in spec['columns']:
+        internal_type = _model_field(spec['model'], path).get_internal_type()
+        if internal_type == 'DateTimeField':
+            arrow_type = pa.timestamp('us', tz='UTC')
+        elif internal_type in ('AutoField', 'BigAutoField', 'ForeignKey', 'IntegerField',
+                               'BigIntegerField', 'PositiveSmallIntegerField', 'SmallIntegerField'):
+            arrow_type = pa.int64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(header, arrow_type))
+    return pa.schema(fields)
+
+
+# -------------------------------
+# Writers: all take (dataset, rows, fh) and return the row count
+# -------------------------------
+class _Echo:
+    """File-like object whose write() just hands the value back (for streaming csv)."""
+    def write(self, value):
+        return value
+
+
+def iter_csv(dataset, rows):
+    """Yields CSV text line by line, suitable for StreamingHttpResponse."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(get_headers(dataset))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_csv(dataset, rows, fh):
+    writer = csv.writer(fh)
+    writer.writerow(get_headers(dataset))
+    count = 0
+    for batch in _batched(rows, EXPORT_CHUNK_SIZE):
+        writer.writerows(batch)
+        count += len(batch)
+    return count
+
+
+def _excel_value(value):
+    # openpyxl refuses timezone-aware datetimes
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.make_naive(value, dt_timezone.utc)
+    return value
+
+
+def write_xlsx(dataset, rows, fh):
+    """
+    Uses openpyxl's write-only mode, which streams rows to disk
+    instead of keeping every cell in memory.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ExportFormatUnavailable("XLSX export requires openpyxl to be installed.")
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=dataset)
+    sheet.append(get_headers(dataset))
+    count = 0
+    for row in rows:
+        sheet.append([_excel_value(value) for value in row])
+        count += 1
+    workbook.save(fh)
+    return count
+
+
+def write_parquet(dataset, rows, fh, batch_size=EXPORT_CHUNK_SIZE):
+    """Writes one pyarrow record batch per chunk of rows."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportFormatUnavailable("Parquet export requires pyarrow to be installed.")
+
+    schema = arrow_schema(dataset)
+    count = 0
+    with pq.ParquetWriter(fh, schema) as writer:
+        for batch in _batched(rows, batch_size):
+            columns = zip(*batch)
+            record_batch = pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema,
+            )
+            writer.write_batch(record_batch)
+            count += len(batch)
+    return count
+
+
+WRITERS = {
+    'csv': write_csv,
+    'xlsx': write_xlsx,
+    'parquet': write_parquet,
+}
@@ -0,0 +1,56 @@
+# myapp/filters.py
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
+
+# Query params every complaint list / export understands
+COMPLAINT_FILTER_FIELDS = ('status', 'category', 'priority', 'department')
+# Those that hold ids; anything else in them is a 400, not a failed lookup
+INTEGER_FILTER_FIELDS = ('department',)
+
+
+def _parse_int(name, value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise serializers.ValidationError({name: "Use a numeric id."})
+
+
+def _parse_when(name, value):
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise serializers.ValidationError({name: "Use an ISO date (YYYY-MM-DD) or datetime."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_complaints(queryset, params, prefix=''):
+    """
+    Applies the shared complaint filters from the request query params.
+    `prefix` lets the same filters run against related tables,
+    e.g. prefix='complaint__' for ComplaintUpdate or Feedback rows.
+    """
+    lookups = {}
+    for field in COMPLAINT_FILTER_FIELDS:
+        value = params.get(field)
+        if value:
+            lookups[f'{prefix}{field}'] = _parse_int(field, value) if field in INTEGER_FILTER_FIELDS else value
+
+    created_after = params.get('created_after')
+    if created_after:
+        lookups[f'{prefix}created_at__gte'] = _parse_when('created_after', created_after)
+
+    created_before = params.get('created_before')
+    if created_before:
+        lookups[f'{prefix}created_at__lt'] = _parse_when('created_before', created_before)
+
+    return queryset.filter(**lookups) if lookups else queryset
@@ -0,0 +1,319 @@
+# myapp/geo.py
+"""
+Where complaints are: coordinates, a geohash index, radius queries and
+heatmap tiles.
+
+Complaint.latitude/longitude come from the client (e.g. the phone's GPS)
+or, failing that, from geocode(): the GEOCODER setting names a function
+that turns the free-text location into (lat, lng). The default looks the
+street up in a local CSV gazetteer (GEO_GAZETTEER_FILE: name,latitude,
+longitude); point GEOCODER at a service client to use one instead.
+Lookups happen before the write transaction opens, never inside it: with
+BEGIN IMMEDIATE the transaction holds SQLite's write lock, and a slow
+geocoding call would stall every other writer.
+
+Complaint.geohash encodes the point as a base-32 string in which every
+extra character narrows the cell, so all complaints inside a cell share a
+prefix and sit next to each other in the complaint_geohash index. A
+prefix is then a plain index range (geohash >= prefix AND < prefix + '~').
+nearby() reads the 3x3 block of cells around the centre at the finest
+precision that still covers the radius, then keeps the points within it
+by exact distance. A heatmap tile is a geohash prefix counted per cell
+two characters finer: 32 x 32 cells per tile.
+
+Tiles are cached per (tile, category, department). When a complaint
+moves, changes category or status, or leaves the table, only the tiles
+containing its old and new position are dropped, after commit so a
+concurrent reader can't cache the old counts again. The rest stay warm.
+This needs the cache shared by all workers (CACHES in settings): with a
+per-process cache only the writing worker would see the invalidation.
+Archived complaints are not on the map.
+"""
+import csv
+import functools
+import heapq
+import math
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import Substr
+from django.utils.module_loading import import_string
+
+from .changes import stamp
+from .db import retry_on_db_lock
+from .models import Complaint
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'  # In ASCII order, so prefixes sort like their cells
+PRECISION = 9  # About 5 m x 5 m
+TILE_PRECISIONS = range(0, 7)  # Tile ids are prefixes up to 6 characters; their cells up to 8
+TILE_DETAIL = 2  # Cells per tile: 32 ** 2
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+OPEN_STATUSES = ('pending', 'assigned', 'in-progress')
+CACHE_PREFIX = 'myapp:heatmap'
+# What Complaint.save() reads back to see which tiles the complaint was counted in
+MAP_FIELDS = ('geohash', 'category', 'status', 'department_id')
+
+
+# -------------------------------
+# Geohash
+# -------------------------------
+def encode(lat, lng, precision=PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, lng) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def decode(geohash):
+    """The centre (lat, lng) of a geohash cell."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = BASE32.index(char)
+        for shift in range(4, -1, -1):
+            interval = lng_range if even else lat_range
+            middle = (interval[0] + interval[1]) / 2
+            if value >> shift & 1:
+                interval[0] = middle
+            else:
+                interval[1] = middle
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lng_range[0] + lng_range[1]) / 2
+
+
+def cell_size(precision):
+    """(height, width) of a cell in degrees."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** (bits - bits // 2)
+
+
+def prefix_range(prefix):
+    """geohash lookups matching every cell under `prefix` as one index range."""
+    return {'geohash__gte': prefix, 'geohash__lt': prefix + '~'}
+
+
+def distance_m(lat1, lng1, lat2, lng2):
+    """Great-circle (haversine) distance in metres."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+# -------------------------------
+# Geocoding
+# -------------------------------
+def normalize(location):
+    return re.sub(r'\s+', ' ', (location or '').strip().lower())
+
+
+@functools.lru_cache(maxsize=4)
+def _gazetteer(path):
+    try:
+        with open(path, newline='', encoding='utf-8') as fh:
+            return {normalize(row['name']): (float(row['latitude']), float(row['longitude'])) for row in csv.DictReader(fh)}
+    except FileNotFoundError:
+        return {}
+
+
+def gazetteer_lookup(location):
+    """
+    The default GEOCODER: the whole location, then each comma-separated
+    part, with and without a leading house number, looked up in the gazetteer.
+    """
+    places = _gazetteer(str(getattr(settings, 'GEO_GAZETTEER_FILE', settings.BASE_DIR / 'gazetteer.csv')))
+    for part in [location, *location.split(',')]:
+        name = normalize(part)
+        for candidate in (name, re.sub(r'^\d+[a-z]?[\s,/-]*', '', name)):
+            if candidate in places:
+                return places[candidate]
+    return None
+
+
+def geocode(location):
+    """(lat, lng) for a free-text location, or None if the GEOCODER can't place it."""
+    if not location:
+        return None
+    return import_string(getattr(settings, 'GEOCODER', 'myapp.geo.gazetteer_lookup'))(location)
+
+
+def geocode_many(locations):
+    """{location: (lat, lng)} for the distinct `locations` the GEOCODER can place, for bulk writers."""
+    points = {}
+    for location in set(locations):
+        point = geocode(location)
+        if point:
+            points[location] = point
+    return points
+
+
+def place(complaint, lookup=True):
+    """
+    Fills in a complaint's coordinates from its location if it has none
+    (and `lookup`), and its geohash from the coordinates. Call it with
+    lookup before opening a transaction; Complaint.save() does, and only
+    when the location changed. Bulk writers call it before bulk_create().
+    """
+    if lookup and (complaint.latitude is None or complaint.longitude is None):
+        point = geocode(complaint.location)
+        complaint.latitude, complaint.longitude = point if point else (None, None)
+    if complaint.latitude is None:
+        complaint.geohash = ''
+    else:
+        complaint.geohash = encode(complaint.latitude, complaint.longitude)
+
+
+@retry_on_db_lock
+def _save_batch(placed):
+    # Skip any that got coordinates from elsewhere while the batch was being geocoded
+    still_missing = set(Complaint.objects.filter(pk__in=[c.pk for c in placed], latitude__isnull=True).values_list('pk', flat=True))
+    placed = [complaint for complaint in placed if complaint.pk in still_missing]
+    Complaint.objects.bulk_update(placed, ['latitude', 'longitude', 'geohash'], batch_size=500)
+    stamp(complaint.pk for complaint in placed)  # Their serialized form changed
+    record_bulk(placed)
+    return len(placed)
+
+
+def _geocode_batch(after_id, batch_size):
+    complaints = list(
+        Complaint.objects.filter(pk__gt=after_id, latitude__isnull=True).exclude(location='').order_by('pk')[:batch_size]
+    )
+    for complaint in complaints:
+        place(complaint)  # Outside the write transaction
+    placed = _save_batch([complaint for complaint in complaints if complaint.latitude is not None])
+    return (complaints[-1].pk if complaints else after_id), len(complaints), placed
+
+
+def backfill(batch_size=1000):
+    """Geocodes the complaints without coordinates, in batches; returns stats for the report."""
+    started = time.monotonic()
+    after_id, checked, placed = 0, 0, 0
+    while True:
+        after_id, count, found = _geocode_batch(after_id, batch_size)
+        if not count:
+            break
+        checked += count
+        placed += found
+    return {'checked': checked, 'placed': placed, 'seconds': round(time.monotonic() - started, 3)}
+
+
+# -------------------------------
+# Radius queries
+# -------------------------------
+def covering_cells(lat, lng, radius_m):
+    """The centre cell and its 8 neighbours at the finest precision whose cells are at least radius_m across."""
+    precision = 1
+    for candidate in range(PRECISION, 0, -1):
+        height, width = cell_size(candidate)
+        if height * METERS_PER_DEGREE >= radius_m and width * METERS_PER_DEGREE * math.cos(math.radians(lat)) >= radius_m:
+            precision = candidate
+            break
+    height, width = cell_size(precision)
+    return {
+        encode(max(-90.0, min(90.0, lat + dy)), (lng + dx + 180.0) % 360.0 - 180.0, precision)
+        for dy in (-height, 0, height) for dx in (-width, 0, width)
+    }
+
+
+def nearby(queryset, lat, lng, radius_m, limit=100):
+    """
+    The `limit` complaints from `queryset` nearest to (lat, lng) within
+    radius_m, nearest first, each with a distance_m attribute. Candidates
+    are ranked on (id, lat, lng) alone; only the winners are loaded whole.
+    """
+    ranges = Q()
+    for cell in covering_cells(lat, lng, radius_m):
+        ranges |= Q(**prefix_range(cell))
+    distances = {}
+    for pk, point_lat, point_lng in queryset.filter(ranges).values_list('pk', 'latitude', 'longitude'):
+        distance = distance_m(lat, lng, point_lat, point_lng)
+        if distance <= radius_m:
+            distances[pk] = round(distance, 1)
+    nearest = heapq.nsmallest(limit, distances, key=lambda pk: (distances[pk], pk))
+    complaints = queryset.in_bulk(nearest)
+    for pk in nearest:
+        complaints[pk].distance_m = distances[pk]
+    return [complaints[pk] for pk in nearest]
+
+
+# -------------------------------
+# Heatmap tiles
+# -------------------------------
+def _tile_key(tile, category, department_id):
+    return f"{CACHE_PREFIX}:{tile}:{category or '*'}:{department_id or 0}"
+
+
+def compute_tile(queryset, tile):
+    """Complaints and open complaints per cell under `tile`, counted in SQL over the index range."""
+    precision = len(tile) + TILE_DETAIL
+    rows = (
+        queryset.filter(**prefix_range(tile)).annotate(cell=Substr('geohash', 1, precision))
+        .values('cell').annotate(complaints=Count('pk'), open=Count('pk', filter=Q(status__in=OPEN_STATUSES)))
+        .order_by('cell')
+    )
+    cells = []
+    for row in rows:
+        lat, lng = decode(row['cell'])
+        cells.append({
+            'cell': row['cell'], 'lat': round(lat, 6), 'lng': round(lng, 6),
+            'complaints': row['complaints'], 'open': row['open'],
+        })
+    return {'tile': tile, 'cell_precision': precision, 'cells': cells}
+
+
+def heatmap_tile(queryset, tile, category=None, department_id=None):
+    """A cached tile; `queryset` must already be narrowed to `category` and `department_id`."""
+    key = _tile_key(tile, category, department_id)
+    result = cache.get(key)
+    if result is None:
+        result = compute_tile(queryset, tile)
+        cache.set(key, result, getattr(settings, 'GEO_HEATMAP_CACHE_SECONDS', 3600))
+    return result
+
+
+def invalidate(rows):
+    """
+    Drops the cached tiles containing these complaint states: dicts with
+    geohash, category and department_id, e.g. a complaint before and after
+    a save. The keys are dropped once the transaction commits.
+    """
+    keys = set()
+    for row in rows:
+        if not row or not row.get('geohash'):
+            continue
+        for length in TILE_PRECISIONS:
+            tile = row['geohash'][:length]
+            for category in (row['category'], None):
+                for department_id in {0, row.get('department_id') or 0}:
+                    keys.add(_tile_key(tile, category, department_id))
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(list(keys)))
+
+
+def record_complaint(previous, complaint):
+    """Invalidates the tiles a save touched; `previous` holds MAP_FIELDS from before it (None if new)."""
+    current = {name: getattr(complaint, name) for name in MAP_FIELDS}
+    if previous is None or any(previous[name] != current[name] for name in MAP_FIELDS):
+        invalidate([previous, current])
+
+
+def record_bulk(complaints):
+    """Invalidates the tiles of complaints written with bulk_create()."""
+    invalidate([{name: getattr(complaint, name) for name in MAP_FIELDS} for complaint in complaints])
@@ -0,0 +1,60 @@
+# myapp/hashers.py
+"""
+Password hashers whose cost comes from settings.PASSWORD_HASHING rather than
+Django's built-in defaults, so each deployment can pick a cost that meets the
+security policy at a known logins/sec (see the benchmark_login command).
+
+They keep Django's algorithm names, so existing hashes keep verifying. When a
+stored hash uses another algorithm or other parameters than the first entry
+of PASSWORD_HASHERS, Django's check_password rehashes it on the user's next
+successful login (ModelBackend -> user.check_password).
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+DEFAULT_PROFILE = {
+    'ALGORITHM': 'pbkdf2',
+    # RFC 9106 / OWASP baseline: 19 MiB, 2 passes, 1 lane
+    'ARGON2_TIME_COST': 2,
+    'ARGON2_MEMORY_COST': 19456,  # KiB
+    'ARGON2_PARALLELISM': 1,
+    'PBKDF2_ITERATIONS': PBKDF2PasswordHasher.iterations,
+}
+
+# Lowest costs OWASP's password storage guidance accepts, reported by benchmark_login
+MINIMUM_COST = {
+    'pbkdf2': {'iterations': 600_000},
+    'argon2': {'time_cost': 2, 'memory_cost': 19456, 'parallelism': 1},
+}
+
+
+def hashing_profile():
+    return {**DEFAULT_PROFILE, **getattr(settings, 'PASSWORD_HASHING', {})}
+
+
+class ProfilePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with PASSWORD_HASHING['PBKDF2_ITERATIONS'] iterations."""
+
+    def __init__(self):
+        self.iterations = hashing_profile()['PBKDF2_ITERATIONS']
+
+
+class ProfileArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with the PASSWORD_HASHING['ARGON2_*'] cost parameters (needs argon2-cffi)."""
+
+    def __init__(self):
+        profile = hashing_profile()
+        self.time_cost = profile['ARGON2_TIME_COST']
+        self.memory_cost = profile['ARGON2_MEMORY_COST']
+        self.parallelism = profile['ARGON2_PARALLELISM']
+
+
+def cost_parameters(hasher):
+    """The tunable parameters of a profile hasher, e.g. {'iterations': 600000}."""
+    if isinstance(hasher, Argon2PasswordHasher):
+        return {'time_cost': hasher.time_cost, 'memory_cost': hasher.memory_cost, 'parallelism': hasher.parallelism}
+    return {'iterations': hasher.iterations}
+
+
+def meets_minimum(algorithm, parameters):
+    return all(parameters.get(name, 0) >= value for name, value in MINIMUM_COST[algorithm].items())
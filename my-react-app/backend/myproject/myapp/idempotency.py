@@ -0,0 +1,102 @@
+# myapp/idempotency.py
+"""
+Idempotency-Key support for POST endpoints.
+
+A client sends `Idempotency-Key: <uuid>` and reuses it when it retries the
+same request. The first successful (2xx) response is stored with the key in
+the same transaction as the view's writes, so a retry replays it (with an
+`Idempotent-Replayed: true` header) without creating rows, files or
+notifications again. Failed requests are rolled back and keep the key free.
+
+Keys are scoped per user, expire after IDEMPOTENCY_KEY_TTL and are deleted by
+`manage.py prune_idempotency_keys`.
+"""
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .db import retry_on_db_lock
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    """Hash of what the request asks for, so a key reused for a different request is rejected."""
+    data = request.data
+    if hasattr(data, 'lists'):
+        fields = sorted((key, values) for key, values in data.lists() if key not in request.FILES)
+    else:
+        fields = data
+    files = sorted(
+        (field, upload.name, upload.size)
+        for field, uploads in request.FILES.lists()
+        for upload in uploads
+    )
+    payload = json.dumps([request.method, request.path, fields, files], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def replay(record, fingerprint):
+    if record.request_fingerprint != fingerprint:
+        return Response(
+            {"detail": f"This {HEADER} was already used for a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(record.response_body, status=record.status_code, headers={'Idempotent-Replayed': 'true'})
+
+
+class IdempotentPostMixin:
+    """Makes a view's POST idempotent when the client sends an Idempotency-Key header."""
+
+    def post(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return super().post(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response({"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = request_fingerprint(request)
+        record = IdempotencyKey.objects.live().filter(user=request.user, key=key).first()
+        if record is not None:
+            return replay(record, fingerprint)
+        return self.idempotent_post(request, key, fingerprint, *args, **kwargs)
+
+    @retry_on_db_lock
+    def idempotent_post(self, request, key, fingerprint, *args, **kwargs):
+        now = timezone.now()
+        # An expired key that hasn't been pruned yet would block the unique constraint
+        IdempotencyKey.objects.filter(user=request.user, key=key, expires_at__lte=now).delete()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=request.user,
+                    key=key,
+                    request_fingerprint=fingerprint,
+                    method=request.method,
+                    path=request.path[:255],
+                    status_code=0,
+                    expires_at=now + getattr(settings, 'IDEMPOTENCY_KEY_TTL', timedelta(hours=24)),
+                )
+        except IntegrityError:
+            # A concurrent retry with the same key committed first; its response is ours
+            return replay(IdempotencyKey.objects.get(user=request.user, key=key), fingerprint)
+
+        # The view's own @retry_on_db_lock runs inside this transaction now, so a lock
+        # error retries the whole request, key reservation included
+        response = super().post(request, *args, **kwargs)
+        if status.is_success(response.status_code):
+            record.status_code = response.status_code
+            record.response_body = response.data
+            record.save(update_fields=['status_code', 'response_body'])
+        else:
+            transaction.set_rollback(True)
+        return response
@@ -0,0 +1,190 @@
+# myapp/kpis.py
+"""
+Department performance KPIs, derived from the complaint timeline.
+
+For every complaint with a department, ComplaintUpdate history gives:
+
+- time to assign: from the complaint being raised to its first update
+  with a status other than pending;
+- time to resolve: from being raised to its last "resolved" update, for
+  complaints that are resolved now;
+- reopens: updates that move a complaint out of "resolved" again.
+
+These come from one streaming pass. Complaints ordered by id are merged
+with their updates ordered by (complaint_id, created_at), both read in
+chunks straight off the primary key and the update_complaint_created
+index, hot and archived tables alike. A hot complaint whose timeline
+the complaint_updates retention policy archived is merged with its
+archived updates the same way. No sort and no per-complaint query
+is needed, and memory stays flat. Rows skip Django's per-value
+converters, which would cost more than the pass itself, and only the
+timestamps a complaint's KPIs use are parsed. Durations are kept as
+per-department histograms of whole minutes, so the percentiles don't
+need every value either. Feedback ratings are averaged in SQL.
+
+A pass reads a few hundred thousand updates a second, so tens of millions
+take a minute or two. department_kpis() therefore caches the result for
+DEPARTMENT_KPI_CACHE_SECONDS, and `manage.py department_kpis` recomputes
+it ahead of time, e.g. from cron; both go through the shared CACHES.
+"""
+import heapq
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .db import raw_rows
+from .models import ArchivedComplaint, ArchivedComplaintUpdate, ArchivedFeedback, Complaint, ComplaintUpdate, Feedback
+
+CACHE_KEY = 'myapp:department-kpis'
+PERCENTILES = (50, 90, 99)
+CHUNK_SIZE = 10000
+
+
+class DepartmentStats:
+    def __init__(self):
+        self.complaints = 0
+        self.resolved = 0
+        self.reopened = 0  # Complaints reopened at least once
+        self.reopens = 0
+        self.to_assign = Counter()  # minutes -> complaints
+        self.to_resolve = Counter()
+        self.ratings = 0
+        self.rating_sum = 0
+
+    def add(self, created_at, status, updates):
+        """One complaint and its updates, oldest first, as (new_status, created_at) pairs."""
+        self.complaints += 1
+        assigned_at = resolved_at = previous = None
+        reopens = 0
+        for new_status, when in updates:
+            if assigned_at is None and new_status != 'pending':
+                assigned_at = when
+            if new_status == 'resolved':
+                resolved_at = when
+            elif previous == 'resolved':
+                reopens += 1
+            previous = new_status
+        created_at = _when(created_at)
+        if assigned_at is not None:
+            self.to_assign[_minutes(_when(assigned_at) - created_at)] += 1
+        if status == 'resolved':
+            self.resolved += 1
+            if resolved_at is not None:
+                self.to_resolve[_minutes(_when(resolved_at) - created_at)] += 1
+        self.reopens += reopens
+        self.reopened += bool(reopens)
+
+    def as_dict(self):
+        return {
+            'complaints': self.complaints,
+            'resolved': self.resolved,
+            'time_to_assign_hours': _summary(self.to_assign),
+            'time_to_resolve_hours': _summary(self.to_resolve),
+            'reopened': self.reopened,
+            'reopens': self.reopens,
+            'ratings': self.ratings,
+            'avg_rating': round(self.rating_sum / self.ratings, 2) if self.ratings else None,
+        }
+
+
+def _when(value):
+    # Raw driver values: ISO strings on SQLite, datetimes elsewhere
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _minutes(delta):
+    return max(0, int(delta.total_seconds() // 60))
+
+
+def _summary(histogram):
+    """Count, mean and nearest-rank percentiles, in hours, of a {minutes: count} histogram."""
+    total = sum(histogram.values())
+    if not total:
+        return {'count': 0, 'mean': None, **{f'p{pct}': None for pct in PERCENTILES}}
+    summary = {
+        'count': total,
+        'mean': round(sum(minutes * n for minutes, n in histogram.items()) / total / 60, 2),
+    }
+    ranks = {pct: max(1, -(-pct * total // 100)) for pct in PERCENTILES}
+    seen = 0
+    for minutes in sorted(histogram):
+        seen += histogram[minutes]
+        for pct, rank in ranks.items():
+            if f'p{pct}' not in summary and seen >= rank:
+                summary[f'p{pct}'] = round(minutes / 60, 2)
+    return summary
+
+
+def _timelines(complaints, *updates):
+    """
+    Yields (department_id, created_at, status, updates) per complaint by
+    merging the id-ordered streams, like a merge join. `updates` are one or
+    more querysets, each read in (complaint_id, created_at) order.
+    """
+    complaints = raw_rows(
+        complaints.filter(department_id__isnull=False).order_by('pk')
+        .values_list('pk', 'department_id', 'created_at', 'status'), CHUNK_SIZE
+    )
+    updates = heapq.merge(*(
+        raw_rows(
+            queryset.order_by('complaint_id', 'created_at', 'pk').values_list('complaint_id', 'new_status', 'created_at'),
+            CHUNK_SIZE,
+        )
+        for queryset in updates
+    ), key=lambda row: (row[0], row[2]))
+    pending = next(updates, None)
+    for complaint_id, department_id, created_at, status in complaints:
+        timeline = []
+        # Updates of complaints without a department are skipped on the way
+        while pending is not None and pending[0] <= complaint_id:
+            if pending[0] == complaint_id:
+                timeline.append(pending[1:])
+            pending = next(updates, None)
+        yield department_id, created_at, status, timeline
+
+
+def compute():
+    """KPIs for every department with complaints, from one pass over the timeline."""
+    started = time.monotonic()
+    stats = defaultdict(DepartmentStats)
+    retained = ArchivedComplaintUpdate.objects.filter(complaint_id__in=Complaint.objects.values('pk'))
+    for complaints, updates, feedback in (
+        (Complaint.objects, (ComplaintUpdate.objects, retained), Feedback.objects),
+        (ArchivedComplaint.objects, (ArchivedComplaintUpdate.objects,), ArchivedFeedback.objects),
+    ):
+        for department_id, created_at, status, timeline in _timelines(complaints, *updates):
+            stats[department_id].add(created_at, status, timeline)
+
+        ratings = (
+            feedback.filter(complaint__department_id__isnull=False)
+            .values(department=F('complaint__department_id'))
+            .annotate(n=Count('pk'), total=Sum('rating')).order_by()
+        )
+        for row in ratings:
+            stats[row['department']].ratings += row['n']
+            stats[row['department']].rating_sum += row['total']
+
+    emails = dict(get_user_model().objects.filter(pk__in=stats).values_list('pk', 'email'))
+    return {
+        'computed_at': timezone.now().isoformat(),
+        'seconds': round(time.monotonic() - started, 3),
+        'departments': [
+            {'department': department_id, 'department_name': emails.get(department_id), **stats[department_id].as_dict()}
+            for department_id in sorted(stats)
+        ],
+    }
+
+
+def department_kpis(refresh=False):
+    """The cached KPIs, recomputed once they are older than DEPARTMENT_KPI_CACHE_SECONDS."""
+    result = None if refresh else cache.get(CACHE_KEY)
+    if result is None:
+        result = compute()
+        cache.set(CACHE_KEY, result, getattr(settings, 'DEPARTMENT_KPI_CACHE_SECONDS', 600))
+    return result
@@ -0,0 +1,49 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from myapp.retention import POLICIES, apply_policy
+
+
+class Command(BaseCommand):
+    help = (
+        "Move rows past their retention (RETENTION_POLICIES) out of the hot tables in small batches, "
+        "into archive tables or gzipped JSONL files. Safe to interrupt; run it again to carry on "
+        "(e.g. from cron with --max-seconds)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policy', action='append', dest='policies', choices=sorted(POLICIES),
+                            help="Policy to apply (repeatable; default: all)")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between batches")
+        parser.add_argument('--max-seconds', type=float, help="Stop starting new batches after this long")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the eligible rows")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        deadline = time.monotonic() + options['max_seconds'] if options['max_seconds'] else None
+        report = {}
+        for name in options['policies'] or POLICIES:
+            report[name] = stats = apply_policy(
+                POLICIES[name], batch_size=options['batch_size'], pause=options['pause'],
+                deadline=deadline, dry_run=options['dry_run'],
+            )
+            if not options['json']:
+                self.stdout.write(self.describe(name, stats))
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+
+    def describe(self, name, stats):
+        if 'skipped' in stats:
+            return f"{name}: skipped ({stats['skipped']})"
+        if 'eligible' in stats:
+            return f"{name}: {stats['eligible']} rows older than {stats['cutoff']} would go to {stats['archive']}"
+        line = (
+            f"{name}: moved {stats['moved']} rows in {stats['batches']} batches to {stats['archive']} "
+            f"({stats['seconds']}s, {stats['rows_per_sec'] or 0} rows/s)"
+        )
+        if not stats['complete']:
+            line += " - stopped at --max-seconds, run again to continue"
+        return line
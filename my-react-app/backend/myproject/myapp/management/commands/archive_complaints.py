@@ -0,0 +1,42 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from myapp.archive import archive_complaints
+
+
+class Command(BaseCommand):
+    help = (
+        "Move resolved complaints with feedback older than COMPLAINT_ARCHIVE_AFTER_DAYS, with their "
+        "updates, feedback, images and notifications, into the archive tables in small batches. "
+        "Safe to interrupt; run it again to carry on (e.g. from cron with --max-seconds)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help="Override COMPLAINT_ARCHIVE_AFTER_DAYS")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between batches")
+        parser.add_argument('--max-seconds', type=float, help="Stop starting new batches after this long")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the eligible complaints")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        deadline = time.monotonic() + options['max_seconds'] if options['max_seconds'] else None
+        stats = archive_complaints(
+            days=options['days'], batch_size=options['batch_size'], pause=options['pause'],
+            deadline=deadline, dry_run=options['dry_run'],
+        )
+
+        if options['json']:
+            self.stdout.write(json.dumps(stats, indent=2))
+        elif 'eligible' in stats:
+            self.stdout.write(f"{stats['eligible']} complaints resolved before {stats['cutoff']} would be archived")
+        else:
+            line = (
+                f"Archived {stats['moved']} complaints in {stats['batches']} batches "
+                f"({stats['seconds']}s, {stats['complaints_per_sec'] or 0} complaints/s)"
+            )
+            if not stats['complete']:
+                line += " - stopped at --max-seconds, run again to continue"
+            self.stdout.write(line)
@@ -0,0 +1,117 @@
+import json
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from myapp.benchmark import (
+    AsgiTransport, HttpTransport, TestClientTransport, run_async_scenario, run_scenario
+)
+
+from .benchmark_endpoints import build_scenarios, load_fixtures
+
+DEFAULT_ROUTES = [
+    'my-complaints', 'all-complaints', 'department-complaints',
+    'complaint-detail', 'complaint-updates', 'notification-list',
+]
+MODES = ('wsgi', 'asgi-sync', 'asgi')
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare how the read endpoints hold up as concurrency grows: sync views under WSGI "
+        "(one thread per in-flight request), the same sync views under ASGI, and their async "
+        "versions (/api/async/...) under ASGI. Reports latency/throughput per concurrency level "
+        "and the highest level that keeps p99 within --slo-ms."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--routes', nargs='+', default=DEFAULT_ROUTES,
+                            help="Sync route names; each is paired with its async-<name> route")
+        parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+        parser.add_argument('--levels', nargs='+', type=int, default=[1, 4, 16, 64],
+                            help="Concurrency levels (threads for WSGI, in-flight requests for ASGI)")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per route, mode and level")
+        parser.add_argument('--slo-ms', type=float, default=250.0, help="p99 latency target")
+        parser.add_argument('--wsgi-url', help="Benchmark a running WSGI server (e.g. gunicorn) instead of in-process")
+        parser.add_argument('--asgi-url', help="Benchmark a running ASGI server (e.g. uvicorn) instead of in-process")
+        parser.add_argument('--password', default='seedpass123', help="Password of the fixture users")
+        parser.add_argument('--label', default='', help="Free-form label stored with the results")
+        parser.add_argument('--output', '-o', help="Write JSON here instead of stdout")
+
+    def handle(self, *args, **options):
+        fixtures = load_fixtures()
+        scenarios = build_scenarios(fixtures, options['password'])
+        missing = [
+            name for route in options['routes'] for name in (route, f'async-{route}') if name not in scenarios
+        ]
+        if missing:
+            raise CommandError(f"Unknown route(s): {', '.join(missing)}")
+
+        # In-process transports send Host: testserver
+        if '*' not in settings.ALLOWED_HOSTS and 'testserver' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+        results, within_slo = {}, {}
+        for route in options['routes']:
+            results[route], within_slo[route] = {}, {}
+            for mode in options['modes']:
+                name = f'async-{route}' if mode == 'asgi' else route
+                role, method, path_fn, data_fn, _ = scenarios[name]
+                token = fixtures['tokens'].get(role)
+                run = self.runner(mode, options)
+
+                results[route][mode] = {}
+                within_slo[route][mode] = None
+                for level in options['levels']:
+                    self.stderr.write(f"{route} [{mode}] concurrency={level} ...")
+                    stats = run(method, path_fn, data_fn, token, options['requests'], level)
+                    results[route][mode][str(level)] = stats
+                    if not stats['errors'] and stats['p99_ms'] is not None and stats['p99_ms'] <= options['slo_ms']:
+                        within_slo[route][mode] = level
+
+        report = {
+            'meta': {
+                'label': options['label'],
+                'timestamp': timezone.now().isoformat(),
+                'levels': options['levels'],
+                'requests_per_level': options['requests'],
+                'slo_p99_ms': options['slo_ms'],
+                'wsgi_url': options['wsgi_url'],
+                'asgi_url': options['asgi_url'],
+                'database': settings.DATABASES['default']['ENGINE'],
+                'settings_module': settings.SETTINGS_MODULE,
+            },
+            'max_concurrency_within_slo': within_slo,
+            'routes': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output)
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            sys.stdout.write(output + '\n')
+
+    def runner(self, mode, options):
+        """Returns run(method, path_fn, data_fn, token, total, concurrency) -> stats for the mode."""
+        base_url = options['wsgi_url'] if mode == 'wsgi' else options['asgi_url']
+        if base_url or mode == 'wsgi':
+            transport = HttpTransport(base_url) if base_url else TestClientTransport()
+
+            def run(method, path_fn, data_fn, token, total, concurrency):
+                def request_fn(transport, i):
+                    data = data_fn(i) if data_fn else None
+                    return transport.request(method, path_fn(i), token=token, data=data)
+                return run_scenario(transport, request_fn, total, concurrency)
+            return run
+
+        transport = AsgiTransport()
+
+        def run(method, path_fn, data_fn, token, total, concurrency):
+            async def request_fn(transport, i):
+                data = data_fn(i) if data_fn else None
+                return await transport.request(method, path_fn(i), token=token, data=data)
+            return run_async_scenario(transport, request_fn, total, concurrency)
+        return run
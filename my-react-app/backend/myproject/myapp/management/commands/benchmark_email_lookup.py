@@ -0,0 +1,104 @@
+import json
+import random
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from myapp.benchmark import percentile
+
+User = get_user_model()
+
+BENCH_DOMAIN = 'lookup-bench.example.com'
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the old case-insensitive email lookup (email__iexact) with the Lower(email) "
+        "index used by registration and login, on a user table grown to --users rows. "
+        "The synthetic users are inserted in a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000_000, help="Table size to benchmark at")
+        parser.add_argument('--lookups', type=int, default=200, help="Lookups per method")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', '-o', help="Write JSON here instead of stdout")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            existing = User.objects.count()
+            to_create = max(0, options['users'] - existing)
+            self.stderr.write(f"Inserting {to_create} synthetic users ...")
+            started = time.perf_counter()
+            self.insert_users(to_create, options['batch_size'])
+            insert_seconds = time.perf_counter() - started
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(f"ANALYZE {User._meta.db_table}")
+
+            # Look up existing accounts with the casing scrambled, as users type them
+            emails = [
+                ''.join(ch.upper() if rng.random() < 0.5 else ch for ch in f"user{rng.randrange(max(to_create, 1))}@{BENCH_DOMAIN}")
+                for _ in range(options['lookups'])
+            ]
+            methods = {
+                'iexact': lambda email: User.objects.filter(email__iexact=email).exists(),
+                'lower_index': lambda email: User.objects.filter_email(email).exists(),
+                'login_get_by_natural_key': lambda email: User.objects.get_by_natural_key(email),
+            }
+            results = {}
+            for name, lookup in methods.items():
+                self.stderr.write(f"{name} ...")
+                results[name] = self.measure(lookup, emails)
+            plans = {
+                'iexact': User.objects.filter(email__iexact=emails[0]).explain(),
+                'lower_index': User.objects.filter_email(emails[0]).explain(),
+            }
+            total_users = User.objects.count()
+            transaction.set_rollback(True)
+
+        report = {
+            'meta': {
+                'users': total_users,
+                'inserted': to_create,
+                'insert_seconds': round(insert_seconds, 2),
+                'lookups': options['lookups'],
+                'database': connection.vendor,
+            },
+            'results': results,
+            'plans': plans,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output)
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            sys.stdout.write(output + '\n')
+
+    def insert_users(self, count, batch_size):
+        for start in range(0, count, batch_size):
+            User.objects.bulk_create([
+                # '!' is an unusable password, so no hashing cost per row
+                User(username=f"user{n}@{BENCH_DOMAIN}", email=f"user{n}@{BENCH_DOMAIN}", password='!')
+                for n in range(start, min(start + batch_size, count))
+            ])
+
+    def measure(self, lookup, emails):
+        latencies = []
+        for email in emails:
+            started = time.perf_counter()
+            lookup(email)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        return {
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'max_ms': round(latencies[-1], 3),
+        }
@@ -0,0 +1,218 @@
+import contextlib
+import json
+import platform
+import sys
+import uuid
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from myapp.benchmark import (
+    HttpTransport, TestClientTransport, api_route_names, database_connection_count, run_scenario,
+    without_throttles
+)
+from myapp.models import Complaint
+
+User = get_user_model()
+
+# POST routes that leave the database as it was (bar rehashing the fixture password once)
+READ_ONLY_POSTS = {'token_obtain_pair', 'token_refresh'}
+
+
+def build_scenarios(fixtures, password):
+    """
+    One entry per route in myapp/urls.py, keyed by the route name.
+    Each value is (role, method, path_fn, data_fn, multipart).
+    """
+    complaint_id = fixtures['complaint_id']
+    resolved_id = fixtures['resolved_id']
+
+    def unique_email(i):
+        return f"bench-{uuid.uuid4().hex[:12]}-{i}@bench.example.com"
+
+    return {
+        'user-register': (None, 'post', lambda i: '/api/register/', lambda i: {
+            'username': f'Bench User {i}', 'email': unique_email(i),
+            'password': 'benchpass123', 'password2': 'benchpass123',
+        }, False),
+        'token_obtain_pair': (None, 'post', lambda i: '/api/token/', lambda i: {
+            'email': fixtures['citizen'].email, 'password': password,
+        }, False),
+        'token_refresh': (None, 'post', lambda i: '/api/token/refresh/', lambda i: {
+            'refresh': fixtures['refresh'],
+        }, False),
+        'protected': ('citizen', 'get', lambda i: '/api/protected/', None, False),
+        'change-password': ('citizen', 'patch', lambda i: '/api/change-password/', lambda i: {
+            # Same password in and out so the run does not lock itself out
+            'currentPassword': password, 'newPassword': password,
+        }, False),
+        'complaint-create': ('citizen', 'post', lambda i: '/api/complaints/', lambda i: {
+            'title': f'Benchmark complaint {i}', 'category': 'garbage',
+            'description': 'Generated by benchmark_endpoints.', 'location': 'Bench Street',
+            'priority': 'medium',
+        }, True),
+        'my-complaints': ('citizen', 'get', lambda i: '/api/complaints/my/', None, False),
+        'user-profile': ('citizen', 'patch', lambda i: '/api/profile/', lambda i: {
+            'name': fixtures['citizen'].username,
+        }, False),
+        'complaint-detail': ('admin', 'get', lambda i: f'/api/complaints/{complaint_id}/', None, False),
+        'all-complaints': ('admin', 'get', lambda i: '/api/complaints/all/', None, False),
+        'department-complaints': ('department', 'get', lambda i: '/api/complaints/department/', None, False),
+        'complaint-update': ('admin', 'patch', lambda i: f'/api/complaints/update/{complaint_id}/', lambda i: {
+            'status': 'in-progress' if i % 2 else 'assigned',
+        }, False),
+        'complaint-updates': ('admin', 'get', lambda i: f'/api/complaints/{complaint_id}/updates/', None, False),
+        # Only the first POST can succeed; the rest measure the rejection path
+        'complaint-feedback': ('owner', 'post', lambda i: f'/api/complaints/{resolved_id}/feedback/', lambda i: {
+            'rating': 4, 'comment': 'Benchmark feedback',
+        }, False),
+        'department-list': ('admin', 'get', lambda i: '/api/departments/', None, False),
+        'notification-list': ('admin', 'get', lambda i: '/api/notifications/', None, False),
+        'notification-mark-read': ('citizen', 'post', lambda i: '/api/notifications/mark-read/', None, False),
+        'export-report': ('admin', 'get', lambda i: '/api/exports/complaints/', None, False),
+        'slow-query-list': ('admin', 'get', lambda i: '/api/slow-queries/', None, False),
+        'complaint-analytics': ('admin', 'get', lambda i: '/api/analytics/complaints/?bucket=month&group=department,status', None, False),
+        'department-kpis': ('admin', 'get', lambda i: '/api/analytics/departments/', None, False),
+        'complaint-changes': ('department', 'get', lambda i: '/api/complaints/changes/?limit=100', None, False),
+        'complaints-nearby': ('admin', 'get', lambda i: '/api/geo/nearby/?lat=28.6139&lng=77.2090&radius=500', None, False),
+        'complaint-heatmap': ('admin', 'get', lambda i: '/api/geo/heatmap/?tile=ttn', None, False),
+        'analytics-report': ('admin', 'get', lambda i: '/api/analytics/reports/summary/', None, False),
+        'async-my-complaints': ('citizen', 'get', lambda i: '/api/async/complaints/my/', None, False),
+        'async-all-complaints': ('admin', 'get', lambda i: '/api/async/complaints/all/', None, False),
+        'async-department-complaints': ('department', 'get', lambda i: '/api/async/complaints/department/', None, False),
+        'async-complaint-detail': ('admin', 'get', lambda i: f'/api/async/complaints/{complaint_id}/', None, False),
+        'async-complaint-updates': ('admin', 'get', lambda i: f'/api/async/complaints/{complaint_id}/updates/', None, False),
+        'async-notification-list': ('admin', 'get', lambda i: '/api/async/notifications/', None, False),
+    }
+
+
+def load_fixtures():
+    admin = User.objects.filter(role='admin', is_staff=True).order_by('id').first()
+    department = User.objects.filter(role='department', assigned_complaints__isnull=False).order_by('id').first()
+    citizen = User.objects.filter(role='citizen', complaints__isnull=False).order_by('id').first()
+    complaint = Complaint.objects.order_by('id').first()
+    resolved = Complaint.objects.filter(status='resolved', feedback__isnull=True).order_by('id').first()
+    if not (admin and department and citizen and complaint):
+        raise CommandError("Need an admin, a department with complaints and a citizen with complaints. Run seed_data first.")
+
+    owner = resolved.citizen if resolved else citizen
+    tokens = {
+        'admin': str(RefreshToken.for_user(admin).access_token),
+        'department': str(RefreshToken.for_user(department).access_token),
+        'citizen': str(RefreshToken.for_user(citizen).access_token),
+        'owner': str(RefreshToken.for_user(owner).access_token),
+    }
+    return {
+        'citizen': citizen,
+        'complaint_id': complaint.id,
+        'resolved_id': (resolved or complaint).id,
+        'refresh': str(RefreshToken.for_user(citizen)),
+        'tokens': tokens,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every API route with concurrent workers and report p50/p95/p99 latency, "
+        "throughput and query counts as JSON. Run against seeded data (see seed_data). "
+        "Routes that write are skipped unless --allow-writes is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Requests per route")
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--only', nargs='+', help="Route names to run (default: all)")
+        parser.add_argument('--skip', nargs='+', default=[], help="Route names to leave out")
+        parser.add_argument('--base-url', help="Benchmark a running server instead of the in-process test client")
+        parser.add_argument('--password', default='seedpass123', help="Password of the fixture users")
+        parser.add_argument('--throttle', action='store_true', help="Keep the throttle budgets in force")
+        parser.add_argument('--allow-writes', action='store_true',
+                            help="Also run the POST/PATCH routes. They commit to the configured database "
+                                 "(about --requests complaints, users, updates... each), so use a throwaway copy")
+        parser.add_argument('--label', default='', help="Free-form label stored with the results")
+        parser.add_argument('--output', '-o', help="Write JSON here instead of stdout")
+
+    def handle(self, *args, **options):
+        fixtures = load_fixtures()
+        scenarios = build_scenarios(fixtures, options['password'])
+
+        uncovered = api_route_names() - set(scenarios)
+        if uncovered:
+            self.stderr.write(f"Warning: no benchmark scenario for {', '.join(sorted(uncovered))}")
+
+        names = options['only'] or sorted(scenarios)
+        unknown = set(names) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Unknown route(s): {', '.join(sorted(unknown))}")
+        if not options['allow_writes']:
+            writes = sorted(
+                name for name in names
+                if scenarios[name][1] != 'get' and name not in READ_ONLY_POSTS and name not in options['skip']
+            )
+            if writes and options['only']:
+                raise CommandError(f"{', '.join(writes)} write to the database; pass --allow-writes to run them.")
+            if writes:
+                self.stderr.write(f"Skipping routes that write ({', '.join(writes)}); pass --allow-writes to run them")
+                names = [name for name in names if name not in writes]
+
+        if options['base_url']:
+            transport = HttpTransport(options['base_url'])
+        else:
+            transport = TestClientTransport()
+            # The test client needs 'testserver' to pass the host check
+            if '*' not in settings.ALLOWED_HOSTS and 'testserver' not in settings.ALLOWED_HOSTS:
+                settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+        connections_before = database_connection_count()
+        results = {}
+        # Throttles would turn most of a run into 429s; lift them (in-process only) unless --throttle
+        with contextlib.nullcontext() if options['throttle'] else without_throttles():
+            for name in names:
+                if name in options['skip']:
+                    continue
+                role, method, path_fn, data_fn, multipart = scenarios[name]
+                token = fixtures['tokens'].get(role)
+
+                def request_fn(transport, i, method=method, path_fn=path_fn, data_fn=data_fn,
+                               multipart=multipart, token=token):
+                    data = data_fn(i) if data_fn else None
+                    return transport.request(method, path_fn(i), token=token, data=data, multipart=multipart)
+
+                self.stderr.write(f"{name} ...")
+                results[name] = run_scenario(transport, request_fn, options['requests'], options['concurrency'])
+
+        report = {
+            'meta': {
+                'label': options['label'],
+                'timestamp': timezone.now().isoformat(),
+                'transport': 'http' if options['base_url'] else 'test-client',
+                'base_url': options['base_url'],
+                'requests_per_route': options['requests'],
+                'concurrency': options['concurrency'],
+                'throttled': options['throttle'],
+                'writes': options['allow_writes'],
+                'database': settings.DATABASES['default']['ENGINE'],
+                'settings_module': settings.SETTINGS_MODULE,
+                'conn_max_age': settings.DATABASES['default'].get('CONN_MAX_AGE', 0),
+                'db_pool': bool(settings.DATABASES['default'].get('OPTIONS', {}).get('pool')),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'db_connections_before': connections_before,
+                'db_connections_after': database_connection_count(),
+                'complaints': Complaint.objects.count(),
+                'users': User.objects.count(),
+            },
+            'routes': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output)
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            sys.stdout.write(output + '\n')
+
@@ -0,0 +1,180 @@
+import json
+import os
+import sys
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from myapp.benchmark import TestClientTransport, percentile, run_scenario, without_throttles
+from myapp.hashers import cost_parameters, hashing_profile, meets_minimum
+from myproject.settings import password_hashers
+
+User = get_user_model()
+
+DEFAULT_PROFILES = [
+    'pbkdf2:iterations=1000000',
+    'pbkdf2:iterations=600000',
+    'argon2:time_cost=2,memory_cost=19456,parallelism=1',
+    'argon2:time_cost=3,memory_cost=65536,parallelism=4',
+]
+PROFILE_KEYS = {
+    'iterations': 'PBKDF2_ITERATIONS',
+    'time_cost': 'ARGON2_TIME_COST',
+    'memory_cost': 'ARGON2_MEMORY_COST',
+    'parallelism': 'ARGON2_PARALLELISM',
+}
+
+
+def parse_profile(spec):
+    """'argon2:time_cost=3,memory_cost=65536' -> PASSWORD_HASHING dict (unset keys from settings)."""
+    algorithm, _, params = spec.partition(':')
+    if algorithm not in ('argon2', 'pbkdf2'):
+        raise CommandError(f"Unknown algorithm in profile '{spec}' (use argon2 or pbkdf2)")
+    profile = {**hashing_profile(), 'ALGORITHM': algorithm}
+    for pair in filter(None, params.split(',')):
+        name, _, value = pair.partition('=')
+        if name not in PROFILE_KEYS:
+            raise CommandError(f"Unknown parameter '{name}' in profile '{spec}'")
+        profile[PROFILE_KEYS[name]] = int(value)
+    return profile
+
+
+def timings(latencies):
+    latencies = sorted(value * 1000 for value in latencies)
+    return {
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure password hashing cost and /api/token/ login throughput for one or more "
+        "hashing profiles (e.g. --profile pbkdf2:iterations=600000 "
+        "--profile argon2:time_cost=2,memory_cost=19456,parallelism=1). Reports verifications/sec "
+        "per core so a cost can be chosen that meets policy at a known login rate."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', action='append', dest='profiles',
+                            help="algorithm:param=value,... (repeatable; default: a few common costs)")
+        parser.add_argument('--current', action='store_true', help="Benchmark only the configured PASSWORD_HASHING")
+        parser.add_argument('--hashes', type=int, default=20, help="Hash/verify operations timed per profile")
+        parser.add_argument('--logins', type=int, default=40, help="Logins through /api/token/ per profile")
+        parser.add_argument('--concurrency', type=int, default=1, help="Concurrent login workers")
+        parser.add_argument('--target-logins-per-sec', type=float,
+                            help="Report how many cores each profile needs for this peak login rate")
+        parser.add_argument('--output', '-o', help="Write JSON here instead of stdout")
+
+    def handle(self, *args, **options):
+        if options['current']:
+            profiles = {'current': hashing_profile()}
+        else:
+            specs = options['profiles'] or DEFAULT_PROFILES
+            profiles = {spec: parse_profile(spec) for spec in specs}
+
+        # The test client sends Host: testserver
+        if '*' not in settings.ALLOWED_HOSTS and 'testserver' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+        results = {}
+        for name, profile in profiles.items():
+            if profile['ALGORITHM'] == 'argon2' and not self.argon2_available():
+                self.stderr.write(f"Skipping {name}: argon2-cffi is not installed")
+                results[name] = {'skipped': 'argon2-cffi is not installed'}
+                continue
+            self.stderr.write(f"{name} ...")
+            with override_settings(PASSWORD_HASHING=profile, PASSWORD_HASHERS=password_hashers(profile['ALGORITHM'])):
+                with without_throttles():
+                    results[name] = self.run_profile(options)
+
+        report = {
+            'meta': {
+                'cpu_count': os.cpu_count(),
+                'hashes': options['hashes'],
+                'logins': options['logins'],
+                'concurrency': options['concurrency'],
+                'target_logins_per_sec': options['target_logins_per_sec'],
+            },
+            'profiles': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output)
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            sys.stdout.write(output + '\n')
+
+    def argon2_available(self):
+        try:
+            import argon2  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def run_profile(self, options):
+        hasher = get_hasher('default')
+        password = 'bench-' + uuid.uuid4().hex
+        parameters = cost_parameters(hasher)
+
+        hash_times, verify_times = [], []
+        encoded = None
+        for _ in range(options['hashes']):
+            started = time.perf_counter()
+            encoded = hasher.encode(password, hasher.salt())
+            hash_times.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            hasher.verify(password, encoded)
+            verify_times.append(time.perf_counter() - started)
+
+        per_core = 1 / (sum(verify_times) / len(verify_times))
+        result = {
+            'algorithm': hasher.algorithm,
+            'parameters': parameters,
+            'meets_owasp_minimum': meets_minimum('argon2' if hasher.algorithm == 'argon2' else 'pbkdf2', parameters),
+            'hash': timings(hash_times),
+            'verify': timings(verify_times),
+            'verifications_per_sec_per_core': round(per_core, 1),
+        }
+        if options['target_logins_per_sec']:
+            result['cores_for_target'] = round(options['target_logins_per_sec'] / per_core, 1)
+
+        email = f"login-bench-{uuid.uuid4().hex[:12]}@bench.example.com"
+        user = User.objects.create(username=email, email=email, password=make_password(password))
+        try:
+            result['login'] = self.run_logins(email, password, options)
+            result['rehash_on_login'] = self.check_rehash(user, password)
+        finally:
+            user.delete()
+        return result
+
+    def run_logins(self, email, password, options):
+        def request_fn(transport, i):
+            return transport.request('post', '/api/token/', data={'email': email, 'password': password})
+
+        stats = run_scenario(TestClientTransport(), request_fn, options['logins'], options['concurrency'])
+        return {key: stats[key] for key in ('status_codes', 'throughput_rps', 'p50_ms', 'p99_ms')}
+
+    def check_rehash(self, user, password):
+        """Store a hash made with a different cost, log in once, and confirm it was upgraded."""
+        profile = hashing_profile()
+        other = {**profile, 'PBKDF2_ITERATIONS': profile['PBKDF2_ITERATIONS'] // 2, 'ALGORITHM': 'pbkdf2'}
+        with override_settings(PASSWORD_HASHING=other, PASSWORD_HASHERS=password_hashers('pbkdf2')):
+            stale = make_password(password)
+        User.objects.filter(pk=user.pk).update(password=stale)
+
+        transport = TestClientTransport()
+        latency, status, _, _ = transport.request('post', '/api/token/', data={'email': user.email, 'password': password})
+        transport.close_thread()
+        upgraded = User.objects.get(pk=user.pk).password
+        return {
+            'status': status,
+            'login_ms': round(latency * 1000, 2),
+            'upgraded': upgraded != stale and get_hasher('default').must_update(upgraded) is False,
+        }
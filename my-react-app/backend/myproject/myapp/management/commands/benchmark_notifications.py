@@ -0,0 +1,94 @@
+import json
+import sys
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from myapp.benchmark import TestClientTransport, percentile, without_throttles
+from myapp.models import BroadcastNotification, Complaint, Notification
+
+from .benchmark_endpoints import load_fixtures
+
+MODES = {
+    'per_event': {'NOTIFICATION_COALESCE_WINDOW': None, 'NOTIFICATION_DIGEST_INTERVAL': None},
+    'coalesce': {'NOTIFICATION_DIGEST_INTERVAL': None},
+    'digest': {'NOTIFICATION_DIGEST_INTERVAL': timedelta(hours=1)},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Post a burst of status changes and messages on a few hot complaints and count the "
+        "notification rows written with coalescing off, with NOTIFICATION_COALESCE_WINDOW, and "
+        "in digest mode. Every run is rolled back. Run against seeded data (see seed_data)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=200, help="Updates posted per mode")
+        parser.add_argument('--complaints', type=int, default=3, help="Hot complaints the updates are spread over")
+        parser.add_argument('--output', '-o', help="Write JSON here instead of stdout")
+
+    def handle(self, *args, **options):
+        if '*' not in settings.ALLOWED_HOSTS and 'testserver' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        fixtures = load_fixtures()
+        complaint_ids = list(
+            Complaint.objects.filter(citizen__isnull=False).order_by('id').values_list('id', flat=True)[:options['complaints']]
+        )
+
+        results = {}
+        for mode, overrides in MODES.items():
+            if 'NOTIFICATION_COALESCE_WINDOW' not in overrides:
+                overrides = {**overrides, 'NOTIFICATION_COALESCE_WINDOW': settings.NOTIFICATION_COALESCE_WINDOW or timedelta(minutes=15)}
+            self.stderr.write(f"{mode} ...")
+            with override_settings(**overrides), without_throttles():
+                results[mode] = self.run_mode(fixtures['tokens']['department'], complaint_ids, options['events'])
+
+        baseline = results['per_event']['rows_written']
+        for result in results.values():
+            result['reduction'] = round(baseline / result['rows_written'], 1) if result['rows_written'] else None
+
+        report = {
+            'meta': {
+                'events': options['events'],
+                'complaints': len(complaint_ids),
+                'coalesce_window_s': (settings.NOTIFICATION_COALESCE_WINDOW or timedelta(minutes=15)).total_seconds(),
+            },
+            'results': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output)
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            sys.stdout.write(output + '\n')
+
+    def run_mode(self, token, complaint_ids, events):
+        transport = TestClientTransport()
+        latencies, statuses = [], {}
+        with transaction.atomic():
+            before = Notification.objects.count() + BroadcastNotification.objects.count()
+            for i in range(events):
+                complaint_id = complaint_ids[i % len(complaint_ids)]
+                latency, status, _, _ = transport.request(
+                    'post', f'/api/complaints/{complaint_id}/updates/', token=token,
+                    data={'message': f"Work in progress, visit {i}", 'new_status': 'in-progress'},
+                )
+                latencies.append(latency * 1000)
+                statuses[str(status)] = statuses.get(str(status), 0) + 1
+            rows = Notification.objects.count() + BroadcastNotification.objects.count() - before
+            transaction.set_rollback(True)
+
+        latencies.sort()
+        return {
+            'status_codes': statuses,
+            'rows_written': rows,
+            'rows_per_event': round(rows / events, 3),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+        }
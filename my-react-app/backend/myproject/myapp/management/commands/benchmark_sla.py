@@ -0,0 +1,108 @@
+import json
+import random
+import sys
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from myapp.benchmark import percentile
+from myapp.models import Checkpoint, Complaint
+from myapp.sla import CHECKPOINT, SLA_STATUSES, overdue, target, tick
+
+CATEGORIES = ('road-maintenance', 'water-supply', 'electricity', 'waste-management', 'drainage', 'other')
+PRIORITIES = ('low', 'medium', 'high')
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert --open open complaints with deadlines spread over --days, then time escalation "
+        "ticks as the clock moves forward --step seconds at a time, against a naive scan that "
+        "checks every open complaint. Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--open', type=int, default=1_000_000, help="Open complaints to insert")
+        parser.add_argument('--days', type=int, default=30, help="Deadlines are spread over this many days")
+        parser.add_argument('--ticks', type=int, default=20)
+        parser.add_argument('--step', type=int, default=60, help="Simulated seconds between ticks")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', '-o', help="Write JSON here instead of stdout")
+
+    def handle(self, *args, **options):
+        citizen_id = get_user_model().objects.filter(is_staff=False).values_list('pk', flat=True).first()
+        if citizen_id is None:
+            raise CommandError("No citizen accounts; run seed_data first")
+
+        with transaction.atomic():
+            now = timezone.now()
+            self.insert(citizen_id, now, options)
+            # Start the scan at now so the ticks measure steady state, not the seeded backlog
+            Checkpoint.objects.update_or_create(name=CHECKPOINT, defaults={'position': now, 'last_id': 0})
+            report = {
+                'meta': {key: options[key] for key in ('open', 'days', 'ticks', 'step')},
+                'plan': self.explain(now),
+                'ticks': self.run_ticks(now, options),
+                'naive_scan': self.naive_scan(now + timedelta(seconds=options['step'])),
+            }
+            transaction.set_rollback(True)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output)
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            sys.stdout.write(output + '\n')
+
+    def insert(self, citizen_id, now, options):
+        rng = random.Random(options['seed'])
+        span = timedelta(days=options['days']).total_seconds()
+        started = time.monotonic()
+        for start in range(0, options['open'], 5000):
+            complaints = []
+            for _ in range(min(5000, options['open'] - start)):
+                category, priority = rng.choice(CATEGORIES), rng.choice(PRIORITIES)
+                due_at = now + timedelta(seconds=rng.random() * span)
+                complaints.append(Complaint(
+                    citizen_id=citizen_id, title="SLA benchmark", category=category,
+                    description="-", location="-", priority=priority,
+                    status=rng.choice(SLA_STATUSES), due_at=due_at,
+                ))
+            Complaint.objects.bulk_create(complaints)
+        self.stderr.write(f"Inserted {options['open']} open complaints in {time.monotonic() - started:.1f}s")
+
+    def explain(self, now):
+        queryset = overdue(now, now - timedelta(minutes=1), 0).values('id')[:1000]
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def run_ticks(self, now, options):
+        latencies, breaches = [], 0
+        for i in range(1, options['ticks'] + 1):
+            started = time.perf_counter()
+            stats = tick(now=now + timedelta(seconds=i * options['step']))
+            latencies.append((time.perf_counter() - started) * 1000)
+            breaches += stats['breaches']
+        latencies.sort()
+        return {
+            'breaches': breaches,
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'max_ms': round(latencies[-1], 2),
+        }
+
+    def naive_scan(self, now):
+        """What a scheduler without due_at and the checkpoint does: check every open complaint each tick."""
+        started = time.perf_counter()
+        found = 0
+        rows = Complaint.objects.filter(status__in=SLA_STATUSES).values_list('category', 'priority', 'created_at')
+        for category, priority, created_at in rows.iterator(chunk_size=5000):
+            if created_at + target(category, priority) <= now:
+                found += 1
+        return {'overdue': found, 'ms': round((time.perf_counter() - started) * 1000, 2)}
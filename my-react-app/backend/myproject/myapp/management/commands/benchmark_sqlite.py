@@ -0,0 +1,200 @@
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+import django
+from django.core.management.base import BaseCommand
+
+from myapp.benchmark import percentile
+from myapp.db import is_lock_error, sqlite_pragmas
+
+SCHEMA = """
+CREATE TABLE complaint (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    citizen_id INTEGER NOT NULL,
+    title VARCHAR(255) NOT NULL,
+    description TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    created_at DATETIME NOT NULL
+);
+CREATE INDEX complaint_citizen ON complaint (citizen_id);
+CREATE TABLE notification (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipient_id INTEGER NOT NULL,
+    complaint_id INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    read BOOLEAN NOT NULL,
+    created_at DATETIME NOT NULL
+);
+CREATE INDEX notification_recipient ON notification (recipient_id);
+"""
+
+# settings.py only turns on BEGIN IMMEDIATE (the transaction_mode option) on Django 5.1+;
+# older versions keep deferred transactions even in tuned mode, and so does the benchmark
+IMMEDIATE_TRANSACTIONS = django.VERSION >= (5, 1)
+
+
+class Workload:
+    """
+    Mimics the app's hot paths on a scratch database: writers submit a complaint
+    and fan out admin notifications in one transaction (ComplaintCreateView),
+    readers poll a complaint list and a notification list.
+    """
+    def __init__(self, path, tuned, admins, retry_attempts):
+        self.path = path
+        self.tuned = tuned
+        self.immediate = tuned and IMMEDIATE_TRANSACTIONS
+        self.admins = admins
+        self.retry_attempts = retry_attempts
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.samples = {'write': [], 'read': []}
+        self.errors = {'write': 0, 'read': 0}
+        self.retries = 0
+
+    def connect(self):
+        # Django's default: 5 s timeout, deferred transactions
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        if self.tuned:
+            for name, value in sqlite_pragmas().items():
+                conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def write_once(self, conn, rng):
+        conn.execute('BEGIN IMMEDIATE' if self.immediate else 'BEGIN')
+        try:
+            # Read first (like get_serializer/is_valid + admin lookup) then write
+            conn.execute('SELECT COUNT(*) FROM complaint WHERE citizen_id = ?', (rng.randint(1, 500),)).fetchone()
+            cursor = conn.execute(
+                "INSERT INTO complaint (citizen_id, title, description, status, created_at) "
+                "VALUES (?, ?, ?, 'pending', datetime('now'))",
+                (rng.randint(1, 500), 'Pothole near junction', 'Benchmark complaint ' * 5),
+            )
+            conn.executemany(
+                "INSERT INTO notification (recipient_id, complaint_id, message, read, created_at) "
+                "VALUES (?, ?, ?, 0, datetime('now'))",
+                [(admin, cursor.lastrowid, 'New complaint submitted') for admin in range(1, self.admins + 1)],
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def read_once(self, conn, rng):
+        conn.execute('SELECT * FROM complaint ORDER BY created_at DESC LIMIT 50').fetchall()
+        conn.execute(
+            'SELECT * FROM notification WHERE recipient_id = ? ORDER BY created_at DESC LIMIT 50',
+            (rng.randint(1, self.admins),),
+        ).fetchall()
+
+    def run_worker(self, kind, seed):
+        rng = random.Random(seed)
+        conn = self.connect()
+        operation = self.write_once if kind == 'write' else self.read_once
+        try:
+            while not self.stop.is_set():
+                started = time.perf_counter()
+                attempts = self.retry_attempts if (self.tuned and kind == 'write') else 1
+                for attempt in range(1, attempts + 1):
+                    try:
+                        operation(conn, rng)
+                        elapsed = time.perf_counter() - started
+                        with self.lock:
+                            self.samples[kind].append(elapsed)
+                        break
+                    except sqlite3.OperationalError as exc:
+                        if not is_lock_error(exc) or attempt == attempts:
+                            with self.lock:
+                                self.errors[kind] += 1
+                            break
+                        with self.lock:
+                            self.retries += 1
+                        time.sleep(0.05 * (2 ** (attempt - 1)) * (1 + rng.random()))
+        finally:
+            conn.close()
+
+
+def summarize(latencies, errors, seconds):
+    latencies = sorted(value * 1000 for value in latencies)
+    return {
+        'ok': len(latencies),
+        'errors': errors,
+        'throughput_per_s': round(len(latencies) / seconds, 1),
+        'p50_ms': round(percentile(latencies, 50), 3) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95), 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 3) if latencies else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent read/write benchmark on a scratch SQLite file, "
+        "comparing the default configuration with the tuned mode (WAL + PRAGMAs + retries, "
+        "plus BEGIN IMMEDIATE on Django 5.1+ where settings.py enables it)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10.0, help="Duration of each run")
+        parser.add_argument('--admins', type=int, default=5, help="Notifications written per complaint")
+        parser.add_argument('--retry-attempts', type=int, default=5)
+        parser.add_argument('--output', '-o', help="Write JSON here instead of stdout")
+
+    def handle(self, *args, **options):
+        results = {}
+        for mode in ('default', 'tuned'):
+            self.stderr.write(f"Running {mode} mode for {options['seconds']}s ...")
+            results[mode] = self.run_mode(mode == 'tuned', options)
+
+        report = {
+            'meta': {
+                'writers': options['writers'],
+                'readers': options['readers'],
+                'seconds': options['seconds'],
+                'admins': options['admins'],
+                'sqlite_version': sqlite3.sqlite_version,
+                'pragmas': sqlite_pragmas(),
+                'django': django.get_version(),
+                'tuned_begin_immediate': IMMEDIATE_TRANSACTIONS,
+            },
+            'results': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output)
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(output)
+
+    def run_mode(self, tuned, options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bench.sqlite3')
+            setup = sqlite3.connect(path)
+            setup.executescript(SCHEMA)
+            setup.close()
+
+            workload = Workload(path, tuned, options['admins'], options['retry_attempts'])
+            threads = [
+                threading.Thread(target=workload.run_worker, args=(kind, seed))
+                for seed, kind in enumerate(['write'] * options['writers'] + ['read'] * options['readers'])
+            ]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            time.sleep(options['seconds'])
+            workload.stop.set()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+        return {
+            'writes': summarize(workload.samples['write'], workload.errors['write'], elapsed),
+            'reads': summarize(workload.samples['read'], workload.errors['read'], elapsed),
+            'lock_retries': workload.retries,
+        }
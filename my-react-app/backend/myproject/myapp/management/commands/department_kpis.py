@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from myapp.kpis import department_kpis
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the department KPIs (time to assign/resolve, reopens, ratings) from the complaint "
+        "timeline and store them in the cache for the KPI endpoint. Run it from cron a little more "
+        "often than DEPARTMENT_KPI_CACHE_SECONDS so requests never pay for the pass."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help="Print the KPIs as JSON")
+
+    def handle(self, *args, **options):
+        result = department_kpis(refresh=True)
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+        for row in result['departments']:
+            assign, resolve = row['time_to_assign_hours'], row['time_to_resolve_hours']
+            self.stdout.write(
+                f"{row['department_name'] or row['department']}: {row['complaints']} complaints, "
+                f"assign p50/p90 {assign['p50']}/{assign['p90']}h, resolve p50/p90 {resolve['p50']}/{resolve['p90']}h, "
+                f"{row['reopens']} reopens, rating {row['avg_rating']}"
+            )
+        self.stdout.write(f"Computed in {result['seconds']}s")
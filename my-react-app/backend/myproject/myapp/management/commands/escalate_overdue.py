@@ -0,0 +1,43 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from myapp.sla import backfill, sla_settings, tick
+
+
+class Command(BaseCommand):
+    help = (
+        "Escalate pending/assigned complaints past their SLA target (COMPLAINT_SLA): raise the "
+        "priority one level, or notify the admins if it is already high. Each tick only reads the "
+        "complaints that fell due since the previous one. Run it from cron, or keep it running "
+        "with --interval."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Seconds between ticks; 0 runs a single tick and exits")
+        parser.add_argument('--batch-size', type=int, help="Complaints per transaction (default: COMPLAINT_SLA)")
+        parser.add_argument('--backfill', action='store_true',
+                            help="First set due_at on open complaints that have none")
+        parser.add_argument('--json', action='store_true', help="Print each tick's report as JSON")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size'] or sla_settings()['BATCH_SIZE']
+        if options['backfill']:
+            self.stdout.write(f"Set due_at on {backfill(batch_size)} open complaints")
+
+        while True:
+            started = time.monotonic()
+            stats = tick(batch_size=batch_size)
+            stats['seconds'] = round(time.monotonic() - started, 3)
+            if options['json']:
+                self.stdout.write(json.dumps(stats))
+            else:
+                self.stdout.write(
+                    f"{stats['breaches']} complaints escalated, {stats['admin_alerts']} admin alerts "
+                    f"({stats['batches']} batches, {stats['seconds']}s)"
+                )
+            if not options['interval']:
+                return
+            time.sleep(max(0.0, options['interval'] - stats['seconds']))
@@ -0,0 +1,65 @@
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+
+from myapp.exports import (
+    DATASETS, EXPORT_FORMATS, WRITERS, ExportFormatUnavailable,
+    get_export_queryset, iter_rows
+)
+from myapp.filters import COMPLAINT_FILTER_FIELDS
+from myapp.routers import pick_replica, pinned_reads
+
+
+class Command(BaseCommand):
+    help = "Export complaints, updates or feedback to CSV, XLSX or Parquet in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', dest='export_format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help="Output file (defaults to <dataset>.<ext>, use - for stdout with csv)")
+        for field in COMPLAINT_FILTER_FIELDS:
+            parser.add_argument(f'--{field}')
+        parser.add_argument('--created-after', dest='created_after')
+        parser.add_argument('--created-before', dest='created_before')
+        parser.add_argument('--database', help="Alias to read from (defaults to a replica when DATABASE_REPLICAS has one)")
+
+    def handle(self, *args, **options):
+        dataset = options['dataset']
+        export_format = options['export_format']
+        output = options['output'] or f"{dataset}.{EXPORT_FORMATS[export_format][1]}"
+
+        params = {
+            key: options[key]
+            for key in (*COMPLAINT_FILTER_FIELDS, 'created_after', 'created_before')
+            if options.get(key)
+        }
+        database = options['database'] or pick_replica()
+        if database not in settings.DATABASES:
+            raise CommandError(f"Unknown database alias '{database}'.")
+        try:
+            rows = pinned_reads(iter_rows(dataset, get_export_queryset(dataset, params).using(database)), database)
+        except serializers.ValidationError as e:
+            raise CommandError("; ".join(f"{field}: {error}" for field, error in e.detail.items()))
+        writer = WRITERS[export_format]
+
+        started = time.monotonic()
+        try:
+            if output == '-':
+                if export_format != 'csv':
+                    raise CommandError("Only csv can be written to stdout.")
+                count = writer(dataset, rows, sys.stdout)
+            elif export_format == 'csv':
+                with open(output, 'w', newline='', encoding='utf-8') as fh:
+                    count = writer(dataset, rows, fh)
+            else:
+                with open(output, 'wb') as fh:
+                    count = writer(dataset, rows, fh)
+        except ExportFormatUnavailable as e:
+            raise CommandError(str(e))
+        elapsed = time.monotonic() - started
+
+        rate = count / elapsed if elapsed else 0
+        self.stderr.write(f"Exported {count} {dataset} rows to {output} in {elapsed:.2f}s ({rate:,.0f} rows/s)")
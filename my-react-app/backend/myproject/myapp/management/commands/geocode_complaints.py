@@ -0,0 +1,28 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from myapp.geo import backfill
+
+
+class Command(BaseCommand):
+    help = (
+        "Set latitude/longitude (and the geohash index) on complaints that have none by geocoding "
+        "their location with GEOCODER. Run it once after migrating, and again after extending the "
+        "gazetteer; new complaints are geocoded as they are saved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Complaints per transaction")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        stats = backfill(options['batch_size'])
+        if options['json']:
+            self.stdout.write(json.dumps(stats, indent=2))
+        else:
+            rate = stats['checked'] / stats['seconds'] if stats['seconds'] else 0
+            self.stdout.write(
+                f"Placed {stats['placed']} of {stats['checked']} complaints without coordinates "
+                f"({stats['seconds']}s, {rate:.0f} complaints/s)"
+            )
@@ -0,0 +1,296 @@
+import csv
+import json
+import os
+import time
+from datetime import datetime, time as dt_time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from myapp import geo
+from myapp.bulk import historical_timestamps
+from myapp.changes import stamp_new
+from myapp.models import Complaint, ComplaintUpdate, Feedback
+from myapp.rollups import record_bulk
+from myapp.sla import initial_due_at
+
+User = get_user_model()
+
+VALID_CATEGORIES = {key for key, _ in Complaint.CATEGORY_CHOICES}
+VALID_PRIORITIES = {key for key, _ in Complaint.PRIORITY_CHOICES}
+VALID_STATUSES = {key for key, _ in Complaint.STATUS_CHOICES}
+
+# Key of the placeholder read_records() yields for a record it can't decode
+INVALID = '__invalid__'
+
+
+def _checked(record):
+    """The record, or a placeholder saying why its JSON doesn't have the expected shape."""
+    if not isinstance(record, dict):
+        return {INVALID: "not a JSON object"}
+    updates = record.get('updates')
+    if updates and not (isinstance(updates, list) and all(isinstance(update, dict) for update in updates)):
+        return {INVALID: "'updates' is not a list of objects"}
+    if record.get('feedback') is not None and not isinstance(record['feedback'], dict):
+        return {INVALID: "'feedback' is not an object"}
+    return record
+
+
+def read_records(path):
+    """
+    Yields one dict per complaint. JSONL records may nest 'updates' (a list)
+    and 'feedback' (an object). CSV rows use feedback_rating/feedback_comment
+    columns and an optional JSON-encoded 'updates' column.
+
+    A line or 'updates' cell that isn't valid JSON yields {INVALID: reason}
+    instead, so it is skipped like any other bad record and the record
+    numbers (and checkpoints) still line up with the file.
+    """
+    if path.endswith('.jsonl') or path.endswith('.ndjson'):
+        with open(path, encoding='utf-8') as fh:
+            for line in fh:
+                if line.strip():
+                    try:
+                        yield _checked(json.loads(line))
+                    except ValueError as e:
+                        yield {INVALID: f"invalid JSON ({e})"}
+        return
+
+    with open(path, newline='', encoding='utf-8') as fh:
+        for row in csv.DictReader(fh):
+            record = dict(row)
+            if record.get('updates'):
+                try:
+                    record['updates'] = json.loads(record['updates'])
+                except ValueError as e:
+                    yield {INVALID: f"invalid JSON in 'updates' ({e})"}
+                    continue
+                record = _checked(record)
+                if INVALID in record:
+                    yield record
+                    continue
+            if record.get('feedback_rating'):
+                record['feedback'] = {
+                    'rating': record['feedback_rating'],
+                    'comment': record.get('feedback_comment') or None,
+                    'created_at': record.get('feedback_created_at') or None,
+                }
+            yield record
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import historical complaints (with their updates and feedback) "
+        "from CSV or JSONL. Skips notifications and can resume from a checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSONL (.jsonl/.ndjson) file")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Rows per INSERT statement")
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help="Records per transaction (and per checkpoint)")
+        parser.add_argument('--checkpoint', help="Checkpoint file (defaults to <path>.checkpoint)")
+        parser.add_argument('--restart', action='store_true',
+                            help="Ignore any existing checkpoint and start from the first record")
+        parser.add_argument('--create-missing-citizens', action='store_true',
+                            help="Create citizen accounts (unusable password) for unknown emails")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"File not found: {path}")
+
+        self.batch_size = options['batch_size']
+        self.create_missing = options['create_missing_citizens']
+        checkpoint_path = options['checkpoint'] or f"{path}.checkpoint"
+
+        done = 0
+        if not options['restart'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as fh:
+                done = json.load(fh)['records_done']
+            self.stderr.write(f"Resuming after record {done}")
+
+        # email -> id maps, loaded once so rows never hit the DB for lookups
+        self.users = {}
+        self.departments = {}
+        for user_id, email, role in User.objects.values_list('id', 'email', 'role').iterator():
+            self.users[email.lower()] = user_id
+            if role == 'department':
+                self.departments[email.lower()] = user_id
+
+        self.stats = {'complaints': 0, 'updates': 0, 'feedback': 0, 'skipped': 0}
+        records = islice(read_records(path), done, None)
+        started = time.monotonic()
+
+        with historical_timestamps():
+            while True:
+                chunk = list(islice(records, options['chunk_size']))
+                if not chunk:
+                    break
+                # Geocoded before the transaction, which holds the database's write lock
+                self.points = geo.geocode_many(
+                    (record.get('location') or '')[:255] for record in chunk
+                    if record.get('latitude') in (None, '') or record.get('longitude') in (None, '')
+                )
+                with transaction.atomic():
+                    self.import_chunk(chunk, done)
+                done += len(chunk)
+                self.save_checkpoint(checkpoint_path, done)
+
+                elapsed = time.monotonic() - started
+                self.stderr.write(
+                    f"{done} records read, {self.stats['complaints']} complaints imported "
+                    f"({self.stats['complaints'] / elapsed:,.0f}/s), {self.stats['skipped']} skipped"
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            "Imported {complaints} complaints, {updates} updates, {feedback} feedback "
+            "({skipped} records skipped).".format(**self.stats)
+        ))
+
+    def save_checkpoint(self, checkpoint_path, done):
+        # Write-then-rename so a crash never leaves a half-written checkpoint
+        tmp_path = f"{checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as fh:
+            json.dump({'records_done': done}, fh)
+        os.replace(tmp_path, checkpoint_path)
+
+    def resolve_citizens(self, chunk):
+        if not self.create_missing:
+            return
+        missing = {
+            (record.get('citizen_email') or '').strip().lower()
+            for record in chunk
+        } - set(self.users) - {''}
+        if not missing:
+            return
+        new_users = []
+        for email in missing:
+            # username is unique too, so reuse the email rather than risk a clash
+            user = User(email=email, username=email[:150], role='citizen')
+            user.set_unusable_password()
+            new_users.append(user)
+        User.objects.bulk_create(new_users, batch_size=self.batch_size)
+        for email, user_id in User.objects.filter(email__in=missing).values_list('email', 'id'):
+            self.users[email.lower()] = user_id
+
+    def build_complaint(self, record):
+        if INVALID in record:
+            return None, record[INVALID]
+        citizen_id = self.users.get((record.get('citizen_email') or '').strip().lower())
+        category = record.get('category') or 'other'
+        priority = (record.get('priority') or 'medium').lower()
+        status = record.get('status') or 'pending'
+        if citizen_id is None:
+            return None, f"unknown citizen '{record.get('citizen_email')}'"
+        if category not in VALID_CATEGORIES or priority not in VALID_PRIORITIES or status not in VALID_STATUSES:
+            return None, f"invalid category/priority/status ({category}/{priority}/{status})"
+
+        try:
+            latitude, longitude = (float(record[name]) if record.get(name) not in (None, '') else None
+                                   for name in ('latitude', 'longitude'))
+        except (TypeError, ValueError):
+            return None, f"invalid latitude/longitude ({record.get('latitude')}/{record.get('longitude')})"
+        location = (record.get('location') or '')[:255]
+        if latitude is None or longitude is None or not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            latitude, longitude = self.points.get(location, (None, None))  # Geocoded from the location instead
+
+        try:
+            created_at = self.parse_when(record.get('created_at')) or timezone.now()
+            updated_at = self.parse_when(record.get('updated_at')) or created_at
+            # The updates and feedback are written after the complaints, so their dates are checked now
+            resolutions = []
+            for update in record.get('updates') or []:
+                when = self.parse_when(update.get('created_at')) or updated_at
+                if (update.get('new_status') or status) == 'resolved':
+                    resolutions.append(when)
+            self.parse_when((record.get('feedback') or {}).get('created_at'))
+        except ValueError as e:
+            return None, f"invalid date ({e})"
+        complaint = Complaint(
+            citizen_id=citizen_id,
+            department_id=self.departments.get((record.get('department_email') or '').strip().lower()),
+            title=(record.get('title') or '')[:255],
+            category=category,
+            description=record.get('description') or '',
+            location=location,
+            priority=priority,
+            status=status,
+            created_at=created_at,
+            updated_at=updated_at,
+            # Its last "resolved" update, else its last change
+            resolved_at=max(resolutions, default=updated_at) if status == 'resolved' else None,
+            due_at=initial_due_at(category, priority, status, created_at),
+            latitude=latitude,
+            longitude=longitude,
+        )
+        geo.place(complaint, lookup=False)
+        return complaint, None
+
+    def import_chunk(self, chunk, offset):
+        self.resolve_citizens(chunk)
+
+        complaints, sources = [], []
+        for index, record in enumerate(chunk, start=offset + 1):
+            complaint, error = self.build_complaint(record)
+            if error:
+                self.stats['skipped'] += 1
+                self.stderr.write(f"Record {index} skipped: {error}")
+                continue
+            complaints.append(complaint)
+            sources.append(record)
+
+        # Primary keys are set on the objects (SQLite 3.35+ / PostgreSQL)
+        stamp_new(complaints)
+        Complaint.objects.bulk_create(complaints, batch_size=self.batch_size)
+
+        updates, feedback = [], []
+        for complaint, record in zip(complaints, sources):
+            for update in record.get('updates') or []:
+                new_status = update.get('new_status') or complaint.status
+                if new_status not in VALID_STATUSES:
+                    continue
+                updates.append(ComplaintUpdate(
+                    complaint_id=complaint.id,
+                    user_id=self.users.get((update.get('user_email') or '').strip().lower()),
+                    message=update.get('message') or '',
+                    new_status=new_status,
+                    created_at=self.parse_when(update.get('created_at')) or complaint.updated_at,
+                ))
+            rating = (record.get('feedback') or {}).get('rating')
+            if str(rating or '').isdigit() and 1 <= int(rating) <= 5:
+                feedback.append(Feedback(
+                    complaint_id=complaint.id,
+                    citizen_id=complaint.citizen_id,
+                    rating=int(rating),
+                    comment=record['feedback'].get('comment'),
+                    created_at=self.parse_when(record['feedback'].get('created_at')) or complaint.updated_at,
+                ))
+
+        ComplaintUpdate.objects.bulk_create(updates, batch_size=self.batch_size)
+        Feedback.objects.bulk_create(feedback, batch_size=self.batch_size)
+        # bulk_create() skips Complaint.save(), so the daily rollups and map tiles are updated here
+        record_bulk(complaints, feedback)
+        geo.record_bulk(complaints)
+
+        self.stats['complaints'] += len(complaints)
+        self.stats['updates'] += len(updates)
+        self.stats['feedback'] += len(feedback)
+
+    @staticmethod
+    def parse_when(value):
+        """None for a missing or unrecognised date; ValueError for one that doesn't exist (2020-13-45)."""
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, dt_time.min) if day else None
+        if parsed is not None and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
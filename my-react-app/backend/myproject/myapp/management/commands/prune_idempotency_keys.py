@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from myapp.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Delete expired Idempotency-Key records in small batches (run from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between batches")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            # Short transactions keep the SQLite writer free for requests
+            ids = list(IdempotencyKey.objects.expired().values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted, _ = IdempotencyKey.objects.filter(id__in=ids).delete()
+            total += deleted
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(f"Deleted {total} expired idempotency keys.")
@@ -0,0 +1,218 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from myapp import geo
+from myapp.bulk import historical_timestamps
+from myapp.changes import stamp_new
+from myapp.models import (
+    BroadcastNotification, Complaint, ComplaintImage, ComplaintUpdate, Feedback, Notification,
+    NotificationReadMarker,
+)
+from myapp.rollups import record_bulk
+from myapp.sla import initial_due_at
+
+User = get_user_model()
+
+SEED_EMAIL_DOMAIN = 'seed.example.com'
+
+# Rough shape of real traffic: most complaints are still open, roads and garbage dominate
+STATUS_WEIGHTS = {'pending': 30, 'assigned': 20, 'in-progress': 20, 'resolved': 30}
+CATEGORY_WEIGHTS = {'road-damage': 30, 'garbage': 25, 'water-supply': 15,
+                    'streetlight': 12, 'drainage': 12, 'other': 6}
+PRIORITY_WEIGHTS = {'high': 20, 'medium': 50, 'low': 30}
+STREETS = ['Main Road', 'Station Road', 'Park Street', 'Lake View', 'Market Lane',
+           'Gandhi Nagar', 'Sector 12', 'Old Town', 'Ring Road', 'Hill Side']
+TITLES = {
+    'road-damage': ['Pothole near junction', 'Broken road surface', 'Road caved in'],
+    'garbage': ['Garbage not collected', 'Overflowing bin', 'Illegal dumping'],
+    'water-supply': ['No water since morning', 'Leaking pipeline', 'Dirty tap water'],
+    'streetlight': ['Streetlight not working', 'Flickering lamp post', 'Dark stretch at night'],
+    'drainage': ['Blocked drain', 'Sewage overflow', 'Waterlogging after rain'],
+    'other': ['Stray animals', 'Noise complaint', 'Encroachment on footpath'],
+}
+
+
+def weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+class Command(BaseCommand):
+    help = "Generate a reproducible synthetic dataset (users, complaints, updates, feedback, notifications, broadcasts, images)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--citizens', type=int, default=1000)
+        parser.add_argument('--departments', type=int, default=20)
+        parser.add_argument('--admins', type=int, default=3)
+        parser.add_argument('--complaints', type=int, default=10000)
+        parser.add_argument('--days', type=int, default=365, help="Spread complaints over this many past days")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--password', default='seedpass123', help="Password shared by every seeded user")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        started = time.monotonic()
+
+        # Hash once and reuse: hashing per user would dominate the runtime
+        password = make_password(options['password'])
+
+        with historical_timestamps():
+            users = self.create_users(options, password, batch_size)
+            counts = self.create_complaints(rng, options, users, batch_size)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {sum(len(ids) for ids in users.values())} users, "
+            + ", ".join(f"{count} {name}" for name, count in counts.items())
+            + f" in {elapsed:.1f}s (seed={options['seed']})"
+        ))
+
+    def create_users(self, options, password, batch_size):
+        users = []
+        # Joined before the oldest complaint, so broadcasts about it reach them
+        joined = timezone.now() - timedelta(days=options['days'] + 1)
+        for role, count in (('admin', options['admins']), ('department', options['departments']),
+                            ('citizen', options['citizens'])):
+            for n in range(count):
+                email = f"{role}{n}@{SEED_EMAIL_DOMAIN}"
+                users.append(User(
+                    username=email, email=email, role=role, password=password,
+                    is_staff=(role == 'admin'), date_joined=joined,
+                ))
+        User.objects.bulk_create(users, batch_size=batch_size, ignore_conflicts=True)
+
+        ids = {'admin': [], 'department': [], 'citizen': []}
+        seeded = User.objects.filter(email__endswith=f"@{SEED_EMAIL_DOMAIN}").order_by('id')
+        for user_id, role in seeded.values_list('id', 'role'):
+            ids[role].append(user_id)
+        return ids
+
+    def create_complaints(self, rng, options, users, batch_size):
+        now = timezone.now()
+        span = timedelta(days=options['days']).total_seconds()
+        counts = {'complaints': 0, 'updates': 0, 'feedback': 0, 'notifications': 0, 'broadcasts': 0, 'images': 0}
+        total = options['complaints']
+        # Separate stream, so the coordinates don't change the rest of a seeded dataset
+        scatter = random.Random(options['seed'] + 1)
+
+        for start in range(0, total, batch_size):
+            complaints = []
+            for _ in range(min(batch_size, total - start)):
+                category = weighted(rng, CATEGORY_WEIGHTS)
+                status = weighted(rng, STATUS_WEIGHTS)
+                priority = weighted(rng, PRIORITY_WEIGHTS)
+                created_at = now - timedelta(seconds=rng.random() * span)
+                department_id = (
+                    rng.choice(users['department'])
+                    if status != 'pending' and users['department'] else None
+                )
+                citizen_id = rng.choice(users['citizen'])
+                title = rng.choice(TITLES[category])
+                description = f"{rng.choice(TITLES[category])}. Reported by a resident, please look into it."
+                location = f"{rng.randint(1, 400)} {rng.choice(STREETS)}"
+                point = geo.geocode(location)
+                complaints.append(Complaint(
+                    citizen_id=citizen_id,
+                    department_id=department_id,
+                    title=title,
+                    category=category,
+                    description=description,
+                    location=location,
+                    # Spread along the street (about 300 m either way) rather than on one point
+                    latitude=point and point[0] + scatter.uniform(-0.003, 0.003),
+                    longitude=point and point[1] + scatter.uniform(-0.003, 0.003),
+                    priority=priority,
+                    status=status,
+                    created_at=created_at,
+                    due_at=initial_due_at(category, priority, status, created_at),
+                    updated_at=min(now, created_at + timedelta(hours=rng.randint(0, 240))),
+                ))
+                if status == 'resolved':
+                    complaints[-1].resolved_at = complaints[-1].updated_at  # Its last change
+
+            for complaint in complaints:
+                geo.place(complaint, lookup=False)
+            with transaction.atomic():
+                stamp_new(complaints)
+                Complaint.objects.bulk_create(complaints, batch_size=batch_size)
+                self.create_children(rng, complaints, users, counts, batch_size)
+            counts['complaints'] += len(complaints)
+            self.stderr.write(f"{counts['complaints']}/{total} complaints")
+
+        # Admins have read the broadcasts older than a week
+        NotificationReadMarker.objects.bulk_create(
+            [NotificationReadMarker(user_id=admin_id, read_until=now - timedelta(days=7)) for admin_id in users['admin']],
+            ignore_conflicts=True,
+        )
+        return counts
+
+    def create_children(self, rng, complaints, users, counts, batch_size):
+        updates, feedback, notifications, broadcasts, images = [], [], [], [], []
+        staff = users['admin'] + users['department']
+
+        for complaint in complaints:
+            # Walk the complaint through its status history
+            history = ['assigned', 'in-progress', 'resolved']
+            steps = history[:history.index(complaint.status) + 1] if complaint.status in history else []
+            when = complaint.created_at
+            for new_status in steps:
+                when = min(complaint.updated_at, when + timedelta(hours=rng.randint(1, 72)))
+                updates.append(ComplaintUpdate(
+                    complaint_id=complaint.id,
+                    user_id=complaint.department_id or (rng.choice(staff) if staff else None),
+                    message=f"Status changed to {new_status}.",
+                    new_status=new_status,
+                    created_at=when,
+                ))
+
+            if complaint.status == 'resolved' and rng.random() < 0.6:
+                feedback.append(Feedback(
+                    complaint_id=complaint.id,
+                    citizen_id=complaint.citizen_id,
+                    rating=rng.choices([1, 2, 3, 4, 5], weights=[5, 8, 17, 35, 35])[0],
+                    comment=rng.choice([None, "Quick response, thanks.", "Took too long.", "Fixed properly."]),
+                    created_at=complaint.updated_at,
+                ))
+
+            broadcasts.append(BroadcastNotification(
+                audience='admin',
+                message=f"New complaint submitted: '{complaint.title[:30]}...'",
+                complaint_id=complaint.id,
+                created_at=complaint.created_at,
+            ))
+            if steps:
+                notifications.append(Notification(
+                    recipient_id=complaint.citizen_id,
+                    message=f"Your complaint '{complaint.title}' is now '{complaint.status}'.",
+                    complaint_id=complaint.id,
+                    read=rng.random() < 0.5,
+                    created_at=complaint.updated_at,
+                ))
+
+            # Image rows point at placeholder paths; no files are written
+            for n in range(rng.choices([0, 1, 2], weights=[50, 35, 15])[0]):
+                images.append(ComplaintImage(
+                    complaint_id=complaint.id,
+                    image=f"complaint_images/seed/{complaint.id}_{n}.jpg",
+                ))
+
+        ComplaintUpdate.objects.bulk_create(updates, batch_size=batch_size)
+        Feedback.objects.bulk_create(feedback, batch_size=batch_size)
+        Notification.objects.bulk_create(notifications, batch_size=batch_size)
+        BroadcastNotification.objects.bulk_create(broadcasts, batch_size=batch_size)
+        ComplaintImage.objects.bulk_create(images, batch_size=batch_size)
+        record_bulk(complaints, feedback)
+        geo.record_bulk(complaints)
+        counts['updates'] += len(updates)
+        counts['feedback'] += len(feedback)
+        counts['notifications'] += len(notifications)
+        counts['broadcasts'] += len(broadcasts)
+        counts['images'] += len(images)
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from myapp.models import SlowQuery
+
+ORDERING = {'total': '-total_ms', 'max': '-max_ms', 'count': '-count', 'recent': '-last_seen'}
+
+
+class Command(BaseCommand):
+    help = "Show the top offenders from the slow-query log, with their query plans."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--order', choices=sorted(ORDERING), default='total')
+        parser.add_argument('--full-scan', action='store_true', help="Only queries whose plan scans a whole table")
+        parser.add_argument('--no-plan', action='store_true', help="Hide the EXPLAIN output")
+        parser.add_argument('--reset', action='store_true', help="Clear the log instead of showing it")
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(f"Cleared {deleted} slow-query entries.")
+            return
+
+        queryset = SlowQuery.objects.order_by(ORDERING[options['order']])
+        if options['full_scan']:
+            queryset = queryset.filter(full_scan=True)
+
+        entries = list(queryset[:options['limit']])
+        if not entries:
+            self.stdout.write("No slow queries recorded.")
+            return
+
+        for rank, entry in enumerate(entries, start=1):
+            flag = self.style.WARNING(' [FULL SCAN]') if entry.full_scan else ''
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"#{rank} {entry.view}{flag}"
+            ))
+            self.stdout.write(
+                f"   {entry.count}x  avg {entry.total_ms / entry.count:.1f} ms  "
+                f"max {entry.max_ms:.1f} ms  total {entry.total_ms:.0f} ms  last seen {entry.last_seen:%Y-%m-%d %H:%M}"
+            )
+            self.stdout.write(f"   {entry.sql}")
+            if entry.plan and not options['no_plan']:
+                for line in entry.plan.splitlines():
+                    self.stdout.write(f"     | {line}")
+            self.stdout.write('')
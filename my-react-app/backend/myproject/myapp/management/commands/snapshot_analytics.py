@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.snapshots import TABLES, SnapshotUnavailable, snapshot_dir, take_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Bring the columnar analytics snapshot (ANALYTICS_SNAPSHOT_DIR) up to date: export the "
+        "complaints changed and the updates and feedback added since the last run, rewriting only "
+        "the months they fall in. Run it from cron; --full rewrites everything."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help="Re-export every row, dropping rows deleted from the database")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        try:
+            stats = take_snapshot(full=options['full'])
+        except SnapshotUnavailable as exc:
+            raise CommandError(str(exc))
+        if options['json']:
+            self.stdout.write(json.dumps(stats))
+            return
+        for name in TABLES:
+            months = stats[name]['months_written']
+            self.stdout.write(f"{name}: {stats[name]['rows']} rows exported, {len(months)} month files written")
+        rows = sum(stats[name]['rows'] for name in TABLES)
+        rate = rows / stats['seconds'] if stats['seconds'] else 0
+        self.stdout.write(f"Snapshot in {snapshot_dir()} updated in {stats['seconds']}s ({rate:.0f} rows/s)")
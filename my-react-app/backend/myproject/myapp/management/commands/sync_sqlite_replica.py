@@ -0,0 +1,39 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database onto a replica file with the online backup API. "
+        "Stand-in for real replication when testing the replica router locally."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replica', default='replica', help="Replica alias in DATABASES")
+        parser.add_argument('--every', type=float, help="Keep syncing every N seconds (simulates replication lag)")
+
+    def handle(self, *args, **options):
+        alias = options['replica']
+        primary = settings.DATABASES['default']
+        replica = settings.DATABASES.get(alias)
+        if replica is None:
+            raise CommandError(f"No database alias '{alias}' in DATABASES.")
+        if 'sqlite3' not in primary['ENGINE'] or 'sqlite3' not in replica['ENGINE']:
+            raise CommandError("Both databases must be SQLite files.")
+
+        while True:
+            started = time.monotonic()
+            source = sqlite3.connect(str(primary['NAME']))
+            target = sqlite3.connect(str(replica['NAME']))
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stderr.write(f"Synced {primary['NAME']} -> {replica['NAME']} in {time.monotonic() - started:.2f}s")
+            if not options['every']:
+                break
+            time.sleep(options['every'])
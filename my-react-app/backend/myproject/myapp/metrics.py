@@ -0,0 +1,181 @@
+# myapp/metrics.py
+"""
+Prometheus metrics for the API.
+
+Request-level metrics are recorded by MetricsMiddleware; domain gauges
+(open complaints, unread notifications, image storage) are refreshed by a
+background thread every METRICS_GAUGE_INTERVAL seconds so a scrape never
+runs aggregate queries. Everything here is a no-op when prometheus_client
+is not installed or METRICS_ENABLED is False.
+
+/metrics answers scrapers that send `Authorization: Bearer <METRICS_TOKEN>`
+or connect from an address in METRICS_ALLOWED_IPS (loopback by default).
+"""
+import hmac
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count
+
+try:
+    import prometheus_client
+except ImportError:  # Metrics are optional
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+METRICS_AVAILABLE = prometheus_client is not None
+
+
+def metrics_enabled():
+    return METRICS_AVAILABLE and getattr(settings, 'METRICS_ENABLED', True)
+
+
+if METRICS_AVAILABLE:
+    from prometheus_client import Counter, Gauge, Histogram
+
+    REQUEST_LATENCY = Histogram(
+        'ccms_http_request_duration_seconds', 'Request latency by route',
+        ['method', 'route', 'status'],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    )
+    REQUEST_QUERIES = Histogram(
+        'ccms_http_request_db_queries', 'Database queries per request',
+        ['route'], buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250, 1000),
+    )
+    REQUEST_DB_TIME = Histogram(
+        'ccms_http_request_db_seconds', 'Time spent in the database per request',
+        ['route'], buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+    )
+    RESPONSE_SIZE = Histogram(
+        'ccms_http_response_size_bytes', 'Response body size (non-streaming responses)',
+        ['route'], buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+    )
+    NOTIFICATION_FANOUT = Histogram(
+        'ccms_notification_fanout_size', 'Notification rows written per event (a broadcast counts once)',
+        ['event'], buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250),
+    )
+    NOTIFICATIONS_WRITTEN = Counter(
+        'ccms_notifications_written', 'Notification rows written', ['event'],
+    )
+    NOTIFICATIONS_COALESCED = Counter(
+        'ccms_notifications_coalesced', 'Notifications merged into an existing row instead of inserted', ['event'],
+    )
+    THROTTLED_REQUESTS = Counter(
+        'ccms_throttled_requests', 'Requests shed with 429 by the token-bucket throttles', ['scope', 'kind'],
+    )
+    OPEN_COMPLAINTS = Gauge(
+        'ccms_open_complaints', 'Complaints not yet resolved', ['status', 'department_id'],
+    )
+    UNREAD_NOTIFICATIONS = Gauge('ccms_unread_notifications', 'Unread direct notification rows (broadcasts are read by watermark)')
+    IMAGE_STORAGE_BYTES = Gauge('ccms_image_storage_bytes', 'Bytes used by uploaded complaint images')
+    GAUGE_REFRESH_SECONDS = Gauge('ccms_domain_gauges_refresh_seconds', 'How long the last gauge refresh took')
+
+
+def record_fanout(event, count):
+    """Call after a notification fan-out with the number of rows written."""
+    if metrics_enabled():
+        NOTIFICATION_FANOUT.labels(event=event).observe(count)
+        NOTIFICATIONS_WRITTEN.labels(event=event).inc(count)
+
+
+def record_coalesced(event):
+    if metrics_enabled():
+        NOTIFICATIONS_COALESCED.labels(event=event).inc()
+
+
+def record_throttled(scope, kind):
+    if metrics_enabled():
+        THROTTLED_REQUESTS.labels(scope=scope, kind=kind).inc()
+
+
+# -------------------------------
+# Background domain gauges
+# -------------------------------
+def _directory_size(path):
+    total = 0
+    if not os.path.isdir(path):
+        return 0
+    for entry in os.scandir(path):
+        if entry.is_dir(follow_symlinks=False):
+            total += _directory_size(entry.path)
+        elif entry.is_file(follow_symlinks=False):
+            total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+
+_open_complaint_labels = set()
+
+
+def refresh_domain_gauges():
+    from .models import Complaint, Notification
+
+    started = time.monotonic()
+    open_counts = {
+        (row['status'], str(row['department_id'] or 'unassigned')): row['total']
+        for row in Complaint.objects.exclude(status='resolved').values('status', 'department_id').annotate(total=Count('id'))
+    }
+    for (status, department_id), total in open_counts.items():
+        OPEN_COMPLAINTS.labels(status=status, department_id=department_id).set(total)
+    # Departments that dropped to zero disappear; the others never leave a scrape empty-handed
+    for labels in _open_complaint_labels - open_counts.keys():
+        OPEN_COMPLAINTS.remove(*labels)
+    _open_complaint_labels.clear()
+    _open_complaint_labels.update(open_counts)
+
+    UNREAD_NOTIFICATIONS.set(Notification.objects.filter(read=False).count())
+    IMAGE_STORAGE_BYTES.set(_directory_size(os.path.join(settings.MEDIA_ROOT, 'complaint_images')))
+    GAUGE_REFRESH_SECONDS.set(time.monotonic() - started)
+
+
+_gauge_thread = None
+_gauge_lock = threading.Lock()
+
+
+def _gauge_loop(interval):
+    while True:
+        try:
+            refresh_domain_gauges()
+        except Exception:
+            logger.exception("Refreshing domain gauges failed")
+        finally:
+            close_old_connections()
+        time.sleep(interval)
+
+
+def start_gauge_thread():
+    """Starts the gauge refresher once per process (called lazily by the middleware)."""
+    global _gauge_thread
+    if _gauge_thread is not None or not metrics_enabled():
+        return
+    with _gauge_lock:
+        if _gauge_thread is None:
+            interval = getattr(settings, 'METRICS_GAUGE_INTERVAL', 60)
+            _gauge_thread = threading.Thread(
+                target=_gauge_loop, args=(interval,), name='metrics-gauges', daemon=True
+            )
+            _gauge_thread.start()
+
+
+def scrape_allowed(request):
+    """Whether `request` carries METRICS_TOKEN or comes from METRICS_ALLOWED_IPS."""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and header.startswith('Bearer ') and hmac.compare_digest(header[7:].encode(), token.encode()):
+        return True
+    return request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+
+
+def render_latest():
+    """Returns (body, content_type) for the /metrics endpoint."""
+    registry = prometheus_client.REGISTRY
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        # gunicorn with several workers: merge every worker's metric files
+        from prometheus_client import multiprocess
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
@@ -0,0 +1,383 @@
+# myapp/middleware.py
+"""
+All middleware here is sync and async capable, so under ASGI the async views
+(myapp/async_views.py) are not pushed back onto a thread by the middleware
+chain. Async code can't wrap the ORM's queries with connection.execute_wrapper
+directly, since they run on the request's sync worker thread; see
+async_execute_wrapper. Query wrappers go on every database alias
+(execute_wrappers), so reads routed to a replica are seen too.
+"""
+import cProfile
+import contextlib
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import metrics
+from .routers import mark_sticky, replica_aliases
+from .slow_queries import SlowQueryCollector
+
+logger = logging.getLogger(__name__)
+
+
+def view_label(request):
+    """Dotted path of the view that served the request, e.g. 'myapp.views.AllComplaintsView'."""
+    match = getattr(request, 'resolver_match', None)
+    return match._func_path if match is not None else 'unmatched'
+
+
+def route_label(request):
+    """The URL pattern that served the request, e.g. 'api/complaints/<int:pk>/'."""
+    match = getattr(request, 'resolver_match', None)
+    return match.route if match is not None else 'unmatched'
+
+
+@contextlib.contextmanager
+def execute_wrappers(wrapper):
+    """connection.execute_wrapper() on every alias in DATABASES (primary and replicas)."""
+    with contextlib.ExitStack() as stack:
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(wrapper))
+        yield wrapper
+
+
+@contextlib.asynccontextmanager
+async def async_execute_wrapper(wrapper):
+    """
+    execute_wrappers() for async middleware. Under ASGI every
+    thread-sensitive sync call of a request (async ORM queries and sync views
+    included) runs on one worker thread, so the wrapper is installed on that
+    thread's connections rather than the event loop's.
+    """
+    def enter():
+        stack = contextlib.ExitStack()
+        stack.enter_context(execute_wrappers(wrapper))
+        return stack
+
+    stack = await sync_to_async(enter)()
+    try:
+        yield wrapper
+    finally:
+        await sync_to_async(stack.close)()
+
+
+class HybridMiddleware:
+    """Base for middleware that runs natively under both WSGI and ASGI."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.handle(request)
+
+
+class QueryCounter:
+    """connection.execute_wrapper callable that counts and times every query."""
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+# -------------------------------
+# ✅ PROMETHEUS METRICS
+# -------------------------------
+class MetricsMiddleware(HybridMiddleware):
+    """
+    Records latency, DB query count/time and response size per route.
+    Put it first in MIDDLEWARE so the timings cover the whole stack.
+    """
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.enabled = metrics.metrics_enabled()
+
+    def handle(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        metrics.start_gauge_thread()
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with execute_wrappers(counter):
+            response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - started, counter)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        metrics.start_gauge_thread()
+        started = time.perf_counter()
+        async with async_execute_wrapper(QueryCounter()) as counter:
+            response = await self.get_response(request)
+        self.observe(request, response, time.perf_counter() - started, counter)
+        return response
+
+    def observe(self, request, response, elapsed, counter):
+        route = route_label(request)
+        metrics.REQUEST_LATENCY.labels(
+            method=request.method, route=route, status=response.status_code
+        ).observe(elapsed)
+        metrics.REQUEST_QUERIES.labels(route=route).observe(counter.count)
+        metrics.REQUEST_DB_TIME.labels(route=route).observe(counter.seconds)
+        if not response.streaming:
+            metrics.RESPONSE_SIZE.labels(route=route).observe(len(response.content))
+
+
+# -------------------------------
+# ✅ SLOW QUERY LOG
+# -------------------------------
+class SlowQueryMiddleware(HybridMiddleware):
+    """
+    Collects queries slower than SLOW_QUERY_THRESHOLD_MS while the view runs,
+    then records them (with an EXPLAIN plan on first sighting) after the
+    response is built so the logging never sits inside the request's queries.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'SLOW_QUERY_LOG_ENABLED', True):
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+        self.threshold_ms = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', 100)
+
+    def handle(self, request):
+        collector = SlowQueryCollector(self.threshold_ms)
+        with execute_wrappers(collector):
+            response = self.get_response(request)
+        if collector.slow:
+            collector.flush(view_label(request))
+        return response
+
+    async def __acall__(self, request):
+        async with async_execute_wrapper(SlowQueryCollector(self.threshold_ms)) as collector:
+            response = await self.get_response(request)
+        if collector.slow:
+            await sync_to_async(collector.flush)(view_label(request))
+        return response
+
+
+# -------------------------------
+# ✅ READ-YOUR-WRITES FOR REPLICAS
+# -------------------------------
+class ReplicaStickinessMiddleware(HybridMiddleware):
+    """After a successful write by a user, keep their reads on the primary for a while."""
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+    def handle(self, request):
+        response = self.get_response(request)
+        self.mark(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        if request.method not in self.SAFE_METHODS:
+            # request.user may be a lazy session user, which can't be loaded from async code
+            await sync_to_async(self.mark)(request, response)
+        return response
+
+    def mark(self, request, response):
+        if request.method not in self.SAFE_METHODS and response.status_code < 400 and replica_aliases():
+            # DRF copies the JWT-authenticated user back onto the Django request
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                mark_sticky(user.pk)
+
+
+# -------------------------------
+# ✅ ON-DEMAND PROFILING
+# -------------------------------
+class QueryTimeline:
+    """execute_wrapper callable that keeps (start offset, duration, database, SQL) for each query."""
+    def __init__(self, started):
+        self.started = started
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'offset_ms': round((started - self.started) * 1000, 3),
+                'duration_ms': round((time.perf_counter() - started) * 1000, 3),
+                'database': context['connection'].alias,
+                'sql': sql,
+            })
+
+
+class StackSampler:
+    """
+    Samples the request thread's Python stack every `interval` seconds from a
+    helper thread and aggregates them into collapsed-stack (flamegraph) lines.
+    """
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiling-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[';'.join(reversed(frames))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfilingMiddleware(HybridMiddleware):
+    """
+    Profiles selected requests and writes the results to PROFILING_DIR:
+      <id>.prof (cProfile mode) or <id>.collapsed (sampling mode),
+      plus <id>.sql.json with the request's query timeline.
+
+    A request is profiled when the caller is an admin and either sends the
+    PROFILING_HEADER or is picked by PROFILING_SAMPLE_RATE. With
+    PROFILING_ENABLED = False Django drops the middleware entirely.
+
+    Under ASGI the profiled request is handed to its worker thread, so the
+    profile covers the sync work (queries, serialization) but not the event loop.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed()
+        super().__init__(get_response)
+        self.header = 'HTTP_' + getattr(settings, 'PROFILING_HEADER', 'X-Profile').upper().replace('-', '_')
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        self.mode = getattr(settings, 'PROFILING_MODE', 'cprofile')
+        self.sample_interval = getattr(settings, 'PROFILING_SAMPLE_INTERVAL', 0.005)
+        self.directory = str(getattr(settings, 'PROFILING_DIR', os.path.join(settings.BASE_DIR, 'profiles')))
+        self.max_profiles = getattr(settings, 'PROFILING_MAX_PROFILES', 50)
+        self.jwt = JWTAuthentication()
+
+    async def __acall__(self, request):
+        wanted = request.META.get(self.header) or (self.sample_rate and random.random() < self.sample_rate)
+        if not wanted or not await sync_to_async(self.is_admin)(request):
+            return await self.get_response(request)
+        # The inner stack's sync work (ORM queries, sync views) is executed back on the
+        # thread blocked in async_to_sync, i.e. the one being profiled
+        return await sync_to_async(self.profile)(request, async_to_sync(self.get_response))
+
+    def handle(self, request):
+        wanted = request.META.get(self.header) or (self.sample_rate and random.random() < self.sample_rate)
+        if not wanted or not self.is_admin(request):
+            return self.get_response(request)
+        return self.profile(request, self.get_response)
+
+    def profile(self, request, get_response):
+
+        started = time.perf_counter()
+        timeline = QueryTimeline(started)
+        profiler = sampler = None
+        if self.mode == 'sampling':
+            sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            sampler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            with execute_wrappers(timeline):
+                response = get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            if sampler is not None:
+                sampler.stop()
+        elapsed = time.perf_counter() - started
+
+        try:
+            profile_id = self.write_profile(request, response, elapsed, timeline, profiler, sampler)
+            response['X-Profile-Id'] = profile_id
+        except OSError:
+            logger.exception("Could not write request profile")
+        return response
+
+    def is_admin(self, request):
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            # API requests authenticate with JWT inside DRF, after middleware runs
+            try:
+                result = self.jwt.authenticate(request)
+            except Exception:
+                return False
+            user = result[0] if result else None
+        return bool(user and user.is_authenticated and user.is_staff)
+
+    def write_profile(self, request, response, elapsed, timeline, profiler, sampler):
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', route_label(request)).strip('-') or 'root'
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}-{request.method}-{slug}"
+        base = os.path.join(self.directory, profile_id)
+
+        if profiler is not None:
+            profiler.dump_stats(base + '.prof')
+        if sampler is not None:
+            with open(base + '.collapsed', 'w') as fh:
+                fh.write(sampler.collapsed())
+        with open(base + '.sql.json', 'w') as fh:
+            json.dump({
+                'path': request.get_full_path(),
+                'method': request.method,
+                'route': route_label(request),
+                'status': response.status_code,
+                'duration_ms': round(elapsed * 1000, 3),
+                'query_count': len(timeline.queries),
+                'query_ms': round(sum(q['duration_ms'] for q in timeline.queries), 3),
+                'queries': timeline.queries,
+            }, fh, indent=2)
+
+        self.rotate()
+        return profile_id
+
+    def rotate(self):
+        # Keep only the newest PROFILING_MAX_PROFILES profiles (all files sharing an id)
+        ids = {}
+        for entry in os.scandir(self.directory):
+            if entry.is_file():
+                profile_id = entry.name.split('.', 1)[0]
+                ids[profile_id] = max(ids.get(profile_id, 0), entry.stat().st_mtime)
+        stale = sorted(ids, key=ids.get, reverse=True)[self.max_profiles:]
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.split('.', 1)[0] in stale:
+                os.remove(entry.path)
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:13
+
+import django.db.models.functions.text
+import myapp.models
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def normalize_emails(apps, schema_editor):
+    """
+    Refuses to continue while two accounts differ only by email case (the
+    unique Lower(email) index can't be built), then lower-cases every email.
+    """
+    CustomUser = apps.get_model('myapp', 'CustomUser')
+    db = schema_editor.connection.alias
+    users = CustomUser.objects.using(db)
+
+    duplicates = list(
+        users.annotate(email_lower=Lower('email')).values('email_lower')
+        .annotate(accounts=Count('id')).filter(accounts__gt=1).values_list('email_lower', flat=True)
+    )
+    if duplicates:
+        conflicts = [
+            f"  {email}: user ids {sorted(users.filter(email__iexact=email).values_list('id', flat=True))}"
+            for email in duplicates[:50]
+        ]
+        raise RuntimeError(
+            f"{len(duplicates)} email(s) belong to more than one account when compared case-insensitively:\n"
+            + "\n".join(conflicts)
+            + "\nMerge or rename these accounts, then run the migration again."
+        )
+
+    for user_id, email in users.exclude(email=Lower('email')).values_list('id', 'email').iterator():
+        users.filter(id=user_id).update(email=email.lower())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('myapp', '0015_slowquery'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_emails, migrations.RunPython.noop),
+        migrations.AlterModelManagers(
+            name='customuser',
+            managers=[
+                ('objects', myapp.models.CustomUserManager()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='customuser',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='unique_user_email_ci'),
+        ),
+    ]
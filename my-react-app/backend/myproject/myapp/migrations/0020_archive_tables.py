@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:31
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0019_notification_coalescing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBroadcastNotification',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('audience', models.CharField(max_length=20)),
+                ('message', models.TextField()),
+                ('complaint_id', models.BigIntegerField(blank=True, null=True)),
+                ('excluded_user_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('event', models.CharField(blank=True, default='', max_length=32)),
+                ('count', models.PositiveIntegerField(default=1)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedComplaintUpdate',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('complaint_id', models.BigIntegerField(db_index=True)),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('message', models.TextField()),
+                ('new_status', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedNotification',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('recipient_id', models.BigIntegerField(db_index=True)),
+                ('message', models.TextField()),
+                ('read', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('event', models.CharField(blank=True, default='', max_length=32)),
+                ('count', models.PositiveIntegerField(default=1)),
+                ('complaint_id', models.BigIntegerField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0023_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedcomplaintupdate',
+            name='complaint_id',
+            field=models.BigIntegerField(),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomplaintupdate',
+            index=models.Index(fields=['complaint_id', 'created_at'], name='archived_update_timeline'),
+        ),
+        migrations.AddIndex(
+            model_name='complaintupdate',
+            index=models.Index(fields=['complaint', 'created_at'], name='update_complaint_created'),
+        ),
+    ]
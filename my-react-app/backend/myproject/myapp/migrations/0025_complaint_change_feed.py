@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:11
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def number_existing_complaints(apps, schema_editor):
+    """Existing complaints, hot and archived, enter the feed in id order; the sequence continues after them."""
+    db = schema_editor.connection.alias
+    last = 0
+    for name in ('Complaint', 'ArchivedComplaint'):
+        complaints = apps.get_model('myapp', name).objects.using(db)
+        complaints.update(change_seq=F('id'))
+        last = max(last, complaints.aggregate(n=Max('id'))['n'] or 0)
+    apps.get_model('myapp', 'Checkpoint').objects.using(db).update_or_create(
+        name='complaint-changes', defaults={'last_id': last},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0024_update_timeline_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplaintTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('change_seq', models.BigIntegerField(unique=True)),
+                ('complaint_id', models.BigIntegerField()),
+                ('department_id', models.BigIntegerField(blank=True, null=True)),
+                ('citizen_id', models.BigIntegerField(blank=True, null=True)),
+                ('reason', models.CharField(choices=[('deleted', 'Deleted'), ('archived', 'Archived'), ('reassigned', 'Reassigned')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='change_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='archivedcomplaint',
+            name='change_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(number_existing_complaints, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['change_seq'], name='complaint_change_seq'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['department', 'change_seq'], name='complaint_department_change'),
+        ),
+        migrations.AddIndex(
+            model_name='complainttombstone',
+            index=models.Index(fields=['department_id', 'change_seq'], name='tombstone_department_change'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:50
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def date_existing_resolutions(apps, schema_editor):
+    """Resolved complaints get the date the rollups already count them on: the last "resolved" update, else updated_at."""
+    db = schema_editor.connection.alias
+    for name, update_name in (('Complaint', 'ComplaintUpdate'), ('ArchivedComplaint', 'ArchivedComplaintUpdate')):
+        last_resolved = (
+            apps.get_model('myapp', update_name).objects.using(db)
+            .filter(complaint_id=OuterRef('pk'), new_status='resolved').order_by('-created_at').values('created_at')[:1]
+        )
+        apps.get_model('myapp', name).objects.using(db).filter(status='resolved').update(
+            resolved_at=Coalesce(Subquery(last_resolved), 'updated_at'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0026_complaint_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcomplaint',
+            name='resolved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='complaint',
+            name='resolved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(date_existing_resolutions, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,30 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.db import models, transaction
+from django.db.models.functions import Lower
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 
 # -------------------------------
 # ✅ 1️⃣ Custom User Model
 # -------------------------------
+class CustomUserManager(UserManager):
+    """
+    Emails are case-insensitive: they are stored lower-cased and looked up
+    through Lower(email), which the unique_user_email_ci index serves.
+    """
+    @classmethod
+    def normalize_email(cls, email):
+        return (email or '').strip().lower()
+
+    def filter_email(self, email):
+        return self.alias(email_lower=Lower('email')).filter(email_lower=self.normalize_email(email))
+
+    def get_by_natural_key(self, email):
+        # Used by ModelBackend, so login (JWT included) matches any casing
+        return self.filter_email(email).get()
+
+
 class CustomUser(AbstractUser):
     ROLE_CHOICES = (
         ('citizen', 'Citizen'),
@@ -20,6 +39,17 @@ class CustomUser(AbstractUser):
     USERNAME_FIELD = 'email'   # Use email as login field
     REQUIRED_FIELDS = ['username']  # username still exists but is secondary
 
+    objects = CustomUserManager()
+
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            models.UniqueConstraint(Lower('email'), name='unique_user_email_ci'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.email = CustomUserManager.normalize_email(self.email)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.email
 
@@ -67,6 +97,78 @@ class Complaint(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # SLA deadline while the complaint waits in pending/assigned (myapp/sla.py), else null
+    due_at = models.DateTimeField(null=True, blank=True)
+    escalation_level = models.PositiveSmallIntegerField(default=0)  # Times the SLA engine escalated it
+    # When it last became resolved, while it is; the day its rollup `resolved` count is on
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    # Position in the change feed (myapp/changes.py): set from one global sequence on every write
+    change_seq = models.BigIntegerField(default=0)
+    # From the client, else geocoded from `location` (myapp/geo.py); geohash is derived from them
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    geohash = models.CharField(max_length=12, blank=True, default='')
+
+    class Meta:
+        indexes = [
+            # The SLA scan reads only the (status, due_at) range between its high-water mark and now
+            models.Index(fields=['status', 'due_at'], name='complaint_status_due'),
+            # The change feed reads everything after a cursor, overall or for one department
+            models.Index(fields=['change_seq'], name='complaint_change_seq'),
+            models.Index(fields=['department', 'change_seq'], name='complaint_department_change'),
+            # Radius queries and heatmap tiles read geohash prefixes as index ranges
+            models.Index(fields=['geohash'], name='complaint_geohash'),
+        ]
+
+    def save(self, *args, **kwargs):
+        from . import geo
+        from .changes import next_seq, record_removed  # these import this module
+        from .rollups import ROLLUP_FIELDS, record_complaint
+        from .sla import SLA_STATUSES, due_at_for
+
+        if self.status not in SLA_STATUSES:
+            self.due_at = None
+        elif self.due_at is None:
+            self.due_at = due_at_for(self.category, self.priority, self.created_at)
+        if self.status != 'resolved':
+            self.resolved_at = None
+        elif self.resolved_at is None:
+            self.resolved_at = timezone.now()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {
+                *kwargs['update_fields'], 'change_seq', 'latitude', 'longitude', 'geohash', 'resolved_at',
+            }
+        if self.latitude is None or self.longitude is None:
+            # Geocode before the transaction takes the write lock; only new or moved complaints
+            stored = None if self._state.adding else (
+                Complaint.objects.filter(pk=self.pk).values_list('location', flat=True).first()
+            )
+            if stored != self.location:
+                geo.place(self)
+        # The daily rollups, change feed and map change in the same transaction as the complaint
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = Complaint.objects.filter(pk=self.pk).values(*ROLLUP_FIELDS, *geo.MAP_FIELDS).first()
+            geo.place(self, lookup=False)
+            self.change_seq = next_seq()
+            super().save(*args, **kwargs)
+            record_complaint(previous, self)
+            geo.record_complaint(previous, self)
+            if previous and previous['department_id'] and previous['department_id'] != self.department_id:
+                # The old department's feed drops it
+                record_removed([{'id': self.pk, 'department_id': previous['department_id']}], 'reassigned')
+
+    def delete(self, *args, **kwargs):
+        from . import geo
+        from .changes import record_removed
+        from .rollups import record_deleted
+
+        with transaction.atomic():
+            record_deleted(self)
+            record_removed([{'id': self.pk, 'department_id': self.department_id, 'citizen_id': self.citizen_id}])
+            geo.invalidate([{'geohash': self.geohash, 'category': self.category, 'department_id': self.department_id}])
+            return super().delete(*args, **kwargs)
 
     def __str__(self):
         return f"{self.title} ({self.citizen.email})"
@@ -83,6 +185,10 @@ class ComplaintUpdate(models.Model):
 
     class Meta:
         ordering = ['-created_at'] # Show newest updates first
+        indexes = [
+            # A complaint's timeline in order: the timeline endpoint and the KPI pass (myapp/kpis.py)
+            models.Index(fields=['complaint', 'created_at'], name='update_complaint_created'),
+        ]
 
     def __str__(self):
         return f"Update for {self.complaint.title} at {self.created_at}"
@@ -105,6 +211,18 @@ class Feedback(models.Model):
     comment = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        from .rollups import record_feedback  # rollups imports this module
+
+        from .changes import stamp
+
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                record_feedback(self)
+            stamp([self.complaint_id])  # The complaint's serialized form includes its feedback
+
     def __str__(self):
         return f"Feedback for {self.complaint.title} ({self.rating} stars)"
 # backend/myproject/myapp/models.py
@@ -121,7 +239,10 @@ class Notification(models.Model):
     )
     message = models.TextField()
     read = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set by myapp.notify: the latest coalesced event, or a future digest boundary
+    created_at = models.DateTimeField(default=timezone.now)
+    event = models.CharField(max_length=32, blank=True, default='')  # e.g. 'status_changed'
+    count = models.PositiveIntegerField(default=1)  # Events coalesced into this row
     # Optional: Link to the complaint
     complaint = models.ForeignKey(
         Complaint, 
@@ -133,6 +254,9 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at'] # Show newest first
+        indexes = [
+            models.Index(fields=['recipient', '-created_at'], name='notification_recipient_feed'),
+        ]
 
     def __str__(self):
         return f"Notification for {self.recipient.email}: {self.message[:20]}..."
@@ -141,4 +265,359 @@ class ComplaintImage(models.Model):
     image = models.ImageField(upload_to='complaint_images/')
 
     def __str__(self):
-        return f"Image for complaint {self.complaint.id}"
\ No newline at end of file
+        return f"Image for complaint {self.complaint.id}"
+
+# -------------------------------
+# ✅ 5️⃣ Slow Query Log
+# -------------------------------
+class SlowQuery(models.Model):
+    """
+    One row per (normalized SQL, view) that went over SLOW_QUERY_THRESHOLD_MS.
+    Written by SlowQueryMiddleware after the response, never during the query.
+    """
+    fingerprint = models.CharField(max_length=40)  # sha1 of the normalized SQL
+    view = models.CharField(max_length=255)
+    sql = models.TextField()
+    plan = models.TextField(blank=True)
+    full_scan = models.BooleanField(default=False)  # Plan reads a whole table without an index
+    count = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    last_ms = models.FloatField(default=0)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-total_ms']
+        constraints = [
+            models.UniqueConstraint(fields=['fingerprint', 'view'], name='unique_slow_query_per_view'),
+        ]
+
+    def __str__(self):
+        return f"{self.view}: {self.sql[:60]}... ({self.count}x, max {self.max_ms:.0f} ms)"
+
+
+# -------------------------------
+# ✅ 6️⃣ Idempotency Keys
+# -------------------------------
+class IdempotencyKeyQuerySet(models.QuerySet):
+    def live(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client's Idempotency-Key and the response its request produced, so a
+    retried POST replays the response instead of writing again (myapp/idempotency.py).
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    request_fingerprint = models.CharField(max_length=64)  # sha256 of method, path and payload
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    status_code = models.PositiveSmallIntegerField()
+    response_body = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = IdempotencyKeyQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_idempotency_key_per_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.method} {self.path} [{self.key}] -> {self.status_code}"
+
+
+# -------------------------------
+# ✅ 7️⃣ Broadcast Notifications
+# -------------------------------
+class BroadcastNotification(models.Model):
+    """
+    One row per event for every user with the `audience` role (e.g. all
+    admins), instead of a Notification copy per recipient. Who has read it is
+    tracked by each user's NotificationReadMarker, not per row.
+    """
+    audience = models.CharField(max_length=20, choices=CustomUser.ROLE_CHOICES)
+    message = models.TextField()
+    complaint = models.ForeignKey(
+        Complaint,
+        on_delete=models.CASCADE,
+        related_name='broadcast_notifications',
+        null=True,
+        blank=True
+    )
+    # The user whose action raised the event doesn't need to hear about it
+    excluded_user = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, related_name='+', null=True, blank=True
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    event = models.CharField(max_length=32, blank=True, default='')
+    count = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['audience', '-created_at'], name='broadcast_audience_feed'),
+        ]
+
+    def __str__(self):
+        return f"Broadcast to {self.audience}: {self.message[:20]}..."
+
+
+class NotificationReadMarkerManager(models.Manager):
+    def mark_read(self, user):
+        """Moves the user's watermark to now: a single-row UPDATE (INSERT the first time)."""
+        now = timezone.now()
+        if not self.filter(user=user).update(read_until=now):
+            self.bulk_create([self.model(user=user, read_until=now)], ignore_conflicts=True)
+
+
+class NotificationReadMarker(models.Model):
+    """Per-user read watermark: broadcasts created up to `read_until` count as read."""
+    user = models.OneToOneField(
+        CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='notification_read_marker'
+    )
+    read_until = models.DateTimeField()
+
+    objects = NotificationReadMarkerManager()
+
+    def __str__(self):
+        return f"{self.user.email} read until {self.read_until}"
+
+
+def notification_feed(user):
+    """
+    The user's direct notifications and the broadcasts to their role, newest
+    first, in one UNION ALL query. Rows are dicts with the NotificationSerializer
+    fields plus `kind` ('direct' or 'broadcast'), since ids overlap between the two.
+    Rows held back for a later digest (created_at in the future) are left out.
+    """
+    now = timezone.now()
+    read_until = NotificationReadMarker.objects.filter(user=user).values('read_until')[:1]
+    direct = (
+        Notification.objects.filter(recipient=user, created_at__lte=now)
+        .annotate(kind=models.Value('direct'))
+        .values('id', 'message', 'read', 'created_at', 'complaint_id', 'count', 'kind')
+        .order_by()
+    )
+    broadcast = (
+        # Like per-recipient rows, users only see events from after they joined
+        BroadcastNotification.objects.filter(audience=user.role, created_at__gte=user.date_joined, created_at__lte=now)
+        .exclude(excluded_user=user)
+        .annotate(
+            read=models.Case(
+                models.When(created_at__lte=models.Subquery(read_until), then=models.Value(True)),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            ),
+            kind=models.Value('broadcast'),
+        )
+        .values('id', 'message', 'read', 'created_at', 'complaint_id', 'count', 'kind')
+        .order_by()
+    )
+    return direct.union(broadcast, all=True).order_by('-created_at', '-id')
+
+
+# -------------------------------
+# ✅ 8️⃣ Checkpoints
+# -------------------------------
+class Checkpoint(models.Model):
+    """
+    Where an incremental job got to, e.g. the SLA scan's high-water mark
+    (the last due_at and id it processed), so each run starts from there.
+    """
+    name = models.CharField(max_length=64, primary_key=True)
+    position = models.DateTimeField(null=True, blank=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position} / {self.last_id}"
+
+
+# -------------------------------
+# ✅ 9️⃣ Archive Tables
+# -------------------------------
+# Rows moved out of the hot tables by `manage.py apply_retention` (myapp/retention.py).
+# Same columns and ids as the originals; foreign keys are plain ids, since what they
+# pointed at may itself be archived or deleted later.
+class ArchivedNotification(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    recipient_id = models.BigIntegerField(db_index=True)
+    message = models.TextField()
+    read = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    event = models.CharField(max_length=32, blank=True, default='')
+    count = models.PositiveIntegerField(default=1)
+    complaint_id = models.BigIntegerField(null=True, blank=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+
+class ArchivedBroadcastNotification(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    audience = models.CharField(max_length=20)
+    message = models.TextField()
+    complaint_id = models.BigIntegerField(null=True, blank=True)
+    excluded_user_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    event = models.CharField(max_length=32, blank=True, default='')
+    count = models.PositiveIntegerField(default=1)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+
+class ArchivedComplaintUpdate(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    complaint_id = models.BigIntegerField()
+    user_id = models.BigIntegerField(null=True, blank=True)
+    message = models.TextField()
+    new_status = models.CharField(max_length=20)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['complaint_id', 'created_at'], name='archived_update_timeline'),
+        ]
+
+
+class ArchivedComplaint(models.Model):
+    """
+    A resolved complaint moved out of the hot table by `manage.py archive_complaints`
+    (myapp/archive.py), with its feedback and image rows. Detail, timeline and
+    search requests fall back to these; the active-work views never read them.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    citizen = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='archived_complaints')
+    department = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, related_name='+', null=True, blank=True)
+    title = models.CharField(max_length=255)
+    category = models.CharField(max_length=50, choices=Complaint.CATEGORY_CHOICES)
+    description = models.TextField()
+    location = models.CharField(max_length=255)
+    priority = models.CharField(max_length=20, choices=Complaint.PRIORITY_CHOICES)
+    status = models.CharField(max_length=20, choices=Complaint.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+    # Its last change_seq; citizens' change feeds still list their archived complaints
+    change_seq = models.BigIntegerField(default=0)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default='')
+
+    def to_complaint(self):
+        """
+        An unsaved Complaint with its relations filled in from the archive, so
+        ComplaintSerializer renders it exactly like a hot one. Expects feedback
+        selected and images prefetched (see archive.archived_complaints()).
+        """
+        # Columns added to Complaint after archiving started (e.g. due_at) keep their defaults
+        complaint = Complaint(**{
+            field.attname: getattr(self, field.attname)
+            for field in Complaint._meta.concrete_fields if hasattr(self, field.attname)
+        })
+        complaint.citizen = self.citizen
+        complaint.department = self.department
+        feedback = getattr(self, 'feedback', None)
+        Complaint._meta.get_field('feedback').set_cached_value(complaint, feedback and Feedback(**{
+            field.attname: getattr(feedback, field.attname) for field in Feedback._meta.concrete_fields
+        }))
+        complaint._prefetched_objects_cache = {'images': [
+            ComplaintImage(id=image.id, complaint_id=image.complaint_id, image=image.image)
+            for image in self.images.all()
+        ]}
+        return complaint
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+
+class ArchivedFeedback(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    complaint = models.OneToOneField(ArchivedComplaint, on_delete=models.CASCADE, related_name='feedback')
+    citizen = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+    rating = models.PositiveSmallIntegerField()
+    comment = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+
+class ArchivedComplaintImage(models.Model):
+    # The image files stay where they are; only the rows move
+    id = models.BigIntegerField(primary_key=True)
+    complaint = models.ForeignKey(ArchivedComplaint, on_delete=models.CASCADE, related_name='images')
+    image = models.ImageField(upload_to='complaint_images/')
+    archived_at = models.DateTimeField(default=timezone.now)
+
+
+# -------------------------------
+# ✅ 🔟 Daily Rollups
+# -------------------------------
+class DailyComplaintRollup(models.Model):
+    """
+    Per-day complaint counters for the dashboards (myapp/rollups.py), kept
+    current by Complaint.save() and Feedback.save() and rebuilt from the raw
+    rows by `manage.py rebuild_rollups`.
+
+    `created` counts the complaints raised on `day` under their *current*
+    category, department and status, so a complaint's count moves between
+    rows as it changes. `resolved` counts the complaints resolved now whose
+    resolved_at falls on `day`, and the rating columns the feedback given on
+    `day`; they move with their complaint the same way.
+    """
+    day = models.DateField()
+    category = models.CharField(max_length=50)
+    # 0 when unassigned: a plain id, so NULL can't split the unique key and rows outlive the user
+    department_id = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20)
+    created = models.IntegerField(default=0)
+    resolved = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)  # avg rating = rating_sum / rating_count
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'category', 'department_id', 'status'], name='rollup_day_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.category}/{self.department_id}/{self.status}: {self.created} created"
+
+
+# -------------------------------
+# ✅ 1️⃣1️⃣ Change Feed Tombstones
+# -------------------------------
+class ComplaintTombstone(models.Model):
+    """
+    A complaint that left some client's list (myapp/changes.py): deleted,
+    moved to the archive, or reassigned away from `department_id`. Takes a
+    number from the same sequence as Complaint.change_seq, so the change
+    feed returns removals and changes in one ordered stream.
+    """
+    REASON_CHOICES = [
+        ('deleted', 'Deleted'),
+        ('archived', 'Archived'),
+        ('reassigned', 'Reassigned'),
+    ]
+
+    change_seq = models.BigIntegerField(unique=True)
+    complaint_id = models.BigIntegerField()
+    # Whose lists it left: plain ids, as the users may be gone by the time clients sync
+    department_id = models.BigIntegerField(null=True, blank=True)
+    citizen_id = models.BigIntegerField(null=True, blank=True)
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['department_id', 'change_seq'], name='tombstone_department_change'),
+        ]
+
+    def __str__(self):
+        return f"#{self.complaint_id} {self.reason} @ {self.change_seq}"
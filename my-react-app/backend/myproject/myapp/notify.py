@@ -0,0 +1,79 @@
+# myapp/notify.py
+"""
+Writing notifications, with coalescing and an optional digest mode.
+
+Views call notify() for one recipient and broadcast() for a whole role. A
+notification of the same event about the same complaint for the same
+recipient (or audience) as one written within NOTIFICATION_COALESCE_WINDOW
+updates that row instead of inserting another one: the text becomes the
+latest, `count` goes up, and the row moves back to the top of the feed as
+unread. A busy complaint therefore costs one UPDATE per event instead of a
+new row per event.
+
+With NOTIFICATION_DIGEST_INTERVAL set, new rows are dated at the next
+interval boundary and the feed hides them until then, so everything that
+happens on a complaint before the boundary lands in that one pending row
+and is delivered together.
+
+Both return the number of rows inserted (0 or 1), which is what the
+notification fan-out metrics count.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, Subquery
+from django.utils import timezone
+
+from . import metrics
+from .models import BroadcastNotification, Notification
+
+
+def coalesce_window():
+    return getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', None)
+
+
+def digest_interval():
+    return getattr(settings, 'NOTIFICATION_DIGEST_INTERVAL', None)
+
+
+def delivery_time(now):
+    """When a notification raised at `now` shows up: now, or the next digest boundary."""
+    interval = digest_interval()
+    if not interval:
+        return now
+    step = interval.total_seconds()
+    return datetime.fromtimestamp(math.ceil(now.timestamp() / step) * step, tz=dt_timezone.utc)
+
+
+def _write(model, key, message, event):
+    now = timezone.now()
+    if digest_interval():
+        # Merge into the row still waiting for its digest boundary; it keeps that date
+        pending = model.objects.filter(**key, event=event, created_at__gt=now)
+        changes = {}
+    elif coalesce_window():
+        pending = model.objects.filter(**key, event=event, created_at__gte=now - coalesce_window())
+        changes = {'created_at': now, **({'read': False} if model is Notification else {})}
+    else:
+        pending = None
+
+    if pending is not None:
+        latest = pending.order_by('-created_at').values('pk')[:1]
+        if model.objects.filter(pk__in=Subquery(latest)).update(message=message, count=F('count') + 1, **changes):
+            metrics.record_coalesced(event)
+            return 0
+
+    model.objects.create(**key, event=event, message=message, created_at=delivery_time(now))
+    return 1
+
+
+def notify(recipient, message, complaint=None, event=''):
+    """Notifies one user; returns the number of rows inserted."""
+    return _write(Notification, {'recipient': recipient, 'complaint': complaint}, message, event)
+
+
+def broadcast(audience, message, complaint=None, event='', excluded_user=None):
+    """Notifies every user with the `audience` role (except excluded_user) with one row."""
+    key = {'audience': audience, 'complaint': complaint, 'excluded_user': excluded_user}
+    return _write(BroadcastNotification, key, message, event)
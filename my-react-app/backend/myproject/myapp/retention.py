@@ -0,0 +1,157 @@
+# myapp/retention.py
+"""
+Retention for the tables that only ever grow.
+
+Each policy picks the rows of one hot table that are old enough to leave it,
+e.g. read notifications older than 90 days, and moves them out in batches:
+into the matching Archived* table ('table'), into a gzipped JSONL file under
+RETENTION_ARCHIVE_DIR ('jsonl'), or nowhere ('delete'). Settings override
+the defaults below per policy:
+
+    RETENTION_POLICIES = {'read_notifications': {'DAYS': 30, 'ARCHIVE': 'jsonl'}}
+
+Every batch copies and deletes its rows in one short transaction, so the
+SQLite write lock is only held for one batch at a time and an interrupted
+run loses nothing: run it again and it carries on with what is left. A
+crash between writing a JSONL batch and committing its delete can leave
+those rows in the file twice; they keep their ids, so readers can dedupe.
+"""
+import gzip
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .db import retry_on_db_lock
+from .models import (
+    ArchivedBroadcastNotification, ArchivedComplaintUpdate, ArchivedNotification,
+    BroadcastNotification, ComplaintUpdate, Notification,
+)
+
+DEFAULT_POLICIES = {
+    'read_notifications': {'DAYS': 90, 'ARCHIVE': 'table'},
+    'broadcasts': {'DAYS': 180, 'ARCHIVE': 'table'},
+    # Off by default: these rows are the complaint timeline users see. Only whole
+    # timelines move, of resolved complaints with no update since the cutoff
+    'complaint_updates': {'DAYS': None, 'ARCHIVE': 'table'},
+}
+ARCHIVE_MODES = ('table', 'jsonl', 'delete')
+
+
+class Policy:
+    def __init__(self, name, model, archive_model, eligible):
+        self.name = name
+        self.model = model
+        self.archive_model = archive_model
+        self.eligible = eligible  # (queryset, cutoff) -> queryset of rows to move
+
+    def config(self):
+        return {**DEFAULT_POLICIES[self.name], **getattr(settings, 'RETENTION_POLICIES', {}).get(self.name, {})}
+
+    def fields(self):
+        return [field.attname for field in self.model._meta.concrete_fields]
+
+    def candidates(self, cutoff):
+        return self.eligible(self.model.objects.all(), cutoff)
+
+
+POLICIES = {
+    policy.name: policy for policy in (
+        Policy('read_notifications', Notification, ArchivedNotification,
+               lambda qs, cutoff: qs.filter(read=True, created_at__lt=cutoff)),
+        Policy('broadcasts', BroadcastNotification, ArchivedBroadcastNotification,
+               lambda qs, cutoff: qs.filter(created_at__lt=cutoff)),
+        Policy('complaint_updates', ComplaintUpdate, ArchivedComplaintUpdate,
+               lambda qs, cutoff: qs.filter(complaint__status='resolved').exclude(
+                   complaint__in=ComplaintUpdate.objects.filter(created_at__gte=cutoff).values('complaint_id'))),
+    )
+}
+
+
+class JsonlArchive:
+    """One gzipped JSONL file per policy and run, flushed after every batch."""
+
+    def __init__(self, policy):
+        directory = Path(getattr(settings, 'RETENTION_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'archive'))
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f"{policy.name}-{timezone.now():%Y%m%dT%H%M%S}.jsonl.gz"
+        self.file = None
+
+    def write(self, rows):
+        if self.file is None:
+            self.file = gzip.open(self.path, 'at', encoding='utf-8')
+        self.file.writelines(json.dumps(row, default=str) + '\n' for row in rows)
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def copy_rows(rows, archive_model):
+    """Inserts rows (dicts of a hot model's column values) into its archive table."""
+    # ignore_conflicts: rows archived by an earlier run that died before deleting them
+    archive_model.objects.bulk_create([archive_model(**row) for row in rows], ignore_conflicts=True)
+
+
+@retry_on_db_lock
+def move_batch(policy, cutoff, after_id, batch_size, archive, jsonl=None):
+    """Moves the next batch of rows with id > after_id; returns (last id moved, rows moved)."""
+    rows = list(
+        policy.candidates(cutoff).filter(pk__gt=after_id).order_by('pk').values(*policy.fields())[:batch_size]
+    )
+    if not rows:
+        return after_id, 0
+    if archive == 'table':
+        copy_rows(rows, policy.archive_model)
+    elif archive == 'jsonl':
+        jsonl.write(rows)
+    policy.model.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+    return rows[-1]['id'], len(rows)
+
+
+def apply_policy(policy, batch_size=1000, pause=0.0, deadline=None, dry_run=False):
+    """Runs one policy until nothing is left or time.monotonic() passes deadline; returns stats."""
+    config = policy.config()
+    if config['DAYS'] is None:
+        return {'skipped': 'disabled'}
+    if config['ARCHIVE'] not in ARCHIVE_MODES:
+        raise ValueError(f"RETENTION_POLICIES['{policy.name}']['ARCHIVE'] must be one of {ARCHIVE_MODES}")
+
+    cutoff = timezone.now() - timedelta(days=config['DAYS'])
+    stats = {'archive': config['ARCHIVE'], 'cutoff': cutoff.isoformat()}
+    if dry_run:
+        return {**stats, 'eligible': policy.candidates(cutoff).count()}
+
+    jsonl = JsonlArchive(policy) if config['ARCHIVE'] == 'jsonl' else None
+    moved = batches = 0
+    after_id, complete = 0, False
+    started = time.monotonic()
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            after_id, count = move_batch(policy, cutoff, after_id, batch_size, config['ARCHIVE'], jsonl)
+            if not count:
+                complete = True
+                break
+            moved += count
+            batches += 1
+            if pause:
+                time.sleep(pause)
+    finally:
+        if jsonl:
+            jsonl.close()
+
+    seconds = time.monotonic() - started
+    stats.update({
+        'moved': moved,
+        'batches': batches,
+        'seconds': round(seconds, 3),
+        'rows_per_sec': round(moved / seconds, 1) if seconds else None,
+        'complete': complete,
+    })
+    if jsonl and moved:
+        stats['file'] = str(jsonl.path)
+    return stats
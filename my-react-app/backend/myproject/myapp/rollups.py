@@ -0,0 +1,279 @@
+# myapp/rollups.py
+"""
+Daily rollups behind the dashboard charts and department reports.
+
+DailyComplaintRollup holds one row per (day, category, department, status)
+with created/resolved/rating counters. Every counter follows one rule,
+applied the same way by the incremental path and by rebuild():
+
+- created: on the complaint's created_at day, under its current category,
+  department and status;
+- resolved: complaints resolved now, on their resolved_at day (the last
+  time they became resolved) under their current category and department;
+- ratings: on the feedback's day, under the complaint's current category,
+  department and status.
+
+Complaint.save(), Complaint.delete() and Feedback.save() call
+record_complaint() / record_deleted() / record_feedback(), which move the
+complaint's counts from the rows it was in to the rows it is in now, as
+INSERT ... ON CONFLICT DO UPDATE SET n = n + excluded.n upserts inside the
+same transaction. Bulk writers (bulk_create, import_complaints) call
+record_bulk() for their batch. Writes that skip these hooks, such as
+queryset.update() or .delete(), leave the counters behind until
+`manage.py rebuild_rollups` recomputes everything from the hot and
+archived tables (run it once after migrating, and after seed_data).
+
+Archiving and retention only move rows, so they leave the rollups alone:
+the charts keep counting complaints that have left myapp_complaint.
+
+timeseries() answers the dashboards from these rows: a year of daily rows
+is a few thousand at most, whatever the number of complaints.
+"""
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from django.db import connections, router
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek, TruncYear
+from django.utils import timezone
+
+from .db import retry_on_db_lock
+from .models import ArchivedComplaint, ArchivedFeedback, Complaint, DailyComplaintRollup, Feedback
+
+KEY_FIELDS = ('day', 'category', 'department_id', 'status')
+COUNTERS = ('created', 'resolved', 'rating_count', 'rating_sum')
+# What Complaint.save() reads back to see which rows the complaint was counted in
+ROLLUP_FIELDS = ('created_at', 'category', 'department_id', 'status', 'resolved_at')
+
+BUCKETS = {'day': None, 'week': TruncWeek, 'month': TruncMonth, 'year': TruncYear, 'all': None}
+GROUPS = {'category': 'category', 'department': 'department_id', 'status': 'status'}
+
+
+def rollup_key(when, category, department_id, status):
+    """The row a change on `when` (a datetime, or already a day) is counted in."""
+    day = timezone.localdate(when) if isinstance(when, datetime) else when
+    return (day, category, department_id or 0, status)
+
+
+def _complaint_key(values):
+    return rollup_key(values['created_at'], values['category'], values['department_id'], values['status'])
+
+
+def _resolved_key(values):
+    if values['status'] != 'resolved' or values['resolved_at'] is None:
+        return None
+    return rollup_key(values['resolved_at'], values['category'], values['department_id'], 'resolved')
+
+
+def _rating_key(when, values):
+    return rollup_key(when, values['category'], values['department_id'], values['status'])
+
+
+def _counts(values, feedback=None):
+    """{key: Counter} of everything a complaint (its ROLLUP_FIELDS) and its feedback row count for."""
+    counts = defaultdict(Counter)
+    counts[_complaint_key(values)]['created'] += 1
+    if _resolved_key(values):
+        counts[_resolved_key(values)]['resolved'] += 1
+    if feedback:
+        counts[_rating_key(feedback['created_at'], values)].update(rating_count=1, rating_sum=feedback['rating'])
+    return counts
+
+
+def _feedback(complaint_id):
+    return Feedback.objects.filter(complaint_id=complaint_id).values('created_at', 'rating').first()
+
+
+def _values(complaint):
+    return {name: getattr(complaint, name) for name in ROLLUP_FIELDS}
+
+
+def _upsert_sql(connection):
+    quote = connection.ops.quote_name
+    keys = ', '.join(quote(name) for name in KEY_FIELDS)
+    return (
+        f"INSERT INTO {quote(DailyComplaintRollup._meta.db_table)} "
+        f"({keys}, {', '.join(quote(name) for name in COUNTERS)}) "
+        f"VALUES ({', '.join(['%s'] * (len(KEY_FIELDS) + len(COUNTERS)))}) "
+        f"ON CONFLICT ({keys}) DO UPDATE SET "
+        + ', '.join(f"{quote(name)} = {quote(DailyComplaintRollup._meta.db_table)}.{quote(name)} + excluded.{quote(name)}"
+                    for name in COUNTERS)
+    )
+
+
+def _bump(key, counts):
+    # Without ON CONFLICT: UPDATE, else INSERT, else someone inserted it first and we UPDATE after all
+    lookup = dict(zip(KEY_FIELDS, key))
+    changes = {name: F(name) + n for name, n in counts.items() if n}
+    if DailyComplaintRollup.objects.filter(**lookup).update(**changes):
+        return
+    _, created = DailyComplaintRollup.objects.get_or_create(**lookup, defaults=counts)
+    if not created:
+        DailyComplaintRollup.objects.filter(**lookup).update(**changes)
+
+
+def apply(deltas):
+    """Adds {key: Counter(counter=n)} to the rollup rows, creating the rows that don't exist yet."""
+    deltas = {key: counts for key, counts in deltas.items() if any(counts.values())}
+    if not deltas:
+        return
+    connection = connections[router.db_for_write(DailyComplaintRollup)]
+    if not connection.features.supports_update_conflicts_with_target:
+        for key, counts in deltas.items():
+            _bump(key, counts)
+        return
+    # One statement for the whole batch, whether or not the rows exist yet
+    params = [
+        (connection.ops.adapt_datefield_value(key[0]), *key[1:], *(counts.get(name, 0) for name in COUNTERS))
+        for key, counts in deltas.items()
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(_upsert_sql(connection), params)
+
+
+def record_complaint(previous, complaint):
+    """
+    Moves the complaint's counts from the rows it was in (`previous`: its
+    ROLLUP_FIELDS before this save, None for a new complaint) to the rows it
+    belongs in now. Its feedback is only read when a key field changed.
+    """
+    current = _values(complaint)
+    if previous is None:
+        apply(_counts(current))
+        return
+    if previous == current:
+        return
+    feedback = _feedback(complaint.pk)
+    deltas = _counts(current, feedback)
+    for key, counts in _counts(previous, feedback).items():
+        deltas[key].subtract(counts)
+    apply(deltas)
+
+
+def record_deleted(complaint):
+    """Takes a complaint about to be deleted, with its feedback, out of the counters."""
+    previous = Complaint.objects.filter(pk=complaint.pk).values(*ROLLUP_FIELDS).first()
+    if previous is None:
+        return
+    deltas = defaultdict(Counter)
+    for key, counts in _counts(previous, _feedback(complaint.pk)).items():
+        deltas[key].subtract(counts)
+    apply(deltas)
+
+
+def record_feedback(feedback):
+    key = _rating_key(feedback.created_at, _values(feedback.complaint))
+    apply({key: Counter(rating_count=1, rating_sum=feedback.rating)})
+
+
+def record_bulk(complaints, feedback=()):
+    """The rollup changes for a batch of new complaints and their feedback rows written with bulk_create()."""
+    by_id = {complaint.pk: complaint for complaint in complaints}
+    deltas = defaultdict(Counter)
+    for complaint in complaints:
+        for key, counts in _counts(_values(complaint)).items():
+            deltas[key].update(counts)
+    for row in feedback:
+        deltas[_rating_key(row.created_at, _values(by_id[row.complaint_id]))].update(
+            rating_count=1, rating_sum=row.rating,
+        )
+    apply(deltas)
+
+
+# -------------------------------
+# Rebuilding from the raw rows
+# -------------------------------
+def _history():
+    """Every counter, aggregated in SQL from the hot and archived tables."""
+    deltas = defaultdict(Counter)
+    for complaints, feedback in (
+        (Complaint.objects, Feedback.objects),
+        (ArchivedComplaint.objects, ArchivedFeedback.objects),
+    ):
+        rows = (
+            complaints.annotate(day=TruncDate('created_at'))
+            .values('day', 'category', 'department_id', 'status')
+            .annotate(n=Count('pk')).order_by()
+        )
+        for row in rows:
+            deltas[rollup_key(row['day'], row['category'], row['department_id'], row['status'])]['created'] += row['n']
+
+        rows = (
+            complaints.filter(status='resolved', resolved_at__isnull=False).annotate(day=TruncDate('resolved_at'))
+            .values('day', 'category', 'department_id')
+            .annotate(n=Count('pk')).order_by()
+        )
+        for row in rows:
+            deltas[rollup_key(row['day'], row['category'], row['department_id'], 'resolved')]['resolved'] += row['n']
+
+        rows = (
+            feedback.annotate(day=TruncDate('created_at'))
+            .values('day', category=F('complaint__category'), department=F('complaint__department_id'),
+                    complaint_status=F('complaint__status'))
+            .annotate(n=Count('pk'), total=Sum('rating')).order_by()
+        )
+        for row in rows:
+            key = rollup_key(row['day'], row['category'], row['department'], row['complaint_status'])
+            deltas[key].update(rating_count=row['n'], rating_sum=row['total'])
+    return deltas
+
+
+@retry_on_db_lock
+def _rebuild():
+    # Read and replace in one transaction so no save() lands in between
+    deltas = _history()
+    rows = [
+        DailyComplaintRollup(**dict(zip(KEY_FIELDS, key)), **{name: counts[name] for name in COUNTERS})
+        for key, counts in deltas.items()
+    ]
+    DailyComplaintRollup.objects.all().delete()
+    DailyComplaintRollup.objects.bulk_create(rows, batch_size=1000)
+    return rows
+
+
+def rebuild():
+    """Recomputes every rollup row from the raw tables; returns stats for the report."""
+    started = time.monotonic()
+    rows = _rebuild()
+    return {
+        'rows': len(rows),
+        'complaints': sum(row.created for row in rows),
+        'seconds': round(time.monotonic() - started, 3),
+    }
+
+
+# -------------------------------
+# Reading
+# -------------------------------
+def timeseries(bucket='month', group=(), start=None, end=None, **filters):
+    """
+    Counters summed per `bucket` (day/week/month/year, or 'all' for one
+    total) and per each dimension in `group` (category/department/status),
+    over days from `start` to `end` inclusive. `filters` narrow by category,
+    department_id or status. Rows are dicts, oldest period first.
+    """
+    queryset = DailyComplaintRollup.objects.exclude(created=0, resolved=0, rating_count=0)
+    if start:
+        queryset = queryset.filter(day__gte=start)
+    if end:
+        queryset = queryset.filter(day__lte=end)
+    queryset = queryset.filter(**{name: value for name, value in filters.items() if value is not None})
+
+    fields = [GROUPS[name] for name in group]
+    if bucket != 'all':
+        truncate = BUCKETS[bucket]
+        queryset = queryset.annotate(period=truncate('day') if truncate else F('day'))
+        fields.insert(0, 'period')
+    totals = {name: Sum(name) for name in COUNTERS}
+    if fields:
+        rows = queryset.values(*fields).annotate(**totals).order_by(*fields)
+    else:
+        rows = [{name: n or 0 for name, n in queryset.aggregate(**totals).items()}]
+    return [
+        {
+            **row,
+            'avg_rating': round(row['rating_sum'] / row['rating_count'], 2) if row['rating_count'] else None,
+        }
+        for row in rows
+    ]
@@ -0,0 +1,160 @@
+# myapp/routers.py
+"""
+Primary/replica database routing.
+
+Writes always go to 'default'. Reads go to one of DATABASE_REPLICAS only
+while a replica-enabled view (ReplicaReadMixin / @replica_reads) is
+handling the request, and only if the user has not written anything in
+the last REPLICA_STICKY_SECONDS (read-your-writes). Stickiness is kept in
+the Django cache, so multi-process deployments need a shared cache backend.
+
+Code without a request (streamed response bodies, management commands)
+routes its reads with read_from() / pinned_reads() instead.
+"""
+import contextlib
+import contextvars
+import functools
+import random
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+
+PRIMARY = 'default'
+STICKY_KEY = 'db-sticky:{}'
+
+_replica_request = contextvars.ContextVar('replica_request', default=None)
+# Set while the router itself is looking at request.user, so any query that
+# triggers (e.g. loading a session user) goes to the primary instead of recursing
+_resolving = contextvars.ContextVar('replica_resolving', default=False)
+# Set by read_from(): every read goes to this alias, request or not
+_pinned = contextvars.ContextVar('replica_pinned', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in getattr(settings, 'DATABASE_REPLICAS', []) if alias in settings.DATABASES]
+
+
+def mark_sticky(user_id):
+    """Pins the user's reads to the primary for REPLICA_STICKY_SECONDS."""
+    cache.set(STICKY_KEY.format(user_id), True, getattr(settings, 'REPLICA_STICKY_SECONDS', 5))
+
+
+def is_sticky(user_id):
+    return bool(cache.get(STICKY_KEY.format(user_id)))
+
+
+def pick_replica():
+    """A replica for work that has no user to be sticky for, else the primary."""
+    replicas = replica_aliases()
+    return random.choice(replicas) if replicas else PRIMARY
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        pinned = _pinned.get()
+        if pinned is not None:
+            return pinned
+        request = _replica_request.get()
+        if request is None or _resolving.get():
+            return None
+        alias = getattr(request, '_replica_alias', None)
+        if alias is not None:
+            return alias
+        replicas = replica_aliases()
+        if not replicas:
+            return None
+
+        token = _resolving.set(True)
+        try:
+            user = getattr(request, 'user', None)
+            if user is None or not user.is_authenticated:
+                # Authentication itself (and anonymous traffic) stays on the primary;
+                # decide again once DRF has put the JWT user on the request
+                return PRIMARY
+            alias = PRIMARY if is_sticky(user.pk) else random.choice(replicas)
+        finally:
+            _resolving.reset(token)
+        # One decision per request so a response never mixes replicas
+        request._replica_alias = alias
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas normally get their schema by replication; allowing it keeps local SQLite copies usable
+        return True
+
+
+class ReplicaReadMixin:
+    """Routes a view's reads to a replica (subject to read-your-writes stickiness)."""
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _replica_request.set(request)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _replica_request.reset(token)
+
+
+def replica_reads(view_func):
+    """Function-view version of ReplicaReadMixin; works for sync and async views."""
+    if iscoroutinefunction(view_func):
+        @functools.wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            token = _replica_request.set(request)
+            try:
+                return await view_func(request, *args, **kwargs)
+            finally:
+                _replica_request.reset(token)
+        return async_wrapper
+
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        token = _replica_request.set(request)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _replica_request.reset(token)
+    return wrapper
+
+
+def pin_database(queryset):
+    """
+    Fixes the alias the router picks right now onto the queryset. Needed for
+    streamed responses, whose queries run after the view (and its routing
+    context) has returned; iterate their rows with pinned_reads() too.
+    """
+    return queryset.using(queryset.db)
+
+
+@contextlib.contextmanager
+def read_from(alias):
+    """Routes every read inside the block to `alias`."""
+    token = _pinned.set(alias)
+    try:
+        yield alias
+    finally:
+        _pinned.reset(token)
+
+
+def pinned_reads(rows, alias):
+    """
+    Iterates `rows` with every read routed to `alias`, so the queries a
+    streamed body runs while producing a row (prefetches, lazy relations,
+    serializer lookups) go to the same database as the pinned queryset.
+    The alias is only in force inside each step, never between them.
+    """
+    rows = iter(rows)
+    while True:
+        with read_from(alias):
+            try:
+                row = next(rows)
+            except StopIteration:
+                return
+        yield row
@@ -3,7 +3,7 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 # ✅ 1. Import Notification model
-from .models import CustomUser, Complaint,ComplaintUpdate,Feedback, Notification,ComplaintImage
+from .models import CustomUser, Complaint,ComplaintUpdate,Feedback, Notification,ComplaintImage, SlowQuery
 from django.contrib.auth import authenticate
 
 User = get_user_model()
@@ -22,10 +22,10 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         }
 
     def validate_email(self, value):
-        # Check if email is already in use
-        if User.objects.filter(email__iexact=value).exists():
+        # Check if email is already in use (case-insensitive, served by the Lower(email) index)
+        if User.objects.filter_email(value).exists():
             raise serializers.ValidationError("A user with this email already exists.")
-        return value
+        return User.objects.normalize_email(value)
 
     def validate(self, attrs):
         # Check if passwords match
@@ -95,6 +95,20 @@ class NotificationSerializer(serializers.ModelSerializer):
 # --- END NEW SERIALIZER ---
 
 
+class NotificationFeedSerializer(serializers.Serializer):
+    """
+    Rows of models.notification_feed(): NotificationSerializer's fields plus
+    `kind`, because direct and broadcast notifications have separate ids.
+    """
+    id = serializers.IntegerField(read_only=True)
+    kind = serializers.CharField(read_only=True)
+    message = serializers.CharField(read_only=True)
+    read = serializers.BooleanField(read_only=True)
+    created_at = serializers.DateTimeField(read_only=True)
+    complaint_id = serializers.IntegerField(read_only=True, allow_null=True)
+    count = serializers.IntegerField(read_only=True)  # Events coalesced into this notification
+
+
 # 1. Main Serializer (Used for GET requests - Listing/Retrieving)
 class ComplaintSerializer(serializers.ModelSerializer):
     citizen_name = serializers.CharField(source='citizen.username', read_only=True)
@@ -112,13 +126,16 @@ class ComplaintSerializer(serializers.ModelSerializer):
             'department', # <-- Make sure this is here
             'department_name',
             'feedback',
-            'images'
-
+            'images',
+            'due_at', 'escalation_level',
+            'change_seq',
+            'latitude', 'longitude',
         ]
         # We REMOVE 'status' from read_only_fields here
         read_only_fields = [
             'id', 'citizen_name', 'citizen_email', 
-            'created_at', 'updated_at', 'citizen', 'department','department_name','feedback'
+            'created_at', 'updated_at', 'citizen', 'department','department_name','feedback',
+            'due_at', 'escalation_level', 'change_seq', 'latitude', 'longitude',
         ]
 
 # 2. NEW Serializer (Used for POST requests - Creating)
@@ -127,10 +144,16 @@ class ComplaintCreateSerializer(serializers.ModelSerializer):
         model = Complaint
         fields = [
             'title', 'category', 'description', 
-             'location', 'priority'
+             'location', 'priority',
+             'latitude', 'longitude',  # Optional, e.g. from the device; else geocoded from location
         ]
         # 'status' and 'citizen' are handled automatically by the model and view
 
+    def validate(self, data):
+        if (data.get('latitude') is None) != (data.get('longitude') is None):
+            raise serializers.ValidationError("Send both latitude and longitude, or neither.")
+        return data
+
 # 3. NEW Serializer (Used for PATCH requests - Updating)
 class ComplaintUpdateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -168,10 +191,27 @@ class UserProfileSerializer(serializers.ModelSerializer):
         model = CustomUser
         # 'phone' is ignored by the serializer as it's not in your CustomUser model
         fields = ('name', 'email')
+
+    def validate_email(self, value):
+        if User.objects.filter_email(value).exclude(pk=self.instance.pk).exists():
+            raise serializers.ValidationError("A user with this email already exists.")
+        return User.objects.normalize_email(value)
+
 class FeedbackSerializer(serializers.ModelSerializer):
     class Meta:
         model = Feedback
         fields = ['id', 'complaint', 'citizen', 'rating', 'comment', 'created_at']
         # We only need to write 'rating' and 'comment'.
         # The view will handle 'citizen' and 'complaint'.
-        read_only_fields = ['id', 'complaint', 'citizen', 'created_at']
\ No newline at end of file
+        read_only_fields = ['id', 'complaint', 'citizen', 'created_at']
+
+class SlowQuerySerializer(serializers.ModelSerializer):
+    avg_ms = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SlowQuery
+        fields = ['id', 'view', 'sql', 'plan', 'full_scan', 'count', 'avg_ms', 'max_ms',
+                  'total_ms', 'last_ms', 'first_seen', 'last_seen']
+
+    def get_avg_ms(self, obj):
+        return round(obj.total_ms / obj.count, 3) if obj.count else None
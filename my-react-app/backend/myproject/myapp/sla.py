@@ -0,0 +1,166 @@
+# myapp/sla.py
+"""
+SLA targets and the escalation scan for complaints waiting in pending or
+assigned.
+
+Complaint.save() stamps `due_at` (created_at + the target for the
+complaint's category and priority) while the status is pending/assigned and
+clears it otherwise. `manage.py escalate_overdue` then runs tick(): it reads
+only the complaints whose due_at falls between the scan's high-water mark
+(a Checkpoint row) and now, through the (status, due_at) index, so a tick
+costs the same with 1M open complaints as with 100.
+
+A breach bumps the priority one level and gives the complaint a new
+deadline under the tighter target; a breach at high priority notifies the
+admins instead. Both are written per batch: one UPDATE per (priority,
+category) group plus bulk inserts for the timeline entries and broadcasts.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .changes import stamp
+from .db import retry_on_db_lock
+from .models import BroadcastNotification, Checkpoint, Complaint, ComplaintUpdate
+
+SLA_STATUSES = ('pending', 'assigned')
+NEXT_PRIORITY = {'low': 'medium', 'medium': 'high'}
+CHECKPOINT = 'sla-scan'
+# Each tick re-reads this much before the previous one's end, for rows committed just after it read
+SCAN_OVERLAP = timedelta(seconds=5)
+
+DEFAULT_SLA = {
+    'TARGETS': {'high': timedelta(hours=24), 'medium': timedelta(days=3), 'low': timedelta(days=7)},
+    'CATEGORY_TARGETS': {},  # e.g. {'water-supply': {'high': timedelta(hours=12)}}
+    'BATCH_SIZE': 1000,
+}
+
+
+def sla_settings():
+    return {**DEFAULT_SLA, **getattr(settings, 'COMPLAINT_SLA', {})}
+
+
+def target(category, priority):
+    config = sla_settings()
+    # Complaint.priority defaults to 'Medium', so compare case-insensitively
+    priority = (priority or 'medium').lower()
+    return (
+        config['CATEGORY_TARGETS'].get(category, {}).get(priority)
+        or config['TARGETS'].get(priority)
+        or config['TARGETS']['medium']
+    )
+
+
+def due_at_for(category, priority, start=None):
+    """The deadline for a complaint raised at `start`, never earlier than now."""
+    now = timezone.now()
+    # Not before now: a deadline behind the scan's high-water mark would never be seen
+    return max((start or now) + target(category, priority), now)
+
+
+def initial_due_at(category, priority, status, start=None):
+    """What Complaint.save() would set, for rows written with bulk_create()."""
+    return due_at_for(category, priority, start) if status in SLA_STATUSES else None
+
+
+def overdue(now, position=None, last_id=0):
+    """Open complaints due by `now` that the scan hasn't passed yet, in scan order."""
+    queryset = Complaint.objects.filter(status__in=SLA_STATUSES, due_at__lte=now)
+    if position is not None:
+        # due_at__gte alone bounds the index range; the OR only settles ties at `position`
+        queryset = queryset.filter(due_at__gte=position).filter(Q(due_at__gt=position) | Q(pk__gt=last_id))
+    return queryset.order_by('due_at', 'pk')
+
+
+def escalate(rows, now):
+    """Escalates a batch of overdue complaints (dicts from overdue().values()) with batched writes."""
+    groups = defaultdict(list)
+    timeline, alerts = [], []
+    for row in rows:
+        new_priority = NEXT_PRIORITY.get((row['priority'] or '').lower())
+        if new_priority:
+            message = f"Response time target missed: priority raised to {new_priority}."
+        else:
+            new_priority = 'high'
+            message = "Response time target missed at high priority: admins notified."
+            alerts.append(BroadcastNotification(
+                audience='admin',
+                message=f"Complaint #{row['id']} ('{row['title'][:30]}') is past its response time target.",
+                complaint_id=row['id'],
+                event='sla_breached',
+                created_at=now,
+            ))
+        groups[(new_priority, row['category'])].append(row['id'])
+        timeline.append(ComplaintUpdate(complaint_id=row['id'], message=message, new_status=row['status']))
+
+    for (priority, category), ids in groups.items():
+        Complaint.objects.filter(pk__in=ids).update(
+            priority=priority,
+            due_at=now + target(category, priority),
+            escalation_level=F('escalation_level') + 1,
+            updated_at=timezone.now(),  # update() skips auto_now; snapshots read changes by it
+        )
+    stamp(row['id'] for row in rows)
+    ComplaintUpdate.objects.bulk_create(timeline)
+    BroadcastNotification.objects.bulk_create(alerts)
+    return len(alerts)
+
+
+@retry_on_db_lock
+def scan_batch(now, batch_size):
+    """Escalates the next batch past the checkpoint and moves the checkpoint; returns (found, alerts)."""
+    checkpoint, _ = Checkpoint.objects.get_or_create(name=CHECKPOINT)
+    rows = list(
+        overdue(now, checkpoint.position, checkpoint.last_id)
+        .values('id', 'due_at', 'priority', 'category', 'status', 'title')[:batch_size]
+    )
+    alerts = escalate(rows, now) if rows else 0
+    if len(rows) == batch_size:
+        checkpoint.position, checkpoint.last_id = rows[-1]['due_at'], rows[-1]['id']
+    else:
+        # Everything due by now is done; start the next tick just before now
+        floor = now - SCAN_OVERLAP
+        if checkpoint.position is None or floor > checkpoint.position:
+            checkpoint.position, checkpoint.last_id = floor, 0
+    checkpoint.save()
+    return len(rows), alerts
+
+
+def tick(now=None, batch_size=None):
+    """One pass of the escalation scan; returns counts for the report."""
+    now = now or timezone.now()
+    batch_size = batch_size or sla_settings()['BATCH_SIZE']
+    breaches = alerts = batches = 0
+    while True:
+        found, notified = scan_batch(now, batch_size)
+        breaches += found
+        alerts += notified
+        batches += 1
+        if found < batch_size:
+            return {'breaches': breaches, 'admin_alerts': alerts, 'batches': batches}
+
+
+def backfill(batch_size=1000):
+    """
+    Sets due_at on open complaints that have none (rows bulk-inserted before
+    the SLA engine existed) and rewinds the checkpoint so the next tick sees
+    those that are already overdue. Returns the number of rows updated.
+    """
+    missing = Complaint.objects.filter(status__in=SLA_STATUSES, due_at__isnull=True)
+    total = 0
+    for category, priority in missing.values_list('category', 'priority').distinct().order_by():
+        group = missing.filter(category=category, priority=priority)
+        while True:
+            ids = list(group.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            # Deliberately not clamped to now: overdue rows keep their real deadline
+            update = Complaint.objects.filter(pk__in=ids).update
+            total += retry_on_db_lock(update)(due_at=F('created_at') + target(category, priority))
+    if total:
+        Checkpoint.objects.filter(name=CHECKPOINT).delete()
+    return total
+
@@ -0,0 +1,128 @@
+# myapp/slow_queries.py
+"""
+Slow-query log: normalizes slow SQL, captures its query plan once and keeps
+per-(query, view) aggregates in the SlowQuery table.
+"""
+import hashlib
+import logging
+import re
+import time
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*%s\s*,?)+\)', re.IGNORECASE)
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+# Plans that read a whole table without an index
+_FULL_SCAN = {
+    'sqlite': re.compile(r'^\s*(?:[|`-]+\s*)?SCAN (?!.*\bUSING\b)', re.MULTILINE),
+    'postgresql': re.compile(r'Seq Scan'),
+    'mysql': re.compile(r"\bALL\b"),
+}
+
+
+def normalize_sql(sql):
+    """Collapses literals and IN-lists so the same query shape always groups together."""
+    sql = _STRING.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+class SlowQueryCollector:
+    """
+    execute_wrapper callable that remembers every query slower than the threshold.
+    Nothing is written from inside the wrapper; call flush() once the response is ready.
+    """
+    def __init__(self, threshold_ms):
+        self.threshold_ms = threshold_ms
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms >= self.threshold_ms:
+            self.slow.append((sql, None if many else params, elapsed_ms, context['connection'].alias))
+        return result
+
+    def flush(self, view):
+        for sql, params, elapsed_ms, using in self.slow:
+            try:
+                record_slow_query(sql, params, elapsed_ms, view, using=using)
+            except DatabaseError:
+                logger.exception("Could not record slow query")
+        self.slow = []
+
+
+def explain(sql, params, using=DEFAULT_DB_ALIAS):
+    """
+    Returns (plan text, full_scan) for a SELECT, or ('', False) if it can't
+    be explained. Run it on the alias the query ran on: a replica may differ.
+    """
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return '', False
+    connection = connections[using]
+    vendor = connection.vendor
+    prefix = 'EXPLAIN QUERY PLAN ' if vendor == 'sqlite' else 'EXPLAIN '
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except DatabaseError:
+        return '', False
+
+    if vendor == 'sqlite':
+        # Rows are (id, parent, notused, detail)
+        plan = '\n'.join(str(row[-1]) for row in rows)
+    else:
+        plan = '\n'.join(' | '.join(str(col) for col in row) for row in rows)
+    pattern = _FULL_SCAN.get(vendor)
+    return plan, bool(pattern and pattern.search(plan))
+
+
+def record_slow_query(sql, params, elapsed_ms, view, using=DEFAULT_DB_ALIAS):
+    normalized = normalize_sql(sql)
+    key = fingerprint(normalized)
+
+    updated = SlowQuery.objects.filter(fingerprint=key, view=view).update(
+        count=F('count') + 1,
+        total_ms=F('total_ms') + elapsed_ms,
+        max_ms=Greatest(F('max_ms'), elapsed_ms),
+        last_ms=elapsed_ms,
+        last_seen=timezone.now(),
+    )
+    if updated:
+        return
+
+    # First sighting for this view: reuse a plan captured for another view if we have one
+    existing = SlowQuery.objects.filter(fingerprint=key).exclude(plan='').values('plan', 'full_scan').first()
+    if existing:
+        plan, full_scan = existing['plan'], existing['full_scan']
+    else:
+        plan, full_scan = explain(sql, params, using)
+
+    _, created = SlowQuery.objects.get_or_create(
+        fingerprint=key, view=view,
+        defaults={
+            'sql': normalized, 'plan': plan, 'full_scan': full_scan,
+            'count': 1, 'total_ms': elapsed_ms, 'max_ms': elapsed_ms, 'last_ms': elapsed_ms,
+        },
+    )
+    if not created:
+        # Another worker inserted it between our update and get_or_create
+        record_slow_query(sql, params, elapsed_ms, view, using)
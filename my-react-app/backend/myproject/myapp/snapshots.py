@@ -0,0 +1,216 @@
+# myapp/snapshots.py
+"""
+Columnar snapshot of complaints, complaint updates and feedback for
+analytics (myapp/reporting.py), so heavy reports never query SQLite.
+
+Each table is written to ANALYTICS_SNAPSHOT_DIR/<table>/<YYYY-MM>.arrow,
+one Arrow IPC file per month of created_at. Readers memory-map the files,
+so loading a year of complaints is close to free and only the months a
+report asks for are touched. Archived rows are included.
+
+`manage.py snapshot_analytics` keeps the files current incrementally:
+
+- complaints: the rows changed since the last run (by updated_at, with a
+  short overlap), which replace their old versions in their month;
+- updates and feedback, which are never edited: the rows past the last
+  id exported.
+
+Only the months that received rows are rewritten, each to a temporary
+file and then renamed over the old one, so readers always see a whole
+file. Rows deleted from the database stay in the snapshot until the next
+--full run. Needs pyarrow (imported only when used, as for exports).
+"""
+import json
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from .db import raw_rows
+from .models import (
+    ArchivedComplaint, ArchivedComplaintUpdate, ArchivedFeedback, Checkpoint, Complaint, ComplaintUpdate, Feedback,
+)
+
+CHUNK_SIZE = 50000
+# Changes committed just after a run read its rows are picked up by the next one
+CHANGE_OVERLAP = timedelta(minutes=1)
+MANIFEST = 'manifest.json'
+
+# name -> (hot model, archive model, [(column, arrow type name)], mutable)
+TABLES = {
+    'complaints': (Complaint, ArchivedComplaint, [
+        ('id', 'int64'), ('category', 'string'), ('status', 'string'), ('priority', 'string'),
+        ('department_id', 'int64'), ('citizen_id', 'int64'), ('location', 'string'),
+        ('created_at', 'timestamp'), ('updated_at', 'timestamp'),
+    ], True),
+    'updates': (ComplaintUpdate, ArchivedComplaintUpdate, [
+        ('id', 'int64'), ('complaint_id', 'int64'), ('new_status', 'string'), ('created_at', 'timestamp'),
+    ], False),
+    'feedback': (Feedback, ArchivedFeedback, [
+        ('id', 'int64'), ('complaint_id', 'int64'), ('rating', 'int64'), ('created_at', 'timestamp'),
+    ], False),
+}
+
+
+class SnapshotUnavailable(Exception):
+    """Raised when pyarrow is missing or no snapshot has been taken yet."""
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        raise SnapshotUnavailable("Analytics snapshots require pyarrow to be installed.")
+    return pa, pc
+
+
+def snapshot_dir():
+    return Path(getattr(settings, 'ANALYTICS_SNAPSHOT_DIR', Path(settings.BASE_DIR) / 'snapshots'))
+
+
+def schema(name):
+    pa, _ = _pyarrow()
+    types = {'int64': pa.int64(), 'string': pa.string(), 'timestamp': pa.timestamp('us', tz='UTC')}
+    return pa.schema([pa.field(column, types[kind]) for column, kind in TABLES[name][2]])
+
+
+def _to_table(rows, table_schema):
+    """Raw driver rows -> Arrow table; ISO timestamp strings (SQLite) are parsed in bulk."""
+    pa, _ = _pyarrow()
+    columns = list(zip(*rows)) if rows else [()] * len(table_schema)
+    arrays = []
+    for values, field in zip(columns, table_schema):
+        if pa.types.is_timestamp(field.type):
+            array = pa.array(values)
+            if not pa.types.is_timestamp(array.type):
+                array = array.cast(pa.timestamp('us'))
+            arrays.append(array.cast(field.type))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=table_schema)
+
+
+def _by_month(table):
+    """Splits a table into {'YYYY-MM': rows created that month}."""
+    _, pc = _pyarrow()
+    created = table['created_at']
+    keys = pc.add(pc.multiply(pc.year(created), 100), pc.month(created))
+    return {
+        f"{key // 100:04d}-{key % 100:02d}": table.filter(pc.equal(keys, key))
+        for key in pc.unique(keys).to_pylist()
+    }
+
+
+def read_file(path):
+    """A month file, memory-mapped: the table's buffers point into the page cache."""
+    pa, _ = _pyarrow()
+    with pa.memory_map(str(path)) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def _write_file(path, table):
+    pa, _ = _pyarrow()
+    tmp = path.with_name(path.name + '.tmp')
+    with pa.OSFile(str(tmp), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def _merge_month(path, new, mutable):
+    pa, pc = _pyarrow()
+    if path.exists():
+        existing = read_file(path)
+        # New versions of changed complaints replace the old ones (created_at, and so the
+        # month, never changes); append-only tables just grow
+        if mutable:
+            existing = existing.filter(pc.invert(pc.is_in(existing['id'], value_set=new['id'])))
+        new = pa.concat_tables([existing, new])
+    return new.sort_by('id')
+
+
+def _changed_rows(name, full):
+    """The querysets to export for a table, and the checkpoint position to record afterwards."""
+    hot, archived, columns, mutable = TABLES[name]
+    fields = [column for column, _ in columns]
+    checkpoint, _ = Checkpoint.objects.get_or_create(name=f'snapshot:{name}')
+    if full:
+        querysets = [hot.objects.all(), archived.objects.all()]
+    elif mutable:
+        since = checkpoint.position - CHANGE_OVERLAP if checkpoint.position else None
+        querysets = [hot.objects.filter(updated_at__gte=since) if since else hot.objects.all()]
+        if since is None:
+            querysets.append(archived.objects.all())
+    else:
+        querysets = [hot.objects.filter(pk__gt=checkpoint.last_id)]
+        if not checkpoint.last_id:
+            querysets.append(archived.objects.all())
+    return [queryset.order_by('pk').values_list(*fields) for queryset in querysets], checkpoint
+
+
+def export_table(name, full=False):
+    """Brings one table's month files up to date; returns stats for the report."""
+    pa, _ = _pyarrow()
+    hot, archived, _, mutable = TABLES[name]
+    directory = snapshot_dir() / name
+    directory.mkdir(parents=True, exist_ok=True)
+    table_schema = schema(name)
+    started_at = timezone.now()
+    last_id = max(
+        hot.objects.aggregate(n=Max('pk'))['n'] or 0, archived.objects.aggregate(n=Max('pk'))['n'] or 0,
+    )
+    querysets, checkpoint = _changed_rows(name, full)
+
+    months, exported = {}, 0
+    for queryset in querysets:
+        rows = raw_rows(queryset, CHUNK_SIZE)
+        while True:
+            chunk = [row for _, row in zip(range(CHUNK_SIZE), rows)]
+            if not chunk:
+                break
+            exported += len(chunk)
+            for month, part in _by_month(_to_table(chunk, table_schema)).items():
+                months.setdefault(month, []).append(part)
+
+    if full:
+        for path in directory.glob('*.arrow'):
+            if path.stem not in months:
+                path.unlink()
+    for month, parts in sorted(months.items()):
+        new = pa.concat_tables(parts)
+        path = directory / f"{month}.arrow"
+        _write_file(path, new.sort_by('id') if full else _merge_month(path, new, mutable))
+
+    # Updates and feedback: rows above last_id were inserted after the read started
+    checkpoint.position, checkpoint.last_id = started_at, last_id
+    checkpoint.save()
+    return {'rows': exported, 'months_written': sorted(months)}
+
+
+def take_snapshot(full=False):
+    """Exports every table and writes the manifest; returns stats for the report."""
+    started = time.monotonic()
+    stats = {name: export_table(name, full=full) for name in TABLES}
+    manifest = {
+        'snapshot_at': timezone.now().isoformat(),
+        'tables': {name: sorted(path.stem for path in (snapshot_dir() / name).glob('*.arrow')) for name in TABLES},
+    }
+    _write_json(snapshot_dir() / MANIFEST, manifest)
+    return {**stats, 'seconds': round(time.monotonic() - started, 3)}
+
+
+def _write_json(path, data):
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(json.dumps(data, indent=2))
+    os.replace(tmp, path)
+
+
+def read_manifest():
+    path = snapshot_dir() / MANIFEST
+    if not path.exists():
+        raise SnapshotUnavailable("No analytics snapshot yet; run `manage.py snapshot_analytics`.")
+    return json.loads(path.read_text())
@@ -0,0 +1,102 @@
+# myapp/streaming.py
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .routers import pin_database, pinned_reads
+
+# How many rows the database cursor hands us at a time
+STREAM_CHUNK_SIZE = 500
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+def get_stream_format(request):
+    """
+    Returns 'json', 'ndjson' or None depending on whether the client asked
+    for a streamed response (?stream=1, ?stream=ndjson or an NDJSON Accept header).
+    """
+    stream = request.query_params.get('stream', '').lower()
+    if stream == 'ndjson' or NDJSON_CONTENT_TYPE in request.headers.get('Accept', ''):
+        return 'ndjson'
+    if stream in ('1', 'true', 'json'):
+        return 'json'
+    return None
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Lets content negotiation accept an NDJSON Accept header. Streamed rows
+    bypass it; it only renders the non-streamed responses (errors) as one line.
+    """
+    media_type = NDJSON_CONTENT_TYPE
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data) + b'\n'
+
+
+def _iter_rows(queryset, serializer_class, context, chunk_size):
+    # iterator() keeps Django from caching the whole result set on the queryset;
+    # passing chunk_size lets prefetch_related still work per chunk.
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        yield serializer_class(obj, context=context).data
+
+
+def _json_array(rows, encoder):
+    yield '['
+    first = True
+    for row in rows:
+        if not first:
+            yield ','
+        yield encoder.encode(row)
+        first = False
+    yield ']'
+
+
+def _ndjson(rows, encoder):
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+def streaming_response(queryset, serializer_class, stream_format, context=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Serializes the queryset one row at a time and streams it to the client,
+    so memory stays flat no matter how many rows match.
+    """
+    encoder = JSONEncoder(ensure_ascii=False)
+    rows = pinned_reads(_iter_rows(queryset, serializer_class, context or {}, chunk_size), queryset.db)
+
+    if stream_format == 'ndjson':
+        response = StreamingHttpResponse(_ndjson(rows, encoder), content_type=NDJSON_CONTENT_TYPE)
+    else:
+        response = StreamingHttpResponse(_json_array(rows, encoder), content_type='application/json')
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the whole body
+    return response
+
+
+class StreamingListMixin:
+    """
+    Adds an opt-in streaming mode to a ListAPIView.
+    Normal requests still go through the regular paginated/serialized list().
+    """
+    stream_chunk_size = STREAM_CHUNK_SIZE
+
+    def get_renderers(self):
+        # Without it DRF answers an NDJSON Accept header with 406 before list() runs
+        return super().get_renderers() + [NDJSONRenderer()]
+
+    def list(self, request, *args, **kwargs):
+        stream_format = get_stream_format(request)
+        if stream_format is None:
+            return super().list(request, *args, **kwargs)
+
+        # The rows are read after list() returns, so fix the database alias now
+        queryset = pin_database(self.filter_queryset(self.get_queryset()))
+        return streaming_response(
+            queryset,
+            self.get_serializer_class(),
+            stream_format,
+            context=self.get_serializer_context(),
+            chunk_size=self.stream_chunk_size,
+        )
@@ -0,0 +1,191 @@
+# myapp/throttling.py
+"""
+Token-bucket throttles for the write and auth endpoints.
+
+Budgets live in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] under
+'<scope>.ip' and '<scope>.user', where the view sets `throttle_scope`:
+
+    'complaint-create.user': '30/hour',                       # capacity 30, refills 30 per hour
+    'token.ip': {'rate': '20/min', 'burst': 40},             # refills 20/min, bursts up to 40
+
+Buckets live in REST_FRAMEWORK['THROTTLE_BUCKET_STORE']: the in-process
+LocalBucketStore (per worker process) by default, or CacheBucketStore to
+share them across processes through the Django cache (e.g. Redis).
+
+Views that mix in ThrottleFirstMixin check throttles before authentication
+and permissions, so shed requests never reach the database or the password
+hasher. The per-user throttle reads the user id from the JWT without a query.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from . import metrics
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_budget(budget):
+    """'20/min' or {'rate': '20/min', 'burst': 40} -> (capacity, tokens refilled per second)."""
+    if isinstance(budget, dict):
+        rate, burst = budget['rate'], budget.get('burst')
+    else:
+        rate, burst = budget, None
+    count, _, period = rate.partition('/')
+    count = int(count)
+    return (int(burst) if burst else count), count / PERIODS[period.strip()]
+
+
+# -------------------------------
+# Bucket stores
+# -------------------------------
+class LocalBucketStore:
+    """Buckets in this process's memory, least recently used keys evicted past max_keys."""
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_per_sec):
+        """Takes one token; returns 0 if allowed, else the seconds until a token is available."""
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_sec)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / refill_per_sec
+            if not wait:
+                tokens -= 1
+            self.buckets[key] = (tokens, now)
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return wait
+
+
+class CacheBucketStore:
+    """
+    Buckets in the Django cache, shared by every process using it. The
+    read-modify-write is not atomic, so under heavy contention a few extra
+    requests can get through; the limit still holds in aggregate.
+    """
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def consume(self, key, capacity, refill_per_sec):
+        now = time.time()
+        tokens, updated = self.cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + max(0.0, now - updated) * refill_per_sec)
+        wait = 0.0 if tokens >= 1 else (1 - tokens) / refill_per_sec
+        if not wait:
+            tokens -= 1
+        # Expire once the bucket would be full again; a missing key means a full bucket
+        self.cache.set(key, (tokens, now), math.ceil((capacity - tokens) / refill_per_sec) + 1)
+        return wait
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_bucket_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                path = settings.REST_FRAMEWORK.get('THROTTLE_BUCKET_STORE', 'myapp.throttling.LocalBucketStore')
+                _store = import_string(path)()
+    return _store
+
+
+# -------------------------------
+# Throttles
+# -------------------------------
+class TokenBucketThrottle(BaseThrottle):
+    """Base class: subclasses set `kind` and implement get_key()."""
+    kind = None
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        methods = getattr(view, 'throttle_methods', None)
+        if scope is None or (methods is not None and request.method not in methods):
+            return True
+        budget = api_settings.DEFAULT_THROTTLE_RATES.get(f'{scope}.{self.kind}')
+        key = self.get_key(request, view)
+        if budget is None or key is None:
+            return True
+
+        capacity, refill_per_sec = parse_budget(budget)
+        self.retry_after = get_bucket_store().consume(f'throttle:{scope}:{self.kind}:{key}', capacity, refill_per_sec)
+        if self.retry_after:
+            metrics.record_throttled(scope, self.kind)
+            return False
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+    def get_key(self, request, view):
+        raise NotImplementedError
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Per client address (honours NUM_PROXIES like DRF's own throttles)."""
+    kind = 'ip'
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """
+    Per user, identified by the JWT's user id claim (signature checked, no DB
+    lookup). For anonymous endpoints a view can name a request field to key
+    on instead with `throttle_user_field`, e.g. the email on login. That
+    bucket is per client address and field value, so nobody can use up
+    another person's budget (and lock them out) by sending their email.
+    """
+    kind = 'user'
+    jwt = JWTAuthentication()
+
+    def get_key(self, request, view):
+        header = self.jwt.get_header(request)
+        raw_token = self.jwt.get_raw_token(header) if header else None
+        if raw_token is not None:
+            try:
+                return str(self.jwt.get_validated_token(raw_token)[jwt_settings.USER_ID_CLAIM])
+            except (TokenError, InvalidToken, KeyError):
+                return None  # Authentication rejects it right after
+        field = getattr(view, 'throttle_user_field', None)
+        if field:
+            value = request.data.get(field)
+            if isinstance(value, str) and value.strip():
+                return f'{self.get_ident(request)}:{value.strip().lower()}'
+        return None
+
+
+class ThrottleFirstMixin:
+    """
+    Checks throttles before authentication and permissions (DRF checks them
+    last), so requests over budget are shed with 429 + Retry-After before any
+    database or password-hashing work.
+    """
+    throttle_classes = [IPTokenBucketThrottle, UserTokenBucketThrottle]
+
+    def initial(self, request, *args, **kwargs):
+        self.check_throttles(request)
+        self._throttles_checked = True
+        super().initial(request, *args, **kwargs)
+
+    def check_throttles(self, request):
+        if not getattr(self, '_throttles_checked', False):
+            super().check_throttles(request)
@@ -6,8 +6,11 @@ from .views import (
     ComplaintCreateView, MyComplaintsView, ComplaintDetailView, AllComplaintsView,
     DepartmentComplaintsView, ComplaintUpdateView, ComplaintUpdateLogView,
     DepartmentListView, ChangePasswordView, UserProfileView, FeedbackCreateView,
-    NotificationListView, mark_notifications_read
+    NotificationListView, mark_notifications_read, export_report,
+    SlowQueryListView, complaint_analytics, department_kpi_view,
+    analytics_report, complaint_changes, complaints_nearby, complaint_heatmap
 )
+from . import async_views
 
 urlpatterns = [
     path('register/', UserRegistrationView.as_view(), name='user-register'), # ✅ 2. Add new path
@@ -21,10 +24,25 @@ urlpatterns = [
      path('complaints/<int:pk>/', ComplaintDetailView.as_view(), name='complaint-detail'),
      path('complaints/all/', AllComplaintsView.as_view(), name='all-complaints'),
      path('complaints/department/', DepartmentComplaintsView.as_view(), name='department-complaints'),
+     path('complaints/changes/', complaint_changes, name='complaint-changes'),
      path('complaints/update/<int:pk>/', ComplaintUpdateView.as_view(), name='complaint-update'),
      path('complaints/<int:pk>/updates/', ComplaintUpdateLogView.as_view(), name='complaint-updates'),
      path('complaints/<int:pk>/feedback/', FeedbackCreateView.as_view(), name='complaint-feedback'),
      path('departments/', DepartmentListView.as_view(), name='department-list'),
     path('notifications/', NotificationListView.as_view(), name='notification-list'),
     path('notifications/mark-read/', mark_notifications_read, name='notification-mark-read'),
-]
\ No newline at end of file
+    path('exports/<str:dataset>/', export_report, name='export-report'),
+    path('slow-queries/', SlowQueryListView.as_view(), name='slow-query-list'),
+    path('analytics/complaints/', complaint_analytics, name='complaint-analytics'),
+    path('analytics/departments/', department_kpi_view, name='department-kpis'),
+    path('analytics/reports/<str:report>/', analytics_report, name='analytics-report'),
+    path('geo/nearby/', complaints_nearby, name='complaints-nearby'),
+    path('geo/heatmap/', complaint_heatmap, name='complaint-heatmap'),
+    # Async (ASGI) versions of the hot read endpoints, same responses as above
+    path('async/complaints/my/', async_views.my_complaints, name='async-my-complaints'),
+    path('async/complaints/all/', async_views.all_complaints, name='async-all-complaints'),
+    path('async/complaints/department/', async_views.department_complaints, name='async-department-complaints'),
+    path('async/complaints/<int:pk>/', async_views.complaint_detail, name='async-complaint-detail'),
+    path('async/complaints/<int:pk>/updates/', async_views.complaint_updates, name='async-complaint-updates'),
+    path('async/notifications/', async_views.notification_list, name='async-notification-list'),
+]
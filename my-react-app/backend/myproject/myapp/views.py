@@ -2,42 +2,73 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework import status, generics, permissions
+from rest_framework import status, generics, permissions, serializers
+from rest_framework.exceptions import ParseError, PermissionDenied
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+import tempfile
 from .serializers import (
     MyTokenObtainPairSerializer, ComplaintSerializer, 
     ComplaintCreateSerializer, ComplaintUpdateSerializer,ComplaintUpdateLogSerializer,
     DepartmentUserSerializer,ChangePasswordSerializer,UserProfileSerializer,FeedbackSerializer,
-    NotificationSerializer,
+    NotificationFeedSerializer, SlowQuerySerializer,
     UserRegistrationSerializer # ✅ 1. Import new serializer
 )
-from .models import CustomUser, Complaint, ComplaintUpdate, Feedback, Notification,ComplaintImage
+from .models import (
+    CustomUser, Complaint, ComplaintUpdate, Feedback, Notification,ComplaintImage, SlowQuery,
+    NotificationReadMarker, notification_feed,
+)
+from .notify import broadcast, notify
+from .streaming import StreamingListMixin, get_stream_format
+from .archive import archived_complaints, complaint_timeline, find_archived_complaint, merge_archived, wants_archived
+from .filters import filter_complaints
+from .rollups import BUCKETS, GROUPS, timeseries
+from .kpis import department_kpis
+from .changes import changes_since
+from . import geo
+from .reporting import REPORTS, run as run_report
+from .snapshots import SnapshotUnavailable
+from . import metrics
+from .db import RetryingCreateMixin, retry_on_db_lock
+from .routers import ReplicaReadMixin, pin_database, pinned_reads, replica_reads
+from .throttling import ThrottleFirstMixin
+from .idempotency import IdempotentPostMixin
+from .exports import (
+    DATASETS, EXPORT_FORMATS, WRITERS, ExportFormatUnavailable,
+    get_export_queryset, iter_csv, iter_rows
+)
 
 
 User = get_user_model()
 
 
 # ✅ --- NEW REGISTRATION VIEW ---
-class UserRegistrationView(generics.CreateAPIView):
+class UserRegistrationView(ThrottleFirstMixin, generics.CreateAPIView):
     """
     API endpoint for new users to register.
     """
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = [permissions.AllowAny] # Anyone can register
+    throttle_scope = 'register'
 # --- END NEW VIEW ---
 
 
 # -------------------------------
 # ✅ 1️⃣ LOGIN VIEW (JWT Token)
 # -------------------------------
-class MyTokenObtainPairView(TokenObtainPairView):
+class MyTokenObtainPairView(ThrottleFirstMixin, TokenObtainPairView):
     """
     Custom JWT login view — uses email instead of username.
     Returns access/refresh tokens + user info (id, email, username, role)
     """
     serializer_class = MyTokenObtainPairSerializer
+    throttle_scope = 'token'
+    throttle_user_field = 'email'  # Per-account budget (from each address) against password guessing
 
 
 # -------------------------------
@@ -60,7 +91,7 @@ def protected_view(request):
 # -------------------------------
 # ✅ 3️⃣ CREATE COMPLAINT VIEW
 # -------------------------------
-class ComplaintCreateView(generics.CreateAPIView):
+class ComplaintCreateView(ThrottleFirstMixin, IdempotentPostMixin, generics.CreateAPIView):
     """
     API endpoint for citizens to submit new complaints.
     Automatically assigns the logged-in user as the 'citizen'.
@@ -69,38 +100,39 @@ class ComplaintCreateView(generics.CreateAPIView):
     serializer_class = ComplaintCreateSerializer # Used for input validation
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
+    throttle_scope = 'complaint-create'
+
+    def post(self, request, *args, **kwargs):
+        # Geocoding may call a service: do it before the idempotency key's and the
+        # complaint's transactions, which hold the database's write lock
+        self.geocoded = None
+        if request.data.get('latitude') in (None, '') or request.data.get('longitude') in (None, ''):
+            self.geocoded = geo.geocode(request.data.get('location'))
+        return super().post(request, *args, **kwargs)
 
     # ✅ --- THIS IS THE FIX ---
     # Override the default 'create' method to handle files manually
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        
-        # 1. Manually create the Complaint object from validated data
-        complaint = Complaint.objects.create(
-            citizen=request.user,
-            title=serializer.validated_data.get('title'),
-            category=serializer.validated_data.get('category'),
-            description=serializer.validated_data.get('description'),
-            location=serializer.validated_data.get('location'),
-            priority=serializer.validated_data.get('priority'),
-            status='pending'  # Set default status
-        )
-
-        # 2. Handle the file upload from request.FILES
-        images_data = request.FILES.getlist('images')
-        for image_data in images_data:
-            ComplaintImage.objects.create(complaint=complaint, image=image_data)
-
-        # 3. Handle notifications
-        admin_users = User.objects.filter(role='admin')
-        notification_message = f"New complaint submitted: '{complaint.title[:30]}...'"
-        for admin in admin_users:
-            Notification.objects.create(
-                recipient=admin,
-                message=notification_message,
-                complaint=complaint
-            )
+        data = {**serializer.validated_data}
+        if data.get('latitude') is None:
+            data['latitude'], data['longitude'] = getattr(self, 'geocoded', None) or (None, None)
+
+        # 1. Store the uploaded files once, outside the transaction: a retried write
+        # reuses them, and a write that fails for good deletes them
+        image_field = ComplaintImage._meta.get_field('image')
+        images = [
+            image_field.storage.save(image_field.generate_filename(None, upload.name), upload,
+                                     max_length=image_field.max_length)
+            for upload in request.FILES.getlist('images')
+        ]
+        try:
+            complaint = self.save_complaint(request, data, images)
+        except BaseException:
+            for name in images:
+                image_field.storage.delete(name)
+            raise
 
         # 4. Return a success response
         # We serialize the created complaint with the *full* serializer to send it back
@@ -108,18 +140,53 @@ class ComplaintCreateView(generics.CreateAPIView):
         headers = self.get_success_headers(response_serializer.data)
         return Response(response_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    @retry_on_db_lock
+    def save_complaint(self, request, data, images):
+        # 2. Create the Complaint object from validated data, and its images from the stored files
+        complaint = Complaint.objects.create(
+            citizen=request.user,
+            title=data.get('title'),
+            category=data.get('category'),
+            description=data.get('description'),
+            location=data.get('location'),
+            priority=data.get('priority'),
+            latitude=data.get('latitude'),
+            longitude=data.get('longitude'),
+            status='pending'  # Set default status
+        )
+        for name in images:
+            ComplaintImage.objects.create(complaint=complaint, image=name)
+
+        # 3. Handle notifications
+        # One broadcast row reaches every admin, however many there are
+        fanout = broadcast(
+            'admin', f"New complaint submitted: '{complaint.title[:30]}...'",
+            complaint=complaint, event='complaint_created'
+        )
+        metrics.record_fanout('complaint_created', fanout)
+        return complaint
+
 # -------------------------------
 # ✅ 4️⃣ MY COMPLAINTS VIEW
 # -------------------------------
 class MyComplaintsView(generics.ListAPIView):
     """
-    API endpoint for a citizen to view all their submitted complaints.
+    API endpoint for a citizen to view all their submitted complaints,
+    including old ones moved to the archive.
     """
     serializer_class = ComplaintSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Complaint.objects.filter(citizen=self.request.user).order_by('-created_at')
+        queryset = Complaint.objects.filter(citizen=self.request.user).select_related(
+            'citizen', 'department', 'feedback'
+        ).prefetch_related('images').order_by('-created_at')
+        return filter_complaints(queryset, self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
+        archived = filter_complaints(archived_complaints().filter(citizen=request.user), request.query_params)
+        complaints = merge_archived(self.get_queryset(), archived)
+        return Response(self.get_serializer(complaints, many=True).data)
     
 class ComplaintDetailView(generics.RetrieveAPIView):
     """
@@ -136,29 +203,59 @@ class ComplaintDetailView(generics.RetrieveAPIView):
             return Complaint.objects.filter(citizen=user)
         return Complaint.objects.all()
 
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            # Old resolved complaints live in the archive now
+            complaint = find_archived_complaint(self.kwargs['pk'], self.request.user)
+            if complaint is None:
+                raise
+            self.check_object_permissions(self.request, complaint)
+            return complaint
+
 # -------------------------------
 # ✅ 5️⃣ ADMIN ALL COMPLAINTS VIEW
 # -------------------------------
-class AllComplaintsView(generics.ListAPIView):
+class AllComplaintsView(ReplicaReadMixin, StreamingListMixin, generics.ListAPIView):
     """
     API endpoint for admins to view ALL complaints in the system.
+    Pass ?stream=1 (JSON array) or ?stream=ndjson to stream rows instead of
+    building the whole response in memory. Only complaints still in the hot
+    table are listed unless ?archived=1 is passed (not with streaming).
     """
-    queryset = Complaint.objects.all().order_by('-created_at')
+    queryset = Complaint.objects.select_related(
+        'citizen', 'department', 'feedback'
+    ).prefetch_related('images').order_by('-created_at')
     serializer_class = ComplaintSerializer
     permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
 
+    def get_queryset(self):
+        return filter_complaints(super().get_queryset(), self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
+        if not wants_archived(request.query_params) or get_stream_format(request):
+            return super().list(request, *args, **kwargs)
+        archived = filter_complaints(archived_complaints(), request.query_params)
+        complaints = merge_archived(self.get_queryset(), archived)
+        return Response(self.get_serializer(complaints, many=True).data)
+
 # -------------------------------
 # ✅ 6️⃣ DEPARTMENT COMPLAINTS VIEW
 # -------------------------------
-class DepartmentComplaintsView(generics.ListAPIView):
+class DepartmentComplaintsView(ReplicaReadMixin, StreamingListMixin, generics.ListAPIView):
     """
     API endpoint for department users to view complaints assigned to them.
+    Supports the same ?stream= mode as AllComplaintsView.
     """
     serializer_class = ComplaintSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Complaint.objects.filter(department=self.request.user).order_by('-created_at')
+        queryset = Complaint.objects.filter(department=self.request.user).select_related(
+            'citizen', 'department', 'feedback'
+        ).prefetch_related('images').order_by('-created_at')
+        return filter_complaints(queryset, self.request.query_params)
     
 # -------------------------------
 # ✅ 7️⃣ UPDATE COMPLAINT VIEW
@@ -181,6 +278,7 @@ class ComplaintUpdateView(generics.UpdateAPIView):
             return Complaint.objects.filter(department=user) 
         return Complaint.objects.none() 
 
+    @retry_on_db_lock
     def update(self, request, *args, **kwargs):
         complaint = self.get_object()
         old_status = complaint.status
@@ -201,35 +299,25 @@ class ComplaintUpdateView(generics.UpdateAPIView):
             else:
                 citizen_message = f"Your complaint '{complaint.title}' is now '{new_status}'."
 
+            fanout = 0
             if complaint.citizen:
-                Notification.objects.create(
-                    recipient=complaint.citizen,
-                    message=citizen_message,
-                    complaint=complaint
-                )
+                fanout += notify(complaint.citizen, citizen_message, complaint=complaint, event='status_changed')
             # --- End of modified block ---
             
             # Notify Admins
-            admin_message = f"Complaint #{complaint.id} ('{complaint.title}') is now '{new_status}'."
-            admin_users = User.objects.filter(role='admin')
-            for admin in admin_users:
-                if admin != request.user:
-                    Notification.objects.create(
-                        recipient=admin,
-                        message=admin_message,
-                        complaint=complaint
-                    )
+            fanout += broadcast(
+                'admin', f"Complaint #{complaint.id} ('{complaint.title}') is now '{new_status}'.",
+                complaint=complaint, event='status_changed', excluded_user=request.user
+            )
+            metrics.record_fanout('status_changed', fanout)
 
         # --- TRIGGER 2: Check for DEPARTMENT assignment change ---
         if new_department_id and new_department_id != old_department_id:
             try:
                 department_user = User.objects.get(id=new_department_id, role='department')
                 dept_message = f"You have been assigned a new complaint: '{complaint.title}'."
-                Notification.objects.create(
-                    recipient=department_user,
-                    message=dept_message,
-                    complaint=complaint
-                )
+                fanout = notify(department_user, dept_message, complaint=complaint, event='department_assigned')
+                metrics.record_fanout('department_assigned', fanout)
             except User.DoesNotExist:
                 pass 
 
@@ -238,17 +326,24 @@ class ComplaintUpdateView(generics.UpdateAPIView):
 # -------------------------------
 # ✅ 9️⃣ COMPLAINT UPDATE LOG VIEW
 # -------------------------------
-class ComplaintUpdateLogView(generics.ListCreateAPIView):
+class ComplaintUpdateLogView(ThrottleFirstMixin, IdempotentPostMixin, RetryingCreateMixin, generics.ListCreateAPIView):
     """
     API endpoint to list all updates for a complaint, or create a new update.
     """
     queryset = ComplaintUpdate.objects.all()
     serializer_class = ComplaintUpdateLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'complaint-update-log'
+    throttle_methods = ('POST',)  # Reading the timeline is not budgeted
 
     def get_queryset(self):
         return ComplaintUpdate.objects.filter(complaint_id=self.kwargs['pk'])
 
+    def list(self, request, *args, **kwargs):
+        # Archived complaints and retention move timeline entries out of the hot table
+        updates = complaint_timeline(self.get_queryset(), self.kwargs['pk'])
+        return Response(self.get_serializer(updates, many=True).data)
+
     def perform_create(self, serializer):
         complaint = Complaint.objects.get(id=self.kwargs['pk'])
         new_status = self.request.data.get('new_status')
@@ -262,25 +357,18 @@ class ComplaintUpdateLogView(generics.ListCreateAPIView):
 
         # --- TRIGGER 3b: Notify Citizen & Admins of new MESSAGE ---
         if message: # Only notify if there is a message
+            fanout = 0
             # 1. Notify Citizen
             if complaint.citizen and complaint.citizen != self.request.user:
                 notification_message = f"New update on '{complaint.title}': {message[:40]}..."
-                Notification.objects.create(
-                    recipient=complaint.citizen,
-                    message=notification_message,
-                    complaint=complaint
-                )
+                fanout += notify(complaint.citizen, notification_message, complaint=complaint, event='update_message')
 
             # 2. Notify Admins
-            admin_users = User.objects.filter(role='admin')
-            admin_message = f"New message on complaint #{complaint.id}: {message[:40]}..."
-            for admin in admin_users:
-                if admin != self.request.user: 
-                    Notification.objects.create(
-                        recipient=admin,
-                        message=admin_message,
-                        complaint=complaint
-                    )
+            fanout += broadcast(
+                'admin', f"New message on complaint #{complaint.id}: {message[:40]}...",
+                complaint=complaint, event='update_message', excluded_user=self.request.user
+            )
+            metrics.record_fanout('update_message', fanout)
         # --- End of new block ---
 
 # -------------------------------
@@ -342,7 +430,7 @@ class UserProfileView(generics.UpdateAPIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class FeedbackCreateView(generics.CreateAPIView):
+class FeedbackCreateView(IdempotentPostMixin, RetryingCreateMixin, generics.CreateAPIView):
     """
     API endpoint for a citizen to submit feedback for a *resolved* complaint.
     """
@@ -354,7 +442,7 @@ class FeedbackCreateView(generics.CreateAPIView):
             complaint = Complaint.objects.get(id=self.kwargs['pk'])
             
             if complaint.citizen != self.request.user:
-                raise permissions.PermissionDenied("You are not the owner of this complaint.")
+                raise PermissionDenied("You are not the owner of this complaint.")
             
             if complaint.status != 'resolved':
                 raise serializers.ValidationError("Feedback can only be submitted for resolved complaints.")
@@ -364,12 +452,15 @@ class FeedbackCreateView(generics.CreateAPIView):
 
             return super().create(request, *args, **kwargs)
 
-        except permissions.PermissionDenied as e:
+        except PermissionDenied as e:
             return Response({"detail": str(e)}, status=status.HTTP_403_FORBIDDEN)
         except serializers.ValidationError as e:
             return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Complaint.DoesNotExist:
             return Response({"detail": "Complaint not found."}, status=status.HTTP_404_NOT_FOUND)
+        except IntegrityError:
+            # Two concurrent submissions can both pass the hasattr() check above
+            return Response(["Feedback has already been submitted for this complaint."], status=status.HTTP_400_BAD_REQUEST)
 
 
     def perform_create(self, serializer):
@@ -379,28 +470,26 @@ class FeedbackCreateView(generics.CreateAPIView):
         feedback = serializer.save(citizen=self.request.user, complaint=complaint)
 
         # --- ✅ NEW TRIGGER: Notify all admins of new feedback ---
-        admin_users = User.objects.filter(role='admin')
-        notification_message = f"New feedback (rating: {feedback.rating} stars) received for '{complaint.title[:30]}...'"
-        for admin in admin_users:
-            Notification.objects.create(
-                recipient=admin,
-                message=notification_message,
-                complaint=complaint
-            )
+        fanout = broadcast(
+            'admin', f"New feedback (rating: {feedback.rating} stars) received for '{complaint.title[:30]}...'",
+            complaint=complaint, event='feedback_received'
+        )
+        metrics.record_fanout('feedback_received', fanout)
         # --- End of new block ---
 
 # -------------------------------
 # ✅ 10️⃣ NOTIFICATION LIST VIEW
 # -------------------------------
-class NotificationListView(generics.ListAPIView):
+class NotificationListView(ReplicaReadMixin, generics.ListAPIView):
     """
-    API endpoint to get all notifications for the logged-in user.
+    API endpoint to get all notifications for the logged-in user:
+    their own plus the broadcasts to their role, in one query.
     """
-    serializer_class = NotificationSerializer
+    serializer_class = NotificationFeedSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Notification.objects.filter(recipient=self.request.user)
+        return notification_feed(self.request.user)
 
 # -------------------------------
 # ✅ 11️⃣ MARK NOTIFICATIONS AS READ VIEW
@@ -412,7 +501,315 @@ def mark_notifications_read(request):
     API endpoint to mark all unread notifications as read.
     """
     try:
-        Notification.objects.filter(recipient=request.user, read=False).update(read=True)
+        # Rows still waiting for their digest haven't been seen yet
+        unread = Notification.objects.filter(recipient=request.user, read=False, created_at__lte=timezone.now())
+        retry_on_db_lock(unread.update)(read=True)
+        # Broadcasts are read by moving the user's watermark: one row, however many there are
+        retry_on_db_lock(NotificationReadMarker.objects.mark_read)(request.user)
         return Response({"message": "All notifications marked as read."}, status=status.HTTP_200_OK)
     except Exception as e:
-        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+# -------------------------------
+# ✅ 12️⃣ REPORT EXPORT VIEW
+# -------------------------------
+@replica_reads
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_report(request, dataset):
+    """
+    API endpoint to download complaints, updates or feedback as
+    CSV, XLSX or Parquet (?export_format=csv|xlsx|parquet).
+    Accepts the same filters as the complaint list views.
+    Admins export everything; department users only their assigned complaints.
+    """
+    user = request.user
+    if user.is_staff:
+        department = None
+    elif user.role == 'department':
+        department = user
+    else:
+        return Response({"detail": "You do not have permission to export reports."}, status=status.HTTP_403_FORBIDDEN)
+
+    if dataset not in DATASETS:
+        return Response({"detail": f"Unknown dataset '{dataset}'."}, status=status.HTTP_404_NOT_FOUND)
+
+    export_format = request.query_params.get('export_format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        return Response({"detail": f"Unsupported format '{export_format}'."}, status=status.HTTP_400_BAD_REQUEST)
+
+    content_type, extension = EXPORT_FORMATS[export_format]
+    filename = f"{dataset}.{extension}"
+    queryset = pin_database(get_export_queryset(dataset, request.query_params, department=department))
+    rows = pinned_reads(iter_rows(dataset, queryset), queryset.db)
+
+    if export_format == 'csv':
+        # CSV can go straight to the client row by row
+        response = StreamingHttpResponse(iter_csv(dataset, rows), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    # XLSX and Parquet need a seekable file, so spool to a temp file on disk
+    fh = tempfile.TemporaryFile()
+    try:
+        WRITERS[export_format](dataset, rows, fh)
+    except ExportFormatUnavailable as e:
+        fh.close()
+        return Response({"detail": str(e)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+    fh.seek(0)
+    return FileResponse(fh, as_attachment=True, filename=filename, content_type=content_type)
+
+
+# -------------------------------
+# ✅ 13️⃣ PROMETHEUS METRICS ENDPOINT
+# -------------------------------
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Plain Django view (no JWT) so scrapers
+    can reach it; they need METRICS_TOKEN or an address in METRICS_ALLOWED_IPS.
+    """
+    if not metrics.metrics_enabled():
+        return HttpResponse("Metrics are disabled or prometheus_client is not installed.",
+                            status=404, content_type='text/plain')
+    if not metrics.scrape_allowed(request):
+        return HttpResponse("Forbidden.", status=403, content_type='text/plain')
+    body, content_type = metrics.render_latest()
+    return HttpResponse(body, content_type=content_type)
+
+
+# -------------------------------
+# ✅ 14️⃣ SLOW QUERY LOG VIEW
+# -------------------------------
+SLOW_QUERY_ORDERING = {'total': '-total_ms', 'max': '-max_ms', 'count': '-count', 'recent': '-last_seen'}
+
+
+class SlowQueryListView(ReplicaReadMixin, generics.ListAPIView):
+    """
+    API endpoint for admins to see the worst queries recorded by the slow-query log.
+    ?order=total|max|count|recent, ?full_scan=1 to only show queries without an index.
+    """
+    serializer_class = SlowQuerySerializer
+    permission_classes = [permissions.IsAuthenticated, permissions.IsAdminUser]
+
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = SlowQuery.objects.order_by(SLOW_QUERY_ORDERING.get(params.get('order'), '-total_ms'))
+        if params.get('full_scan') in ('1', 'true'):
+            queryset = queryset.filter(full_scan=True)
+        try:
+            limit = min(int(params.get('limit', 50)), 500)
+        except ValueError:
+            limit = 50
+        return queryset[:limit]
+
+
+# -------------------------------
+# ✅ 15️⃣ ANALYTICS VIEW (DAILY ROLLUPS)
+# -------------------------------
+@replica_reads
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def complaint_analytics(request):
+    """
+    API endpoint for the dashboard charts, served from the daily rollups.
+    ?bucket=day|week|month|year|all, ?group=category,department,status,
+    ?from=/?to=YYYY-MM-DD, ?category=, ?status=, ?department=<id> (0 = unassigned).
+    Admins see every department; department users only their own.
+    """
+    user = request.user
+    params = request.query_params
+    if user.is_staff:
+        department = params.get('department')
+    elif user.role == 'department':
+        department = user.id
+    else:
+        return Response({"detail": "You do not have permission to view analytics."}, status=status.HTTP_403_FORBIDDEN)
+
+    bucket = params.get('bucket', 'month')
+    if bucket not in BUCKETS:
+        return Response({"detail": f"Unknown bucket '{bucket}'."}, status=status.HTTP_400_BAD_REQUEST)
+    group = [name for name in params.get('group', '').split(',') if name]
+    unknown = [name for name in group if name not in GROUPS]
+    if unknown:
+        return Response({"detail": f"Cannot group by {', '.join(unknown)}."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        start, end = (parse_date(params[name]) if params.get(name) else None for name in ('from', 'to'))
+        department = int(department) if department not in (None, '') else None
+    except ValueError:
+        return Response({"detail": "Invalid date or department."}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = timeseries(
+        bucket, group, start, end,
+        category=params.get('category') or None, status=params.get('status') or None, department_id=department,
+    )
+    if 'department' in group:
+        emails = User.objects.in_bulk({row['department_id'] for row in rows if row['department_id']})
+        for row in rows:
+            department_user = emails.get(row.pop('department_id'))
+            row['department'] = department_user.id if department_user else None
+            row['department_name'] = department_user.email if department_user else None
+    return Response(rows)
+
+
+# -------------------------------
+# ✅ 16️⃣ DEPARTMENT KPI VIEW
+# -------------------------------
+@replica_reads
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def department_kpi_view(request):
+    """
+    API endpoint for department performance: time-to-assign and time-to-resolve
+    percentiles, reopens and average feedback rating per department.
+    Cached for DEPARTMENT_KPI_CACHE_SECONDS; admins can pass ?refresh=1.
+    Department users only get their own entry.
+    """
+    user = request.user
+    if not user.is_staff and user.role != 'department':
+        return Response({"detail": "You do not have permission to view KPIs."}, status=status.HTTP_403_FORBIDDEN)
+
+    refresh = user.is_staff and request.query_params.get('refresh') in ('1', 'true')
+    result = department_kpis(refresh=refresh)
+    if not user.is_staff:
+        result = {**result, 'departments': [row for row in result['departments'] if row['department'] == user.id]}
+    return Response(result)
+
+
+# -------------------------------
+# ✅ 17️⃣ SNAPSHOT REPORT VIEW
+# -------------------------------
+@replica_reads
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def analytics_report(request, report):
+    """
+    API endpoint for the heavier reports (summary, category-trends, hotspots,
+    ratings), computed from the columnar snapshot rather than the database.
+    Admins can pass ?department=<id>; department users only see their own.
+    """
+    user = request.user
+    if user.is_staff:
+        department = request.query_params.get('department')
+    elif user.role == 'department':
+        department = user.id
+    else:
+        return Response({"detail": "You do not have permission to view reports."}, status=status.HTTP_403_FORBIDDEN)
+    if report not in REPORTS:
+        return Response({"detail": f"Unknown report '{report}'."}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        department = int(department) if department not in (None, '') else None
+        return Response(run_report(report, request.query_params, department))
+    except ValueError as exc:
+        return Response({"detail": str(exc) or "Invalid report options."}, status=status.HTTP_400_BAD_REQUEST)
+    except SnapshotUnavailable as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+# -------------------------------
+# ✅ 18️⃣ COMPLAINT CHANGE FEED VIEW
+# -------------------------------
+@replica_reads
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def complaint_changes(request):
+    """
+    API endpoint for incremental sync of the caller's complaint list (all
+    complaints for admins, assigned ones for departments, their own for
+    citizens). ?cursor= is the `cursor` of the previous response, 0 or
+    empty to start; ?limit= caps the page (default 500, max 2000). Clients
+    drop the `removed` ids, then upsert `complaints`, and ask again with
+    the new cursor while `has_more` is true.
+    """
+    try:
+        cursor = int(request.query_params.get('cursor') or 0)
+        limit = min(int(request.query_params.get('limit') or 500), 2000)
+    except ValueError:
+        return Response({"detail": "cursor and limit must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+    if cursor < 0 or limit < 1:
+        return Response({"detail": "cursor and limit must be positive."}, status=status.HTTP_400_BAD_REQUEST)
+    if not request.user.is_staff and request.user.role not in ('department', 'citizen'):
+        return Response({"detail": "You do not have a complaint list."}, status=status.HTTP_403_FORBIDDEN)
+
+    complaints, removed, cursor, has_more = changes_since(request.user, cursor, limit)
+    return Response({
+        'cursor': cursor,
+        'has_more': has_more,
+        'removed': removed,
+        'complaints': ComplaintSerializer(complaints, many=True).data,
+    })
+
+
+# -------------------------------
+# ✅ 19️⃣ MAP VIEWS (NEARBY + HEATMAP)
+# -------------------------------
+def _map_complaints(request):
+    """The complaints the user may see on the map, and the department they are narrowed to."""
+    user = request.user
+    if user.is_staff:
+        department = request.query_params.get('department')
+    elif user.role == 'department':
+        department = user.id
+    else:
+        raise PermissionDenied("You do not have permission to view the map.")
+    try:
+        department = int(department) if department not in (None, '') else None
+    except ValueError:
+        raise ParseError("Invalid department.")
+    queryset = Complaint.objects.all()
+    if department is not None:
+        queryset = queryset.filter(department_id=department)
+    category = request.query_params.get('category')
+    if category:
+        queryset = queryset.filter(category=category)
+    return queryset, department
+
+
+@replica_reads
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def complaints_nearby(request):
+    """
+    API endpoint for "what's open within 200 m": ?lat=&lng= and ?radius= in
+    metres (default 200, max 50000), nearest first with distance_m.
+    ?status=all includes resolved complaints; ?category=, ?limit= (max 500).
+    """
+    queryset, department = _map_complaints(request)
+    params = request.query_params
+    try:
+        lat, lng = float(params['lat']), float(params['lng'])
+        radius = float(params.get('radius') or 200)
+        limit = min(int(params.get('limit') or 100), 500)
+    except (KeyError, ValueError):
+        return Response({"detail": "lat and lng are required; radius and limit must be numbers."},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180 and 0 < radius <= 50000 and limit > 0):
+        return Response({"detail": "Coordinates or radius out of range."}, status=status.HTTP_400_BAD_REQUEST)
+
+    if params.get('status') != 'all':
+        queryset = queryset.filter(status__in=geo.OPEN_STATUSES)
+    queryset = queryset.select_related('citizen', 'department', 'feedback').prefetch_related('images')
+    complaints = geo.nearby(queryset, lat, lng, radius, limit)
+    return Response([
+        {**data, 'distance_m': complaint.distance_m}
+        for complaint, data in zip(complaints, ComplaintSerializer(complaints, many=True).data)
+    ])
+
+
+@replica_reads
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def complaint_heatmap(request):
+    """
+    API endpoint for heatmap tiles: ?tile=<geohash prefix, 0-6 characters>
+    gives complaint and open-complaint counts per cell two characters finer.
+    ?category= for one category; admins can pass ?department=<id>.
+    Tiles are cached and dropped as the complaints in them change.
+    """
+    queryset, department = _map_complaints(request)
+    tile = request.query_params.get('tile', '').lower()
+    if len(tile) > max(geo.TILE_PRECISIONS) or any(char not in geo.BASE32 for char in tile):
+        return Response({"detail": f"tile must be a geohash of at most {max(geo.TILE_PRECISIONS)} characters."},
+                        status=status.HTTP_400_BAD_REQUEST)
+    return Response(geo.heatmap_tile(queryset, tile, request.query_params.get('category'), department))
@@ -10,8 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
+import django
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +49,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'myapp.middleware.MetricsMiddleware',  # Keep first so timings cover every other middleware
+    'myapp.middleware.ProfilingMiddleware',
+    'myapp.middleware.SlowQueryMiddleware',
+    'myapp.middleware.ReplicaStickinessMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,6 +70,12 @@ CORS_ALLOWED_ORIGINS = [
 # Allow all for development
 CORS_ALLOW_ALL_ORIGINS = True
 
+from corsheaders.defaults import default_headers
+
+# The frontend sends Idempotency-Key on complaint/update/feedback POSTs (myapp/idempotency.py)
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed', 'Retry-After', 'X-Profile-Id']
+
 ROOT_URLCONF = 'myproject.urls'
 
 TEMPLATES = [
@@ -91,6 +106,27 @@ DATABASES = {
     }
 }
 
+# SQLite tuning: WAL + PRAGMAs on every connection (see myapp/db.py for the defaults)
+SQLITE_TUNING_ENABLED = True
+SQLITE_PRAGMAS = {}  # e.g. {'busy_timeout': 10000} to override a default
+DB_LOCK_RETRY_ATTEMPTS = 5  # Write transactions retried on "database is locked"
+DB_LOCK_RETRY_BASE_DELAY = 0.05  # Seconds, doubled (with jitter) on each retry
+
+if SQLITE_TUNING_ENABLED and django.VERSION >= (5, 1):
+    # Take the write lock at BEGIN so a transaction never fails upgrading from a read lock
+    DATABASES['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'}
+
+# Read replicas for list/report traffic (see myapp/routers.py). To try it locally with
+# two SQLite files, add the alias below and run `manage.py sync_sqlite_replica`:
+# DATABASES['replica'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': BASE_DIR / 'db_replica.sqlite3',
+#     'TEST': {'MIRROR': 'default'},
+# }
+DATABASE_REPLICAS = [alias for alias in ('replica',) if alias in DATABASES]
+DATABASE_ROUTERS = ['myapp.routers.PrimaryReplicaRouter']
+REPLICA_STICKY_SECONDS = 5  # Reads stay on the primary this long after a user writes
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -140,7 +176,21 @@ from datetime import timedelta
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+    ),
+    # Token-bucket budgets for views with a throttle_scope (myapp/throttling.py):
+    # '<scope>.ip' / '<scope>.user' -> 'N/period' or {'rate': 'N/period', 'burst': M}
+    'DEFAULT_THROTTLE_RATES': {
+        'register.ip': '10/hour',
+        'token.ip': {'rate': '30/min', 'burst': 60},
+        'token.user': '10/min',  # Keyed on the client address plus the submitted email
+        'complaint-create.ip': '120/hour',
+        'complaint-create.user': {'rate': '30/hour', 'burst': 10},
+        'complaint-update-log.ip': '300/min',
+        'complaint-update-log.user': '60/min',
+    },
+    # 'myapp.throttling.CacheBucketStore' shares buckets across processes via the default cache
+    'THROTTLE_BUCKET_STORE': 'myapp.throttling.LocalBucketStore',
+    'NUM_PROXIES': None,  # Set to the number of reverse proxies so client IPs come from X-Forwarded-For
 }
 
 SIMPLE_JWT = {
@@ -152,4 +202,120 @@ SIMPLE_JWT = {
 }
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Prometheus metrics (needs prometheus_client; served at /metrics)
+METRICS_ENABLED = True
+METRICS_GAUGE_INTERVAL = 60  # Seconds between background refreshes of the domain gauges
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # Scrapers send it as "Authorization: Bearer <token>"
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']  # Addresses that may scrape without the token
+
+# On-demand request profiling (admins only). When disabled the middleware is removed at startup.
+PROFILING_ENABLED = False
+PROFILING_HEADER = 'X-Profile'  # Send this header (any value) to profile a single request
+PROFILING_SAMPLE_RATE = 0.0  # Fraction of admin requests to profile automatically
+PROFILING_MODE = 'cprofile'  # 'cprofile' writes .prof files, 'sampling' writes collapsed stacks
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_MAX_PROFILES = 50
+
+# Slow-query log: queries over the threshold are aggregated in the SlowQuery table
+SLOW_QUERY_LOG_ENABLED = True
+SLOW_QUERY_THRESHOLD_MS = 100
+
+# Password hashing profile (myapp/hashers.py). New passwords use PASSWORD_HASHERS[0]; a user whose
+# stored hash has another algorithm or other parameters is rehashed on their next login.
+# Pick the cost with `manage.py benchmark_login`. argon2 needs argon2-cffi (requirements.txt); without
+# it startup fails rather than silently falling back to PBKDF2 at a cost tuned for nobody.
+PASSWORD_HASHING = {
+    'ALGORITHM': 'argon2',
+    'ARGON2_TIME_COST': 2,
+    'ARGON2_MEMORY_COST': 19456,  # KiB
+    'ARGON2_PARALLELISM': 1,
+    'PBKDF2_ITERATIONS': 1_000_000,
+}
+
+
+def password_hashers(algorithm):
+    """PASSWORD_HASHERS with the profile's algorithm first; the rest still verify older hashes."""
+    if algorithm == 'argon2' and not find_spec('argon2'):
+        raise ImproperlyConfigured(
+            "PASSWORD_HASHING['ALGORITHM'] is 'argon2' but argon2-cffi is not installed. Install it "
+            "(pip install -r requirements.txt), or choose 'pbkdf2' and set PBKDF2_ITERATIONS with benchmark_login."
+        )
+    profile_hashers = {
+        'argon2': 'myapp.hashers.ProfileArgon2PasswordHasher',
+        'pbkdf2': 'myapp.hashers.ProfilePBKDF2PasswordHasher',
+    }
+    return [
+        profile_hashers[algorithm],
+        *(path for name, path in profile_hashers.items() if name != algorithm),
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+    ]
+
+
+PASSWORD_HASHERS = password_hashers(PASSWORD_HASHING['ALGORITHM'])
+
+# Idempotency-Key responses are kept this long; `manage.py prune_idempotency_keys` deletes expired ones
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+# Notification coalescing (myapp/notify.py): another notification of the same event about the same
+# complaint for the same recipient within the window updates the existing row (latest text, count + 1).
+# None inserts a row per event.
+NOTIFICATION_COALESCE_WINDOW = timedelta(minutes=15)
+# Digest mode: e.g. timedelta(hours=1) holds notifications back and delivers them, coalesced,
+# at the next interval boundary. None delivers them immediately.
+NOTIFICATION_DIGEST_INTERVAL = None
+
+# Retention (myapp/retention.py): `manage.py apply_retention` moves rows past their policy's DAYS out of
+# the hot tables, in batches, to archive tables ('table'), gzipped JSONL ('jsonl') or nowhere ('delete').
+# Unset keys use the defaults in myapp/retention.py; DAYS None turns a policy off.
+RETENTION_POLICIES = {
+    'read_notifications': {'DAYS': 90, 'ARCHIVE': 'table'},
+    'broadcasts': {'DAYS': 180, 'ARCHIVE': 'table'},
+    'complaint_updates': {'DAYS': None, 'ARCHIVE': 'table'},
+}
+RETENTION_ARCHIVE_DIR = BASE_DIR / 'archive'
+
+# Resolved complaints with feedback untouched for this many days are moved to the archive tables
+# by `manage.py archive_complaints` (myapp/archive.py)
+COMPLAINT_ARCHIVE_AFTER_DAYS = 180
+
+# Complaint SLA targets (myapp/sla.py): how long a complaint may wait in pending/assigned, by priority,
+# with per-category overrides. `manage.py escalate_overdue --interval 60` escalates the ones past due.
+COMPLAINT_SLA = {
+    'TARGETS': {'high': timedelta(hours=24), 'medium': timedelta(days=3), 'low': timedelta(days=7)},
+    'CATEGORY_TARGETS': {
+        'water-supply': {'high': timedelta(hours=12)},
+        'drainage': {'high': timedelta(hours=12)},
+    },
+    'BATCH_SIZE': 1000,
+}
+
+# One cache shared by every process on the host. Heatmap tile invalidation (myapp/geo.py) and
+# the department KPIs warmed by `manage.py department_kpis` (myapp/kpis.py) rely on the web
+# workers and cron jobs seeing the same entries; Django's default per-process LocMemCache would
+# serve stale tiles. Across several hosts use Redis (REDIS_URL in settings_production).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+}
+
+# Department KPIs (myapp/kpis.py) are recomputed from the complaint timeline at most this often;
+# `manage.py department_kpis` refreshes them ahead of time through the shared cache above
+DEPARTMENT_KPI_CACHE_SECONDS = 600
+
+# Columnar (Arrow) snapshot of complaints, updates and feedback read by the analytics reports
+# (myapp/snapshots.py, myapp/reporting.py); refreshed incrementally by `manage.py snapshot_analytics`
+ANALYTICS_SNAPSHOT_DIR = BASE_DIR / 'snapshots'
+
+# Complaint coordinates (myapp/geo.py): GEOCODER turns a free-text location into (lat, lng) when the
+# client sends none; the default looks streets up in GEO_GAZETTEER_FILE (CSV: name,latitude,longitude).
+# Heatmap tiles are cached this long at most; changes to the complaints in a tile drop it sooner.
+GEOCODER = 'myapp.geo.gazetteer_lookup'
+GEO_GAZETTEER_FILE = BASE_DIR / 'gazetteer.csv'
+GEO_HEATMAP_CACHE_SECONDS = 3600
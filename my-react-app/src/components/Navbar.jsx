@@ -139,7 +139,7 @@ export const Navbar = ({ onMenuClick }) => {
                 ) : (
                   notifications.map((notification) => (
                     <DropdownMenuItem
-                      key={notification.id}
+                      key={`${notification.kind}-${notification.id}`}
                       className="flex flex-col items-start p-4 cursor-pointer"
                       onClick={() => {
                         // Navigate to the specific complaint if it exists
@@ -150,6 +150,9 @@ export const Navbar = ({ onMenuClick }) => {
                     >
                       <p className="text-sm font-medium whitespace-normal">
                         {notification.message}
+                        {notification.count > 1 && (
+                          <span className="text-muted-foreground"> ({notification.count} updates)</span>
+                        )}
                       </p>
                       <p className="text-xs text-muted-foreground mt-1">
                         {formatDistanceToNow(new Date(notification.created_at), { addSuffix: true })}
@@ -78,13 +78,24 @@ export const ComplaintProvider = ({ children }) => {
         formData.append('images', image);
       });
     }
-    try {
-      const res = await fetch('http://127.0.0.1:8000/api/complaints/', {
+    // Same key on every attempt: if a retry follows a POST that did reach the
+    // server, the backend replays the first response instead of creating a duplicate
+    const idempotencyKey = crypto.randomUUID();
+    const submit = () =>
+      fetch('http://127.0.0.1:8000/api/complaints/', {
         method: 'POST',
-        headers: { Authorization: `Bearer ${token}` },
+        headers: { Authorization: `Bearer ${token}`, 'Idempotency-Key': idempotencyKey },
         body: formData,
       });
 
+    try {
+      let res;
+      try {
+        res = await submit();
+      } catch (networkError) {
+        res = await submit(); // One retry on a dropped connection
+      }
+
       if (res.ok) {
         toast({
           title: 'Complaint Submitted',
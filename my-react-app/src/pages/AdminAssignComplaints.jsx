@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Navbar } from '@/components/Navbar';
 import { AppSidebar } from '@/components/AppSidebar';
@@ -22,6 +22,9 @@ const AdminAssignComplaints = () => {
   const navigate = useNavigate();
   const [complaints, setComplaints] = useState([]);
   const [loading, setLoading] = useState(true);
+  // Local copy of every complaint, kept current from the change feed
+  const allComplaints = useRef(new Map());
+  const cursor = useRef(0);
 
   // ✅ 2. Add state for departments
   const [departments, setDepartments] = useState([]);
@@ -71,8 +74,8 @@ const AdminAssignComplaints = () => {
 
       if (res.ok) {
         toast({ title: `Complaint #${complaintId} Assigned!` });
-        // Refresh the list to remove the complaint we just assigned
-        fetchUnassignedComplaints(); 
+        // Pull just the changes since the last sync (including this assignment)
+        syncComplaints();
       } else {
         toast({ title: "Assignment Failed", variant: "destructive" });
       }
@@ -81,32 +84,39 @@ const AdminAssignComplaints = () => {
     }
   };
 
-  // Fetch ALL complaints and then filter for unassigned ones
-  const fetchUnassignedComplaints = async () => {
+  // Fetch the complaints changed since the last sync and show the unassigned ones
+  const syncComplaints = async () => {
     const token = localStorage.getItem("access_token");
     if (!token) {
       setLoading(false);
       return;
     }
     try {
-      const res = await fetch("http://127.0.0.1:8000/api/complaints/all/", {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      if (res.ok) {
-        let data = await res.json();
-        
-        // Filter for complaints where 'department' is null
-        const unassigned = data.filter(c => c.department === null);
-        
-        setComplaints(unassigned.map(c => ({
+      let hasMore = true;
+      while (hasMore) {
+        const res = await fetch(`http://127.0.0.1:8000/api/complaints/changes/?cursor=${cursor.current}&limit=1000`, {
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        if (!res.ok) {
+          toast({ title: "Error fetching complaints", variant: "destructive" });
+          return;
+        }
+        const data = await res.json();
+        // Removals first, then the complaints as they are now
+        data.removed.forEach(id => allComplaints.current.delete(id));
+        data.complaints.forEach(c => allComplaints.current.set(c.id, {
           ...c,
           status: c.status?.toLowerCase().replace(" ", "-"),
           priority: c.priority?.toLowerCase(),
           category: c.category?.toLowerCase().replace(" ", "-"),
-        })));
-      } else {
-        toast({ title: "Error fetching complaints", variant: "destructive" });
+        }));
+        cursor.current = data.cursor;
+        hasMore = data.has_more;
       }
+
+      // Filter for complaints where 'department' is null
+      const unassigned = [...allComplaints.current.values()].filter(c => c.department === null);
+      setComplaints(unassigned.sort((a, b) => new Date(b.created_at) - new Date(a.created_at)));
     } catch (err) {
       toast({ title: "Network Error", variant: "destructive" });
     } finally {
@@ -115,8 +125,11 @@ const AdminAssignComplaints = () => {
   };
 
   useEffect(() => {
-    fetchUnassignedComplaints();
+    syncComplaints();
     fetchDepartments(); // ✅ 5. Fetch departments on page load
+    // Cheap enough to poll: each sync only returns what changed
+    const timer = setInterval(syncComplaints, 30000);
+    return () => clearInterval(timer);
   }, []);
 
   if (loading) {
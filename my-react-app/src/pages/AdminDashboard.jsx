@@ -12,7 +12,7 @@ import {
   ChartTooltip,
   ChartTooltipContent,
 } from "@/components/ui/chart";
-import { format, getMonth, getYear } from 'date-fns';
+import { getMonth, getYear, parseISO } from 'date-fns';
 
 const AdminDashboard = () => {
   const { toast } = useToast();
@@ -37,25 +37,21 @@ const AdminDashboard = () => {
       return;
     }
     try {
-      const res = await fetch("http://127.0.0.1:8000/api/complaints/all/", {
+      // Monthly counts per department and current status, read from the daily rollups:
+      // a few hundred rows however many complaints there are
+      const res = await fetch("http://127.0.0.1:8000/api/analytics/complaints/?bucket=month&group=department,status", {
         headers: { Authorization: `Bearer ${token}` },
       });
       if (res.ok) {
-        let data = await res.json();
-        const normalizedData = data.map((c) => ({
-          ...c,
-          status: c.status?.toLowerCase().replace(" ", "-"),
-          // department_name is now coming from our serializer
-        }));
+        const rows = await res.json();
+        const countWhere = (test) => rows.filter(test).reduce((sum, row) => sum + row.created, 0);
 
         // --- 1. Calculate Stats (Correct) ---
         const newStats = {
-          total: normalizedData.length,
-          pending: normalizedData.filter((c) => c.status === 'pending').length,
-          inProgress: normalizedData.filter((c) =>
-            ['in-progress', 'assigned'].includes(c.status)
-          ).length,
-          resolved: normalizedData.filter((c) => c.status === 'resolved').length,
+          total: countWhere(() => true),
+          pending: countWhere((row) => row.status === 'pending'),
+          inProgress: countWhere((row) => ['in-progress', 'assigned'].includes(row.status)),
+          resolved: countWhere((row) => row.status === 'resolved'),
         };
         setStats(newStats);
 
@@ -68,13 +64,13 @@ const AdminDashboard = () => {
           resolved: 0,
         }));
         
-        normalizedData.forEach(complaint => {
-          const complaintDate = new Date(complaint.created_at);
-          if (getYear(complaintDate) === currentYear) {
-            const monthIndex = getMonth(complaintDate);
-            monthlyCounts[monthIndex].complaints += 1;
-            if (complaint.status === 'resolved') {
-              monthlyCounts[monthIndex].resolved += 1;
+        rows.forEach(row => {
+          const period = parseISO(row.period);
+          if (getYear(period) === currentYear) {
+            const monthIndex = getMonth(period);
+            monthlyCounts[monthIndex].complaints += row.created;
+            if (row.status === 'resolved') {
+              monthlyCounts[monthIndex].resolved += row.created;
             }
           }
         });
@@ -83,14 +79,14 @@ const AdminDashboard = () => {
         // --- ✅ 3. Calculate Department Chart Data ---
         const deptCounts = {}; // Use an object for flexible grouping
         
-        normalizedData.forEach(complaint => {
+        rows.forEach(row => {
           // Group by department_name. If it's null/undefined, call it "Unassigned"
-          const deptName = complaint.department_name || "Unassigned"; 
+          const deptName = row.department_name || "Unassigned"; 
           
           if (!deptCounts[deptName]) {
             deptCounts[deptName] = 0;
           }
-          deptCounts[deptName]++;
+          deptCounts[deptName] += row.created;
         });
 
         // Convert object { "Unassigned": 4, "dept@gmail.com": 2 } to array
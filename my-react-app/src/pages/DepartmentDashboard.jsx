@@ -112,7 +112,8 @@ const DepartmentDashboard = () => {
           method: 'POST',
           headers: {
             'Content-Type': 'application/json',
-            'Authorization': `Bearer ${token}`
+            'Authorization': `Bearer ${token}`,
+            'Idempotency-Key': crypto.randomUUID() // A replayed request won't post the message twice
           },
           body: JSON.stringify({
             message: updateMessage,
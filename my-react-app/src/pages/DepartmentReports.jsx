@@ -10,17 +10,10 @@ import { useToast } from '@/hooks/use-toast';
 
 const DepartmentReports = () => {
   const { toast } = useToast();
-  const [complaints, setComplaints] = useState([]);
+  // Counts per status and category from the daily rollups (the backend limits them to this department)
+  const [rows, setRows] = useState([]);
   const [loading, setLoading] = useState(true);
 
-  // --- NORMALIZE FUNCTION ---
-  const normalizeComplaint = (c) => ({
-    ...c,
-    status: c.status?.toLowerCase().replace(' ', '-'),
-    priority: c.priority?.toLowerCase(),
-    category: c.category?.toLowerCase().replace(' ', '-'),
-  });
-
   // --- DATA FETCHING ---
   const fetchDepartmentComplaints = async () => {
     const token = localStorage.getItem("access_token");
@@ -30,12 +23,11 @@ const DepartmentReports = () => {
     }
     try {
       setLoading(true);
-      const res = await fetch("http://127.0.0.1:8000/api/complaints/department/", {
+      const res = await fetch("http://127.0.0.1:8000/api/analytics/complaints/?bucket=all&group=status,category", {
         headers: { Authorization: `Bearer ${token}` },
       });
       if (res.ok) {
-        const data = await res.json();
-        setComplaints(data.map(normalizeComplaint));
+        setRows(await res.json());
       } else {
         toast({ title: "Error fetching complaints", variant: "destructive" });
       }
@@ -51,10 +43,11 @@ const DepartmentReports = () => {
   }, []);
 
   // --- CALCULATE STATS ---
+  const countWhere = (test) => rows.filter(test).reduce((sum, row) => sum + row.created, 0);
   const stats = {
-    total: complaints.length,
-    inProgress: complaints.filter(c => ['in-progress', 'assigned'].includes(c.status)).length,
-    resolved: complaints.filter(c => c.status === 'resolved').length,
+    total: countWhere(() => true),
+    inProgress: countWhere(row => ['in-progress', 'assigned'].includes(row.status)),
+    resolved: countWhere(row => row.status === 'resolved'),
   };
 
   // --- PREPARE CHART DATA ---
@@ -65,12 +58,12 @@ const DepartmentReports = () => {
   ].filter(item => item.value > 0); // Only show sections with data
 
   const categoryData = [
-    { name: "Road Damage", value: complaints.filter(c => c.category === "road-damage").length },
-    { name: "Water Supply", value: complaints.filter(c => c.category === "water-supply").length },
-    { name: "Streetlight", value: complaints.filter(c => c.category === "streetlight").length },
-    { name: "Garbage", value: complaints.filter(c => c.category === "garbage").length },
-    { name: "Drainage", value: complaints.filter(c => c.category === "drainage").length },
-    { name: "Other", value: complaints.filter(c => c.category === "other").length },
+    { name: "Road Damage", value: countWhere(row => row.category === "road-damage") },
+    { name: "Water Supply", value: countWhere(row => row.category === "water-supply") },
+    { name: "Streetlight", value: countWhere(row => row.category === "streetlight") },
+    { name: "Garbage", value: countWhere(row => row.category === "garbage") },
+    { name: "Drainage", value: countWhere(row => row.category === "drainage") },
+    { name: "Other", value: countWhere(row => row.category === "other") },
   ].filter(item => item.value > 0); // Only show categories with data
 
   // --- LOADING UI ---
@@ -64,7 +64,8 @@ const FeedbackPage = () => {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
-          'Authorization': `Bearer ${token}`
+          'Authorization': `Bearer ${token}`,
+          'Idempotency-Key': crypto.randomUUID()
         },
         body: JSON.stringify({
           rating: rating,